@@ -0,0 +1,99 @@
+import argparse
+import csv
+import random
+import time
+
+from text_cleaning import TextCleaner, DEFAULT_INTRO_PHRASES, DEFAULT_ENGLISH_FRAGMENTS
+
+
+def legacy_clean(text):
+    """
+    Bisheriges Verfahren aus _clean_generated_text(): startswith je Phrase, Kleinschreibung je Satz.
+    """
+    intro_phrases = [
+        "Hier ist die realistische Bürgeranfrage:",
+        "Hier ist eine realistische Bürgeranfrage:",
+        "Hier ist eine mögliche Bürgeranfrage:",
+        "Hier ist die Bürgeranfrage:",
+        "Here is a realistic citizen inquiry about",
+        "Here is a realistic citizen's request",
+        "Subject:",
+        "Betreff:",
+        "Here is a realistic citizen's inquiry",
+        "Die Bürgeranfrage lautet:",
+        "Realistische Bürgeranfrage:",
+        "Eine realistische Bürgeranfrage zum Thema",
+    ]
+    for phrase in intro_phrases:
+        if text.startswith(phrase):
+            text = text[len(phrase):].strip()
+            text = text.lstrip(':"\'')
+            break
+
+    english_sentences = [
+        "This is a realistic query about",
+        "Here is the request:",
+        "Here's a realistic citizen inquiry",
+    ]
+    for sentence in english_sentences:
+        if sentence.lower() in text.lower():
+            parts = text.split(sentence, 1)
+            if len(parts) > 1:
+                if not parts[0].strip():
+                    text = parts[1].strip().lstrip(':"\'')
+                else:
+                    text = parts[0].strip()
+
+    return text.strip()
+
+
+def raw_variants(texts, rng):
+    """
+    Erzeugt aus den bereinigten Korpustexten Rohtexte, wie sie das Modell liefert:
+    unverändert, mit Einleitung, mit englischem Satz am Anfang oder mitten im Text.
+    """
+    variants = []
+    for text in texts:
+        variants.append(text)
+        variants.append(f"{rng.choice(DEFAULT_INTRO_PHRASES)} \"{text}\"")
+        variants.append(f"{rng.choice(DEFAULT_ENGLISH_FRAGMENTS)} {text}")
+        middle = len(text) // 2
+        variants.append(f"{text[:middle]} {rng.choice(DEFAULT_ENGLISH_FRAGMENTS)} {text[middle:]}")
+    return variants
+
+
+def measure(func, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark der vorkompilierten Textbereinigung')
+    parser.add_argument('--csv', type=str, default="../KI-Web-Test/synthetische_buergeranfragen.csv",
+                        help='Korpus mit generierten Anfragen')
+    parser.add_argument('--wiederholungen', type=int, default=20, help='Durchläufe über alle Texte')
+    args = parser.parse_args()
+
+    with open(args.csv, 'r', encoding='utf-8') as csvfile:
+        texts = [row['nachricht'] for row in csv.DictReader(csvfile)]
+    variants = raw_variants(texts, random.Random(42))
+    cleaner = TextCleaner()
+
+    # Bei gleicher Groß-/Kleinschreibung muss das Ergebnis identisch sein
+    for text in variants:
+        assert cleaner.clean(text) == legacy_clean(text), text[:80]
+
+    print(f"{len(texts)} Anfragen, Zeiten in Mikrosekunden pro Text")
+    print(f"{'Eingabe':<40} {'bisher':>8} {'kompiliert':>11} {'Faktor':>7}")
+    for label, inputs in [("Korpustexte (ohne Fragmente)", texts),
+                          ("Rohtexte (Einleitung/Englisch gemischt)", variants)]:
+        legacy = measure(legacy_clean, inputs, args.wiederholungen)
+        compiled = measure(cleaner.clean, inputs, args.wiederholungen)
+        print(f"{label:<40} {legacy:>8.2f} {compiled:>11.2f} {legacy / compiled:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
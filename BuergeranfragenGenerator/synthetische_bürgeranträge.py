@@ -7,9 +7,114 @@ import random
 import requests
 import argparse
 import datetime
+import gzip
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Callable, Union, Pattern
 import os
+import sys
+
+# Gemeinsamer Ollama-Client der KI-Web liegt im Nachbarverzeichnis
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "KI-Web"))
+from ollama_client import OllamaClient
+from text_cleaning import TextCleaner
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow nicht installiert: Parquet-Export steht nicht zur Verfügung
+    pa = None
+
+# Spalten der Ausgabedatei
+CSV_FIELDNAMES = ['id', 'vorname', 'nachname', 'e_mail', 'betreff', 'nachricht', 'kategorie']
+
+# Formate für den JSON-Export: eine Datei pro Anfrage oder eine Sammeldatei
+JSON_FORMATS = ("dateien", "jsonl", "jsonl.gz", "parquet")
+
+# Höchstzahl gleichzeitig geöffneter temporärer Blockdateien beim blockweisen Mischen
+SHUFFLE_MAX_OPEN_FILES = 64
+
+# HTTP-Status, bei denen ein erneuter Versuch sinnvoll ist (Überlast bzw. Serverfehler)
+RETRY_STATUS_TOO_MANY_REQUESTS = 429
+RETRY_STATUS_SERVER_ERROR = 500
+
+
+def is_retryable_status(status: int) -> bool:
+    """
+    Prüft, ob ein HTTP-Status auf einen vorübergehenden Fehler hinweist (429 oder 5xx).
+    Bei anderen Fehlern (z.B. 404 für ein unbekanntes Modell, 400) bringt eine Wiederholung nichts.
+    """
+    return status == RETRY_STATUS_TOO_MANY_REQUESTS or status >= RETRY_STATUS_SERVER_ERROR
+
+
+class BulkExporter:
+    """
+    Schreibt alle Anfragen in eine Sammeldatei (JSON Lines, gzip-komprimiert oder Parquet).
+    
+    Die Anfragen werden gepuffert und in Blöcken von batch_size Einträgen geschrieben.
+    """
+    
+    def __init__(self, directory: str, json_format: str = "jsonl", batch_size: int = 1000):
+        """
+        Öffnet die Sammeldatei im angegebenen Verzeichnis.
+        
+        Args:
+            directory: Zielverzeichnis
+            json_format: "jsonl", "jsonl.gz" oder "parquet"
+            batch_size: Anzahl Anfragen pro Schreibvorgang
+        """
+        if json_format not in JSON_FORMATS[1:]:
+            raise ValueError(f"Unbekanntes Exportformat: {json_format}")
+        if json_format == "parquet" and pa is None:
+            raise ValueError("Für den Parquet-Export muss pyarrow installiert sein")
+        self.json_format = json_format
+        self.batch_size = batch_size
+        self.path = os.path.join(directory, f"anfragen.{json_format}")
+        self.count = 0
+        self._buffer = []
+        self._writer = None
+        if json_format == "jsonl":
+            self._file = open(self.path, 'w', encoding='utf-8')
+        elif json_format == "jsonl.gz":
+            self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        else:
+            self._file = None
+    
+    def write(self, query: Dict[str, Any]) -> None:
+        """
+        Nimmt eine Anfrage in den Puffer auf und schreibt ihn, sobald er voll ist.
+        
+        Args:
+            query: Die Anfrage
+        """
+        self._buffer.append(query)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+    
+    def close(self) -> None:
+        """
+        Schreibt den restlichen Puffer und schließt die Datei.
+        """
+        self._flush()
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+    
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._file is not None:
+            self._file.write("".join(json.dumps(query, ensure_ascii=False) + "\n" for query in self._buffer))
+        else:
+            table = pa.Table.from_pylist(self._buffer)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        self.count += len(self._buffer)
+        self._buffer = []
+
 
 class SyntheticQueryGenerator:
     """
@@ -21,7 +126,22 @@ class SyntheticQueryGenerator:
                  ollama_url: str = "http://localhost:11434",
                  num_queries_per_category: int = 1000,
                  output_file: str = "synthetische_buergeranfragen.csv",
-                 json_dir: str = "json_anfragen"):
+                 json_dir: str = "json_anfragen",
+                 pool_size: int = 4,
+                 timeout: float = 60,
+                 workers: int = 1,
+                 max_retries: int = 3,
+                 retry_delay: float = 2.0,
+                 chunk_size: int = 64,
+                 streaming: bool = False,
+                 shuffle_chunk_size: int = 10000,
+                 json_format: str = "jsonl",
+                 export_batch_size: int = 1000,
+                 intro_phrases: List[str] = None,
+                 english_fragments: List[str] = None,
+                 ollama_stream: bool = False,
+                 max_tokens: int = None,
+                 seed: int = None):
         """
         Initialisiert den Generator.
         
@@ -30,13 +150,49 @@ class SyntheticQueryGenerator:
             ollama_url: URL des Ollama-Servers
             num_queries_per_category: Anzahl der zu generierenden Anfragen pro Kategorie
             output_file: Name der Ausgabedatei
-            json_dir: Verzeichnis, in dem die JSON-Dateien gespeichert werden
+            json_dir: Verzeichnis, in dem die JSON-Dateien bzw. die Sammeldatei gespeichert werden
+            pool_size: Größe des Verbindungspools zum Ollama-Server
+            timeout: Timeout pro Ollama-Aufruf in Sekunden
+            workers: Anzahl paralleler Ollama-Aufrufe
+            max_retries: Anzahl Wiederholungen einer fehlgeschlagenen Generierung
+            retry_delay: Wartezeit vor der ersten Wiederholung in Sekunden (verdoppelt sich je Versuch)
+            chunk_size: Anzahl Anfragen, die gemeinsam vorbereitet und parallel generiert werden
+                        (unabhängig von workers, damit die Zufallsfolge reproduzierbar bleibt)
+            streaming: Anfragen blockweise in eine Teildatei schreiben und per Checkpoint fortsetzbar machen
+            shuffle_chunk_size: Mittlere Blockgröße (Zeilen) beim abschließenden Mischen im Streaming-Modus
+            json_format: "dateien" (eine JSON-Datei pro Anfrage), "jsonl", "jsonl.gz" oder "parquet"
+            export_batch_size: Anzahl Anfragen pro Schreibvorgang in die Sammeldatei
+            intro_phrases: Zusätzliche Einleitungsphrasen, die am Textanfang entfernt werden
+            english_fragments: Zusätzliche englische Fragmente, an denen der Text abgeschnitten wird
+            ollama_stream: Antworten von Ollama gestreamt empfangen (Timeout gilt dann je Teilstück)
+            max_tokens: Höchstzahl generierter Tokens pro Anfrage (None = Standard des Modells)
+            seed: Startwert, mit dem der Zufallsgenerator initialisiert wurde (wird im Checkpoint geprüft)
         """
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f"Unbekanntes Exportformat: {json_format}")
+        if json_format == "parquet" and pa is None:
+            raise ValueError("Für den Parquet-Export muss pyarrow installiert sein")
         self.model_name = model_name
         self.ollama_url = ollama_url
         self.num_queries_per_category = num_queries_per_category
         self.output_file = output_file
         self.json_dir = json_dir
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.chunk_size = chunk_size
+        self.streaming = streaming
+        self.shuffle_chunk_size = shuffle_chunk_size
+        self.json_format = json_format
+        self.export_batch_size = export_batch_size
+        self.cleaner = TextCleaner(intro_phrases, english_fragments)
+        self.partial_file = output_file + ".part"
+        self.checkpoint_file = output_file + ".checkpoint.json"
+        self.failed = 0
+        self.ollama_stream = ollama_stream
+        self.seed = seed
+        self.generate_params = {"options": {"num_predict": max_tokens}} if max_tokens else {}
+        self.client = OllamaClient(ollama_url, pool_size=max(pool_size, workers), timeout=timeout)
         
         # Stelle sicher, dass das JSON-Verzeichnis existiert
         os.makedirs(self.json_dir, exist_ok=True)
@@ -255,31 +411,80 @@ class SyntheticQueryGenerator:
         Returns:
             Die bereinigte generierte Antwort als String
         """
+        return self._request_ollama(prompt)[0]
+    
+    def _request_ollama(self, prompt: str) -> tuple:
+        """
+        Sendet einen Prompt an Ollama und stuft Fehler als vorübergehend oder dauerhaft ein.
+        
+        Args:
+            prompt: Der Prompt für das Modell
+        
+        Returns:
+            Tuple aus (bereinigte Antwort oder Fehlermeldung, ob ein erneuter Versuch sinnvoll ist)
+        """
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
+            if self.ollama_stream:
+                text = "".join(self.client.generate_stream(self.model_name, prompt, **self.generate_params))
+                return self._clean_generated_text(text.strip()), False
+            
+            response = self.client.generate(self.model_name, prompt, **self.generate_params)
             
             if response.status_code == 200:
                 text = response.json().get("response", "").strip()
                 
                 # Bereinige den Text von unerwünschten Einleitungen
                 text = self._clean_generated_text(text)
-                return text
+                return text, False
             else:
                 print(f"Fehler beim Aufruf von Ollama: {response.status_code}")
                 print(f"Response: {response.text}")
-                return f"[Fehler bei der Generierung: HTTP {response.status_code}]"
+                return (f"[Fehler bei der Generierung: HTTP {response.status_code}]",
+                        is_retryable_status(response.status_code))
                 
-        except requests.exceptions.RequestException as e:
+        except requests.exceptions.HTTPError as e:
+            # Nur im Streaming-Modus: HTTP-Fehler oder Fehlermeldung im Stream (dann mit Status 200)
+            print(f"Fehler beim Aufruf von Ollama: {str(e)}")
+            status = e.response.status_code if e.response is not None else None
+            return f"[Fehler bei der Generierung: {str(e)}]", status is not None and is_retryable_status(status)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
             print(f"Fehler bei der Verbindung zu Ollama: {str(e)}")
-            return f"[Verbindungsfehler: {str(e)}]"
+            return f"[Verbindungsfehler: {str(e)}]", True
+        except json.JSONDecodeError as e:
+            # Abgeschnittene oder verstümmelte Antwort (z.B. eine halbe Zeile im Stream)
+            print(f"Unvollständige Antwort von Ollama: {str(e)}")
+            return f"[Verbindungsfehler: unvollständige Antwort: {str(e)}]", True
+        except requests.exceptions.RequestException as e:
+            print(f"Fehler beim Aufruf von Ollama: {str(e)}")
+            return f"[Fehler bei der Generierung: {str(e)}]", False
+    
+    @staticmethod
+    def _is_error(text: str) -> bool:
+        """
+        Prüft, ob _call_ollama() eine Fehlermeldung statt einer Anfrage geliefert hat.
+        """
+        return text.startswith(("[Fehler", "[Verbindungsfehler"))
+    
+    def _call_ollama_with_retry(self, prompt: str) -> str:
+        """
+        Ruft Ollama auf und wiederholt vorübergehend fehlgeschlagene Aufrufe (Verbindungsfehler,
+        Timeouts, HTTP 429 und 5xx) mit wachsender Wartezeit. Andere Fehler werden sofort gemeldet.
+        
+        Args:
+            prompt: Der Prompt für das Modell
+        
+        Returns:
+            Die generierte Antwort oder die Fehlermeldung des letzten Versuchs
+        """
+        text, retryable = self._request_ollama(prompt)
+        for attempt in range(self.max_retries):
+            if not retryable:
+                break
+            time.sleep(self.retry_delay * 2 ** attempt)
+            print(f"  Wiederhole Generierung (Versuch {attempt + 2}/{self.max_retries + 1})")
+            text, retryable = self._request_ollama(prompt)
+        return text
     
     def _clean_generated_text(self, text: str) -> str:
         """
@@ -291,51 +496,7 @@ class SyntheticQueryGenerator:
         Returns:
             Der bereinigte Text
         """
-        # Liste von Einleitungsphrasen, die entfernt werden sollen
-        intro_phrases = [
-            "Hier ist die realistische Bürgeranfrage:",
-            "Hier ist eine realistische Bürgeranfrage:",
-            "Hier ist eine mögliche Bürgeranfrage:",
-            "Hier ist die Bürgeranfrage:",
-            "Here is a realistic citizen inquiry about",
-            "Here is a realistic citizen's request",
-            "Subject:",
-            "Betreff:",
-            "Here is a realistic citizen's inquiry",
-            "Die Bürgeranfrage lautet:",
-            "Realistische Bürgeranfrage:",
-            "Eine realistische Bürgeranfrage zum Thema",
-        ]
-        
-        # Überprüfe, ob der Text mit einer der Einleitungsphrasen beginnt
-        for phrase in intro_phrases:
-            if text.startswith(phrase):
-                # Entferne die Einleitung und bereinige den Anfang
-                text = text[len(phrase):].strip()
-                # Manchmal folgt ein Doppelpunkt oder Anführungszeichen nach der Einleitung
-                text = text.lstrip(':"\'')
-                break
-        
-        # Überprüfe auf englische Sätze im Text und entferne sie
-        english_sentences = [
-            "This is a realistic query about",
-            "Here is the request:",
-            "Here's a realistic citizen inquiry",
-        ]
-        
-        for sentence in english_sentences:
-            if sentence.lower() in text.lower():
-                # Teile den Text beim englischen Satz
-                parts = text.split(sentence, 1)
-                if len(parts) > 1:
-                    # Wenn der Satz am Anfang steht, nimm nur den Teil danach
-                    if not parts[0].strip():
-                        text = parts[1].strip().lstrip(':"\'')
-                    else:
-                        # Sonst behalte den Teil vor dem englischen Satz
-                        text = parts[0].strip()
-        
-        return text.strip()
+        return self.cleaner.clean(text)
     
     def _generate_subject(self, category: str, message: str) -> str:
         """
@@ -384,61 +545,150 @@ class SyntheticQueryGenerator:
         
         return subject
     
-    def generate_queries(self) -> List[Dict[str, Any]]:
+    def _prepare_task(self, category: str) -> Dict[str, Any]:
         """
-        Generiert die angegebene Anzahl von Anfragen für jede Kategorie.
+        Wählt Name und E-Mail und erstellt den Prompt für eine Anfrage.
         
+        Läuft immer im Haupt-Thread, damit die Zufallsfolge unabhängig von der Parallelität ist.
+        
+        Args:
+            category: Kategorie der Anfrage
+            
         Returns:
-            Eine Liste von Dictionaries mit den generierten Anfragen
+            Dictionary mit Kategorie, Namen, E-Mail und Prompt
         """
-        all_queries = []
-        next_id = 1
+        first_name = random.choice(self.first_names)
+        last_name = random.choice(self.last_names)
+        return {
+            "kategorie": category,
+            "vorname": first_name,
+            "nachname": last_name,
+            "e_mail": self._generate_email(first_name, last_name),
+            "prompt": self._generate_prompt(category, first_name, last_name)
+        }
+    
+    def _generate_chunks(self, category_index: int = 0, query_index: int = 0, next_id: int = 1):
+        """
+        Generiert die Anfragen blockweise, optional ab einer gespeicherten Position.
         
-        for category in self.categories:
-            print(f"Generiere {self.num_queries_per_category} Anfragen für Kategorie '{category}'...")
+        Die Ollama-Aufrufe laufen blockweise parallel über self.workers Threads. Die Ergebnisse
+        werden in Auftragsreihenfolge verarbeitet, sodass die IDs deterministisch bleiben.
+        
+        Args:
+            category_index: Index der Kategorie, bei der begonnen wird
+            query_index: Index der Anfrage innerhalb dieser Kategorie
+            next_id: Nächste zu vergebende ID
             
-            for i in range(self.num_queries_per_category):
-                # Name und E-Mail generieren
-                first_name = random.choice(self.first_names)
-                last_name = random.choice(self.last_names)
-                email = self._generate_email(first_name, last_name)
-                
-                # Anfrage generieren mit personalisierten Namen
-                prompt = self._generate_prompt(category, first_name, last_name)
-                nachricht = self._call_ollama(prompt)
+        Yields:
+            Dictionary mit den Anfragen des Blocks ("anfragen") und der Position danach
+            ("kategorie_index", "anfrage_index", "next_id")
+        """
+        self.failed = 0
+        chunk_size = self.chunk_size
+        categories = list(self.categories)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for c_index in range(category_index, len(categories)):
+                category = categories[c_index]
+                first = query_index if c_index == category_index else 0
+                print(f"Generiere {self.num_queries_per_category} Anfragen für Kategorie '{category}'...")
                 
-                if not nachricht.startswith("[Fehler"):
-                    # Betreff generieren
-                    betreff = self._generate_subject(category, nachricht)
-                    
-                    # Unique ID erstellen
-                    uid = next_id
-                    next_id += 1
-                    
-                    # Datensatz erstellen
-                    query = {
-                        "id": uid,
-                        "vorname": first_name,
-                        "nachname": last_name,
-                        "e_mail": email,
-                        "betreff": betreff,
-                        "nachricht": nachricht,
-                        "kategorie": category
-                    }
+                for chunk_start in range(first, self.num_queries_per_category, chunk_size):
+                    chunk = range(chunk_start, min(chunk_start + chunk_size, self.num_queries_per_category))
+                    chunk_queries = []
                     
-                    all_queries.append(query)
-                    print(f"  Anfrage {i+1}/{self.num_queries_per_category} erstellt")
+                    # Name, E-Mail und Prompt erzeugen, dann die Anfragen parallel generieren
+                    tasks = [self._prepare_task(category) for _ in chunk]
+                    messages = executor.map(self._call_ollama_with_retry, [t["prompt"] for t in tasks])
                     
-                    # Speichere die JSON-Datei
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:17]
-                    json_filename = f"{last_name}_{first_name}_{timestamp}.json"
-                    json_path = os.path.join(self.json_dir, json_filename)
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(query, f, ensure_ascii=False, indent=4)
+                    for i, task, nachricht in zip(chunk, tasks, messages):
+                        if self._is_error(nachricht):
+                            self.failed += 1
+                            print(f"  Fehler bei Anfrage {i+1}/{self.num_queries_per_category}: {nachricht}")
+                            continue
+                        
+                        # Betreff generieren
+                        betreff = self._generate_subject(category, nachricht)
+                        
+                        # Unique ID erstellen
+                        uid = next_id
+                        next_id += 1
+                        
+                        # Datensatz erstellen
+                        query = {
+                            "id": uid,
+                            "vorname": task["vorname"],
+                            "nachname": task["nachname"],
+                            "e_mail": task["e_mail"],
+                            "betreff": betreff,
+                            "nachricht": nachricht,
+                            "kategorie": category
+                        }
+                        
+                        chunk_queries.append(query)
+                        print(f"  Anfrage {i+1}/{self.num_queries_per_category} erstellt")
                         
-                else:
-                    print(f"  Fehler bei Anfrage {i+1}/{self.num_queries_per_category}: {nachricht}")
+                        # Speichere die JSON-Datei (Sammelformate werden nach der Generierung geschrieben)
+                        if self.json_format == "dateien":
+                            self._write_json_file(query)
+                    
+                    # Position nach diesem Block (am Kategorie-Ende: Beginn der nächsten Kategorie)
+                    if chunk.stop >= self.num_queries_per_category:
+                        position = (c_index + 1, 0)
+                    else:
+                        position = (c_index, chunk.stop)
+                    yield {
+                        "anfragen": chunk_queries,
+                        "kategorie_index": position[0],
+                        "anfrage_index": position[1],
+                        "next_id": next_id
+                    }
+        
+        if self.failed:
+            print(f"Warnung: {self.failed} Anfragen konnten auch nach Wiederholungen nicht generiert werden.")
+    
+    def _write_json_file(self, query: Dict[str, Any]) -> None:
+        """
+        Speichert eine Anfrage als eigene JSON-Datei. Die ID im Dateinamen verhindert Namenskollisionen.
+        
+        Args:
+            query: Die Anfrage
+        """
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"{query['nachname']}_{query['vorname']}_{timestamp}_{query['id']}.json"
+        json_path = os.path.join(self.json_dir, json_filename)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(query, f, ensure_ascii=False, indent=4)
+    
+    def export_json(self, queries) -> str:
+        """
+        Schreibt die Anfragen in die Sammeldatei des gewählten Formats.
+        
+        Args:
+            queries: Iterierbare Anfragen (Liste oder Zeilen der fertigen CSV-Datei)
+            
+        Returns:
+            Pfad der Sammeldatei
+        """
+        exporter = BulkExporter(self.json_dir, self.json_format, self.export_batch_size)
+        try:
+            for query in queries:
+                exporter.write(query)
+        finally:
+            exporter.close()
+        print(f"{exporter.count} Anfragen in '{exporter.path}' exportiert.")
+        return exporter.path
+    
+    def generate_queries(self) -> List[Dict[str, Any]]:
+        """
+        Generiert die angegebene Anzahl von Anfragen für jede Kategorie.
         
+        Returns:
+            Eine Liste von Dictionaries mit den generierten Anfragen
+        """
+        all_queries = []
+        for chunk in self._generate_chunks():
+            all_queries.extend(chunk["anfragen"])
         return all_queries
     
     def save_to_csv(self, queries: List[Dict[str, Any]]) -> None:
@@ -458,8 +708,7 @@ class SyntheticQueryGenerator:
         print(f"Daten wurden durchmischt vor dem Speichern.")
         
         with open(self.output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['id', 'vorname', 'nachname', 'e_mail', 'betreff', 'nachricht', 'kategorie']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
             
             writer.writeheader()
             for query in queries:
@@ -467,16 +716,253 @@ class SyntheticQueryGenerator:
         
         print(f"Erfolgreich {len(queries)} Anfragen in '{self.output_file}' gespeichert.")
     
+    def _checkpoint_config(self) -> Dict[str, Any]:
+        """
+        Einstellungen, die bei einer Fortsetzung mit denen des abgebrochenen Laufs übereinstimmen müssen.
+        """
+        return {
+            "seed": self.seed,
+            "anzahl_pro_kategorie": self.num_queries_per_category,
+            "kategorien": list(self.categories),
+            "modell": self.model_name,
+            "json_format": self.json_format,
+        }
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """
+        Lädt den Checkpoint einer unterbrochenen Streaming-Generierung.
+        
+        Returns:
+            Der Checkpoint oder None, wenn keiner existiert
+            
+        Raises:
+            ValueError: wenn der Checkpoint mit anderen Einstellungen erstellt wurde
+        """
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        saved = checkpoint.get("konfiguration", {})
+        expected = self._checkpoint_config()
+        differences = [key for key in expected if saved.get(key) != expected[key]]
+        if differences:
+            raise ValueError(f"Checkpoint '{self.checkpoint_file}' stammt aus einem Lauf mit anderen Einstellungen "
+                             f"({', '.join(differences)}). Zum Neubeginn '{self.checkpoint_file}' und "
+                             f"'{self.partial_file}' löschen.")
+        return checkpoint
+    
+    def _remove_json_files_from(self, first_id: int) -> int:
+        """
+        Löscht JSON-Dateien mit einer ID ab first_id, die nach dem letzten Checkpoint geschrieben wurden
+        und bei der Fortsetzung neu generiert werden.
+        
+        Args:
+            first_id: Erste nicht mehr durch den Checkpoint gedeckte ID
+            
+        Returns:
+            Anzahl gelöschter Dateien
+        """
+        removed = 0
+        for name in os.listdir(self.json_dir):
+            match = re.search(r"_(\d+)\.json$", name)
+            if match and int(match.group(1)) >= first_id:
+                os.remove(os.path.join(self.json_dir, name))
+                removed += 1
+        return removed
+    
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """
+        Schreibt den Checkpoint atomar (temporäre Datei + Umbenennen).
+        
+        Args:
+            checkpoint: Position, nächste ID, Zufallszustand und Dateigröße der Teildatei
+        """
+        tmp_path = self.checkpoint_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_file)
+    
+    def generate_streaming(self) -> int:
+        """
+        Generiert die Anfragen und hängt sie blockweise an eine Teildatei an.
+        
+        Nach jedem Block werden die Zeilen auf die Platte geschrieben und ein Checkpoint gespeichert.
+        Existiert bereits ein Checkpoint, wird an dieser Stelle fortgesetzt; Zeilen und JSON-Dateien,
+        die nach dem letzten Checkpoint geschrieben wurden, werden verworfen und neu generiert.
+        Der Checkpoint enthält die Einstellungen des Laufs und wird nur mit denselben fortgesetzt.
+        
+        Returns:
+            Anzahl der Anfragen in der Teildatei
+        """
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {"kategorie_index": 0, "anfrage_index": 0, "next_id": 1, "offset": 0}
+            with open(self.partial_file, 'w', newline='', encoding='utf-8') as csvfile:
+                csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES).writeheader()
+                checkpoint["offset"] = csvfile.tell()
+            # Sofort sichern, damit auch ein Abbruch im ersten Block mit denselben Einstellungen fortgesetzt wird
+            self._save_checkpoint(dict(checkpoint, zufallszustand=random.getstate(),
+                                       konfiguration=self._checkpoint_config()))
+        else:
+            print(f"Setze Generierung ab ID {checkpoint['next_id']} fort...")
+            version, internal, gauss = checkpoint["zufallszustand"]
+            random.setstate((version, tuple(internal), gauss))
+            if self.json_format == "dateien":
+                removed = self._remove_json_files_from(checkpoint["next_id"])
+                if removed:
+                    print(f"{removed} JSON-Dateien nach dem letzten Checkpoint entfernt.")
+        
+        with open(self.partial_file, 'r+', newline='', encoding='utf-8') as csvfile:
+            csvfile.truncate(checkpoint["offset"])
+            csvfile.seek(checkpoint["offset"])
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+            
+            for chunk in self._generate_chunks(checkpoint["kategorie_index"],
+                                               checkpoint["anfrage_index"],
+                                               checkpoint["next_id"]):
+                writer.writerows(chunk["anfragen"])
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+                self._save_checkpoint({
+                    "kategorie_index": chunk["kategorie_index"],
+                    "anfrage_index": chunk["anfrage_index"],
+                    "next_id": chunk["next_id"],
+                    "offset": csvfile.tell(),
+                    "zufallszustand": random.getstate(),
+                    "konfiguration": self._checkpoint_config()
+                })
+                checkpoint = chunk
+        
+        return checkpoint["next_id"] - 1
+    
     def run(self) -> None:
         """
         Führt den gesamten Generierungsprozess durch.
         """
         print(f"Starte Generierung mit Ollama-Modell '{self.model_name}'...")
-        queries = self.generate_queries()
-        self.save_to_csv(queries)
-        print(f"Fertig! {len(queries)} Anfragen wurden generiert.")
+        if self.streaming:
+            count = self.generate_streaming()
+            print("Mische die Daten blockweise...")
+            chunked_shuffle(self.partial_file, self.output_file, self.shuffle_chunk_size)
+            os.remove(self.partial_file)
+            os.remove(self.checkpoint_file)
+            print(f"Erfolgreich {count} Anfragen in '{self.output_file}' gespeichert.")
+            if self.json_format != "dateien":
+                json_output = self.export_json(self._read_csv(self.output_file))
+        else:
+            queries = self.generate_queries()
+            self.save_to_csv(queries)
+            count = len(queries)
+            if self.json_format != "dateien":
+                json_output = self.export_json(queries)
+        print(f"Fertig! {count} Anfragen wurden generiert.")
         print(f"- CSV-Datei: {self.output_file}")
-        print(f"- JSON-Dateien: {self.json_dir}/")
+        if self.json_format == "dateien":
+            print(f"- JSON-Dateien: {self.json_dir}/")
+        else:
+            print(f"- JSON-Export: {json_output}")
+    
+    @staticmethod
+    def _read_csv(path: str):
+        """
+        Liest die Anfragen einer fertigen CSV-Datei zeilenweise (IDs wieder als Zahl).
+        
+        Args:
+            path: Pfad zur CSV-Datei
+            
+        Yields:
+            Die Anfragen als Dictionaries
+        """
+        with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                row['id'] = int(row['id'])
+                yield row
+
+
+def chunked_shuffle(input_file: str, output_file: str, chunk_rows: int = 10000,
+                    max_open_files: int = SHUFFLE_MAX_OPEN_FILES) -> int:
+    """
+    Mischt eine CSV-Datei mit begrenztem Speicherbedarf.
+    
+    Jede Zeile wird zufällig einem von mehreren temporären Blöcken zugeordnet; anschließend wird
+    jeder Block im Speicher gemischt und an die Ausgabe angehängt. Im Speicher liegt dabei
+    jeweils nur ein Block (im Mittel chunk_rows Zeilen). Wären mehr als max_open_files Blöcke
+    nötig, wird auf max_open_files Gruppen verteilt und jede Gruppe auf dieselbe Weise gemischt.
+    
+    Args:
+        input_file: Zu mischende CSV-Datei mit Kopfzeile
+        output_file: Zieldatei
+        chunk_rows: Mittlere Anzahl Zeilen pro Block
+        max_open_files: Höchstzahl gleichzeitig geöffneter Blockdateien pro Ebene
+        
+    Returns:
+        Anzahl der gemischten Zeilen
+    """
+    with open(input_file, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        total = sum(1 for _ in reader)
+    if header is None:
+        return 0
+    
+    with open(output_file, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        with open(input_file, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader)
+            _shuffle_rows(reader, total, writer, chunk_rows, max(2, max_open_files), f"{output_file}.block")
+    return total
+
+
+def _shuffle_rows(rows, total: int, writer, chunk_rows: int, max_open_files: int, prefix: str) -> None:
+    """
+    Verteilt total Zeilen zufällig auf Blockdateien und schreibt sie gemischt an writer.
+    
+    Args:
+        rows: Iterator über die Zeilen
+        total: Anzahl der Zeilen in rows
+        writer: csv.writer der Ausgabe
+        chunk_rows: Mittlere Anzahl Zeilen pro Block
+        max_open_files: Höchstzahl gleichzeitig geöffneter Blockdateien
+        prefix: Namensanfang der temporären Blockdateien
+    """
+    num_chunks = -(-total // chunk_rows)
+    if num_chunks <= 1:
+        rows = list(rows)
+        random.shuffle(rows)
+        writer.writerows(rows)
+        return
+    
+    # Zu viele Blöcke für eine Ebene: Gruppen bilden und diese anschließend weiter aufteilen
+    grouped = num_chunks > max_open_files
+    num_chunks = min(num_chunks, max_open_files)
+    chunk_paths = [f"{prefix}{i}.tmp" for i in range(num_chunks)]
+    counts = [0] * num_chunks
+    chunk_files = [open(path, 'w', newline='', encoding='utf-8') for path in chunk_paths]
+    try:
+        writers = [csv.writer(f) for f in chunk_files]
+        for row in rows:
+            index = random.randrange(num_chunks)
+            writers[index].writerow(row)
+            counts[index] += 1
+    finally:
+        for f in chunk_files:
+            f.close()
+    
+    for path, count in zip(chunk_paths, counts):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            if grouped:
+                _shuffle_rows(csv.reader(f), count, writer, chunk_rows, max_open_files, f"{path}.")
+            else:
+                rows = list(csv.reader(f))
+                random.shuffle(rows)
+                writer.writerows(rows)
+        os.remove(path)
+    
+    return total
 
 
 def load_config_from_json(json_file: str) -> Dict[str, Any]:
@@ -511,6 +997,21 @@ def main():
     parser.add_argument('--num', type=int, default=30, help='Anzahl der Anfragen pro Kategorie')
     parser.add_argument('--output', type=str, default="synthetische_buergeranfragen.csv", help='Name der Ausgabedatei')
     parser.add_argument('--json-dir', type=str, default="json_anfragen", help='Verzeichnis für JSON-Dateien')
+    parser.add_argument('--pool-size', type=int, default=4, help='Größe des Verbindungspools zum Ollama-Server')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout pro Ollama-Aufruf in Sekunden')
+    parser.add_argument('--workers', type=int, default=1, help='Anzahl paralleler Ollama-Aufrufe')
+    parser.add_argument('--retries', type=int, default=3, help='Wiederholungen bei fehlgeschlagener Generierung')
+    parser.add_argument('--seed', type=int, help='Startwert des Zufallsgenerators für reproduzierbare Korpora')
+    parser.add_argument('--stream', action='store_true',
+                        help='Anfragen fortlaufend schreiben; ein abgebrochener Lauf wird beim nächsten Start fortgesetzt')
+    parser.add_argument('--shuffle-chunk-size', type=int, default=10000,
+                        help='Zeilen pro Block beim speicherschonenden Mischen im Streaming-Modus')
+    parser.add_argument('--json-format', type=str, choices=JSON_FORMATS, default="jsonl",
+                        help='dateien (eine JSON-Datei pro Anfrage), jsonl, jsonl.gz oder parquet (benötigt pyarrow)')
+    parser.add_argument('--ollama-stream', action='store_true',
+                        help='Antworten von Ollama gestreamt empfangen')
+    parser.add_argument('--max-tokens', type=int,
+                        help='Höchstzahl generierter Tokens pro Anfrage')
     
     args = parser.parse_args()
     
@@ -525,6 +1026,19 @@ def main():
     num_queries = config.get('num_queries_per_category', args.num)
     output_file = config.get('output_file', args.output)
     json_dir = config.get('json_dir', args.json_dir)
+    pool_size = config.get('pool_size', args.pool_size)
+    timeout = config.get('timeout', args.timeout)
+    workers = config.get('workers', args.workers)
+    max_retries = config.get('retries', args.retries)
+    seed = config.get('seed', args.seed)
+    streaming = config.get('stream', args.stream)
+    shuffle_chunk_size = config.get('shuffle_chunk_size', args.shuffle_chunk_size)
+    json_format = config.get('json_format', args.json_format)
+    ollama_stream = config.get('ollama_stream', args.ollama_stream)
+    max_tokens = config.get('max_tokens', args.max_tokens)
+    
+    if seed is not None:
+        random.seed(seed)
     
     # Erstelle und starte den Generator
     generator = SyntheticQueryGenerator(
@@ -532,7 +1046,19 @@ def main():
         ollama_url=ollama_url,
         num_queries_per_category=num_queries,
         output_file=output_file,
-        json_dir=json_dir
+        json_dir=json_dir,
+        pool_size=pool_size,
+        timeout=timeout,
+        workers=workers,
+        max_retries=max_retries,
+        streaming=streaming,
+        shuffle_chunk_size=shuffle_chunk_size,
+        json_format=json_format,
+        intro_phrases=config.get('intro_phrases'),
+        english_fragments=config.get('english_fragments'),
+        ollama_stream=ollama_stream,
+        max_tokens=max_tokens,
+        seed=seed
     )
     
     generator.run()
@@ -0,0 +1,98 @@
+import re
+
+# Einleitungsphrasen, die am Anfang eines generierten Textes entfernt werden
+DEFAULT_INTRO_PHRASES = [
+    "Hier ist die realistische Bürgeranfrage:",
+    "Hier ist eine realistische Bürgeranfrage:",
+    "Hier ist eine mögliche Bürgeranfrage:",
+    "Hier ist die Bürgeranfrage:",
+    "Here is a realistic citizen inquiry about",
+    "Here is a realistic citizen's request",
+    "Subject:",
+    "Betreff:",
+    "Here is a realistic citizen's inquiry",
+    "Die Bürgeranfrage lautet:",
+    "Realistische Bürgeranfrage:",
+    "Eine realistische Bürgeranfrage zum Thema",
+]
+
+# Englische Satzanfänge, an denen der Text abgeschnitten wird
+DEFAULT_ENGLISH_FRAGMENTS = [
+    "This is a realistic query about",
+    "Here is the request:",
+    "Here's a realistic citizen inquiry",
+]
+
+# Zeichen, die nach einer entfernten Einleitung am Anfang übrig bleiben können
+_LEADING_PUNCTUATION = ':"\''
+
+
+def _alternation(phrases) -> str:
+    # Längere Phrasen zuerst, damit bei gemeinsamen Anfängen die längste gewinnt
+    return "|".join(re.escape(phrase) for phrase in sorted(set(phrases), key=len, reverse=True))
+
+
+class TextCleaner:
+    """
+    Bereinigt generierte Texte von Einleitungen und englischen Fragmenten.
+
+    Die Regeln werden einmalig kompiliert: ein am Textanfang verankerter Ausdruck für die
+    Einleitungen und eine Alternation (ohne Beachtung der Groß-/Kleinschreibung) für die
+    englischen Fragmente. Da die meisten Texte kein englisches Fragment enthalten, wird vor dem
+    Ausdruck einmal im kleingeschriebenen Text nach den Fragmenten gesucht; die Teilstring-Suche
+    ist deutlich schneller als der Ausdruck (siehe benchmark_text_cleaning.py). Der Ausdruck läuft
+    dann über denselben kleingeschriebenen Text, solange dieser gleich lang ist wie das Original.
+    """
+
+    def __init__(self, intro_phrases=None, english_fragments=None):
+        """
+        Kompiliert die Bereinigungsregeln.
+
+        Args:
+            intro_phrases: Zusätzliche Einleitungsphrasen (werden an die Standardliste angehängt)
+            english_fragments: Zusätzliche englische Fragmente (werden an die Standardliste angehängt)
+        """
+        self.intro_phrases = DEFAULT_INTRO_PHRASES + list(intro_phrases or [])
+        self.english_fragments = DEFAULT_ENGLISH_FRAGMENTS + list(english_fragments or [])
+        self._intro = re.compile(_alternation(self.intro_phrases))
+        self._english_lower = sorted({fragment.lower() for fragment in self.english_fragments})
+        self._english = re.compile(_alternation(self._english_lower))
+        self._english_ignorecase = re.compile(_alternation(self.english_fragments), re.IGNORECASE)
+
+    def clean(self, text: str) -> str:
+        """
+        Entfernt eine Einleitung am Anfang und schneidet den Text vor einem englischen Fragment ab.
+
+        Steht das Fragment am Anfang, wird stattdessen nur das Fragment entfernt.
+
+        Args:
+            text: Der zu bereinigende Text
+
+        Returns:
+            Der bereinigte Text
+        """
+        match = self._intro.match(text)
+        if match:
+            text = text[match.end():].strip().lstrip(_LEADING_PUNCTUATION)
+
+        lowered = text.lower()
+        if not any(fragment in lowered for fragment in self._english_lower):
+            return text.strip()
+
+        if len(lowered) == len(text):
+            matches = self._english.finditer(lowered)
+        else:
+            # Kleinschreibung hat die Länge verändert (z.B. "İ"): Positionen passen nicht mehr
+            matches = self._english_ignorecase.finditer(text)
+
+        position = 0
+        for match in matches:
+            if text[position:match.start()].strip():
+                # Text vor dem englischen Satz behalten
+                return text[position:match.start()].strip()
+            # Englischer Satz am Anfang: nur den Teil danach behalten
+            position = match.end()
+            while position < len(text) and (text[position].isspace() or text[position] in _LEADING_PUNCTUATION):
+                position += 1
+
+        return text[position:].strip()
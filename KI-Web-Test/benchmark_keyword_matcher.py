@@ -0,0 +1,85 @@
+import argparse
+import csv
+import os
+import random
+import string
+import sys
+import time
+
+# Module der KI-Web liegen im Nachbarverzeichnis
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "KI-Web"))
+from keyword_matcher import KeywordMatcher, MODES
+
+
+def naive_scores(categories, text):
+    """
+    Bisheriges Verfahren aus keyword_based_classification(): Teilstring-Suche je Schlüsselwort.
+    """
+    text_lower = text.lower()
+    return {category: sum(1 for keyword in keywords if keyword in text_lower)
+            for category, keywords in categories.items()}
+
+
+def synthetic_categories(num_categories, keywords_per_category, vocabulary, rng):
+    """
+    Erzeugt eine Schlüsselwort-Tabelle aus echten Wörtern des Korpus und Zufallswörtern.
+    """
+    categories = {}
+    for c in range(num_categories):
+        keywords = set()
+        while len(keywords) < keywords_per_category:
+            if rng.random() < 0.5:
+                keywords.add(rng.choice(vocabulary))
+            else:
+                keywords.add("".join(rng.choices(string.ascii_lowercase + "äöü", k=rng.randint(4, 12))))
+        categories[f"Kategorie {c}"] = sorted(keywords)
+    return categories
+
+
+def measure(func, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des kompilierten Keyword-Matchers')
+    parser.add_argument('--csv', type=str, default="synthetische_buergeranfragen.csv", help='Texte für den Benchmark')
+    parser.add_argument('--wiederholungen', type=int, default=3, help='Durchläufe über alle Texte')
+    args = parser.parse_args()
+
+    with open(args.csv, 'r', encoding='utf-8') as csvfile:
+        texts = [f"{row['betreff']} {row['nachricht']}" for row in csv.DictReader(csvfile)]
+    vocabulary = sorted({word.strip(".,!?:;\"'()").lower() for text in texts for word in text.split()} - {""})
+    rng = random.Random(42)
+
+    print(f"{len(texts)} Texte, Zeiten in Mikrosekunden pro Text")
+    print(f"{'Kategorien':>10} {'Keywords':>9} {'naiv':>10} " + " ".join(f"{mode:>10}" for mode in MODES) + f" {'regex':>10}")
+
+    for num_categories, per_category in [(3, 12), (10, 20), (100, 10), (300, 10), (500, 10), (500, 20)]:
+        categories = synthetic_categories(num_categories, per_category, vocabulary, rng)
+
+        build_start = time.perf_counter()
+        matchers = {mode: KeywordMatcher(categories, mode) for mode in MODES}
+        # Kombinierter Ausdruck auch für kleine Tabellen, um beide Verfahren vergleichen zu können
+        regex_only = KeywordMatcher(categories, "substring")
+        regex_only._small_table = None
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        # Der Substring-Modus muss exakt dieselben Punkte vergeben wie das bisherige Verfahren
+        for text in texts:
+            assert matchers["substring"].scores(text) == naive_scores(categories, text)
+            assert regex_only.scores(text) == naive_scores(categories, text)
+
+        naive = measure(lambda text: naive_scores(categories, text), texts, args.wiederholungen)
+        compiled = [measure(matchers[mode].scores, texts, args.wiederholungen) for mode in MODES]
+        regex = measure(regex_only.scores, texts, args.wiederholungen)
+        print(f"{num_categories:>10} {num_categories * per_category:>9} {naive:>10.1f} "
+              + " ".join(f"{value:>10.1f}" for value in compiled) + f" {regex:>10.1f}"
+              + f"   (Kompilieren: {build_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
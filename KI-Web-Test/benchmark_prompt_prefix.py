@@ -0,0 +1,113 @@
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+from testdaten import percentile
+
+# Module der KI-Web liegen im Nachbarverzeichnis (nur Prompts und Client, nicht die Flask-App)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "KI-Web"))
+from classifiers import MAIN_CATEGORIES
+from ollama_client import OllamaClient
+from prompts import ClassificationPrompts, FORMATS
+
+
+def legacy_prompt(text, prompts):
+    """
+    Bisheriger Aufbau: Prompt bei jedem Aufruf neu erzeugt, Anfrage in der Mitte.
+    """
+    categories_list = "\n".join([f"- {cat}: {info['description']}" for cat, info in MAIN_CATEGORIES.items()])
+    return f"""
+    Klassifiziere die folgende Bürgeranfrage in GENAU EINE der folgenden Kategorien:
+
+    {categories_list}
+
+    Anfrage:
+    {text}
+
+    WICHTIG:
+    {prompts.answer_instructions}
+    """
+
+
+def measure_build(build, texts, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            build(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def run(client, model, build, texts, keep_alive, response_format, num_predict):
+    """
+    Klassifiziert alle Texte nacheinander und misst die Latenz pro Aufruf.
+
+    Returns:
+        Tuple aus (Latenzen in ms, ausgewertete Prompt-Tokens, Auswertungszeit der Prompts in ms)
+    """
+    params = {"options": {"temperature": 0.1, "num_predict": num_predict}}
+    if keep_alive is not None:
+        params["keep_alive"] = keep_alive
+    if response_format is not None:
+        params["format"] = response_format
+
+    latencies, prompt_tokens, prompt_ms = [], [], []
+    for text in texts:
+        start = time.perf_counter()
+        response = client.generate(model, build(text), **params)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        data = response.json()
+        # Ollama meldet, wie viele Prompt-Tokens tatsächlich ausgewertet wurden (ohne Cache-Treffer)
+        if "prompt_eval_count" in data:
+            prompt_tokens.append(data["prompt_eval_count"])
+            prompt_ms.append(data.get("prompt_eval_duration", 0) / 1e6)
+    return latencies, prompt_tokens, prompt_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latenzvergleich: Prompt-Anfang pro Aufruf vs. statischer Präfix')
+    parser.add_argument('--csv', type=str, default="synthetische_buergeranfragen.csv", help='Texte für den Benchmark')
+    parser.add_argument('--anzahl', type=int, default=50, help='Anzahl klassifizierter Anfragen pro Variante')
+    parser.add_argument('--ollama-url', type=str, default=os.environ.get("KI_WEB_OLLAMA_URL", "http://localhost:11434"),
+                        help='URL des Ollama-Servers')
+    parser.add_argument('--modell', type=str, default=os.environ.get("KI_WEB_OLLAMA_MODEL", "llama3"),
+                        help='Name des Ollama-Modells')
+    parser.add_argument('--format', type=str, choices=FORMATS, default=os.environ.get("KI_WEB_OLLAMA_FORMAT", "json"),
+                        help='Antwortformat wie KI_WEB_OLLAMA_FORMAT')
+    parser.add_argument('--keep-alive', type=str, default=os.environ.get("KI_WEB_OLLAMA_KEEP_ALIVE", "30m"),
+                        help='keep_alive für die Präfix-Variante wie KI_WEB_OLLAMA_KEEP_ALIVE')
+    parser.add_argument('--num-predict', type=int, default=int(os.environ.get("KI_WEB_OLLAMA_NUM_PREDICT", "64")),
+                        help='Höchstzahl erzeugter Tokens wie KI_WEB_OLLAMA_NUM_PREDICT')
+    args = parser.parse_args()
+
+    with open(args.csv, 'r', encoding='utf-8') as csvfile:
+        texts = [f"{row['betreff']} {row['nachricht']}" for row in csv.DictReader(csvfile)][:args.anzahl]
+    client = OllamaClient(args.ollama_url, pool_size=1)
+
+    prompts = ClassificationPrompts(MAIN_CATEGORIES, args.format)
+    variants = [
+        ("bisher", lambda text: legacy_prompt(text, prompts), None),
+        ("präfix", prompts.single, args.keep_alive),
+    ]
+
+    print(f"{len(texts)} Anfragen pro Variante, Modell {args.modell}, Format {args.format}")
+    print(f"{'Variante':>10} {'Aufbau µs':>10} {'Mittel ms':>10} {'Median ms':>10} {'p95 ms':>10}"
+          f" {'Prompt-Tokens':>14} {'Prompt ms':>10}")
+    for name, build, keep_alive in variants:
+        # Ein Aufruf vorab, damit das Modell geladen ist und der Präfix im Cache liegt
+        run(client, args.modell, build, texts[:1], keep_alive, prompts.response_format, args.num_predict)
+        latencies, prompt_tokens, prompt_ms = run(client, args.modell, build, texts, keep_alive,
+                                                  prompts.response_format, args.num_predict)
+        ordered = sorted(latencies)
+        tokens = f"{statistics.mean(prompt_tokens):.1f}" if prompt_tokens else "-"
+        evaluation = f"{statistics.mean(prompt_ms):.1f}" if prompt_ms else "-"
+        print(f"{name:>10} {measure_build(build, texts):>10.2f} {statistics.mean(latencies):>10.1f}"
+              f" {percentile(ordered, 50):>10.1f} {percentile(ordered, 95):>10.1f}"
+              f" {tokens:>14} {evaluation:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from evaluation import EvaluationReport, OLLAMA_MODEL, iter_chunks
+from ollama_stub import OllamaStub, Recordings
+from testdaten import percentile
+
+# Klassifikatoren der Suite: keyword (Schlüsselwörter), nb/svm (lokales Modell, auf --training trainiert),
+# lokal (gespeichertes Modell aus --modell) und ollama (gegen --ollama-url, z.B. einen Stub)
+CLASSIFIERS = ("keyword", "nb", "svm", "lokal", "ollama")
+
+# Blockgröße für die Batch-Messung der lokalen Modelle
+BATCH_SIZE = 500
+
+
+def _max_rss_mb():
+    """
+    Speicherspitze des aktuellen Prozesses in MB (None, falls sie nicht ermittelt werden kann).
+    """
+    try:
+        import resource  # nur unter Unix verfügbar
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        # Unter Windows meldet psutil die Spitze des Working Sets, sonst nur den aktuellen Wert
+        return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Byte angegeben
+    factor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / factor
+
+
+def split_corpus(corpus, test_share, seed):
+    """
+    Teilt den Korpus reproduzierbar in Trainings- und Testanfragen.
+
+    Args:
+        corpus: Liste von Tupeln aus (ID, Text, erwartete Kategorie)
+        test_share: Anteil der Testanfragen (0-1)
+        seed: Startwert der Zufallsaufteilung
+
+    Returns:
+        Tuple aus (Trainingsanfragen, Testanfragen)
+    """
+    order = list(range(len(corpus)))
+    random.Random(seed).shuffle(order)
+    test_count = max(1, round(len(corpus) * test_share))
+    test = set(order[:test_count])
+    return ([entry for i, entry in enumerate(corpus) if i not in test],
+            [entry for i, entry in enumerate(corpus) if i in test])
+
+
+def _load_classifier(name, options, counters):
+    """
+    Baut den Klassifikator im aktuellen Prozess aus den Modulen der KI-Web auf (ohne die Flask-App)
+    und liefert die Einzel- und die Batch-Funktion.
+    """
+    from classifiers import CONFIDENCE_THRESHOLD, MAIN_CATEGORIES, keyword_classifier, ollama_classifier
+
+    if name == "keyword":
+        return keyword_classifier(), None
+    if name == "ollama":
+        from ollama_client import OllamaClient
+        from prompts import ClassificationPrompts
+        from response_parser import ClassificationParser
+        query_ollama = ollama_classifier(OllamaClient(options["ollama_url"], pool_size=1), options["ollama_model"],
+                                         ClassificationPrompts(MAIN_CATEGORIES, options["format"]),
+                                         ClassificationParser(MAIN_CATEGORIES, CONFIDENCE_THRESHOLD),
+                                         options={"temperature": 0.1})
+        classify_keywords = keyword_classifier()
+
+        def classify_with_ollama(text):
+            result = query_ollama(text)
+            if result is None:
+                # Wie in der Web-App: ohne verwertbare Antwort auf Schlüsselwörter ausweichen
+                counters["fallbacks"] += 1
+                return classify_keywords(text)
+            return result
+
+        counters["fallbacks"] = 0
+        return classify_with_ollama, None
+
+    from local_classifier import LocalClassifier
+    if name == "lokal":
+        model = LocalClassifier.load(options["modell"])
+    else:
+        model = LocalClassifier(name).fit(*options["training"])
+    return model.predict, model.predict_batch
+
+
+def run_classifier(name, corpus, options):
+    """
+    Misst einen Klassifikator. Läuft in einem eigenen Prozess, damit die Speicherspitze nicht
+    von anderen Klassifikatoren beeinflusst wird.
+
+    Args:
+        name: Einer der Namen aus CLASSIFIERS
+        corpus: Liste von Tupeln aus (ID, Text, erwartete Kategorie)
+        options: Dictionary mit training (Texte, Kategorien), modell, ollama_url, ollama_model und format
+
+    Returns:
+        Dictionary mit Genauigkeit, Latenzen, Durchsatz und Speicherbedarf
+    """
+    setup_start = time.perf_counter()
+    counters = {}
+    classify, classify_batch = _load_classifier(name, options, counters)
+    setup_s = time.perf_counter() - setup_start
+    baseline_mb = _max_rss_mb()
+
+    report = EvaluationReport()
+    latencies = []
+    start = time.perf_counter()
+    for _, text, expected in corpus:
+        item_start = time.perf_counter()
+        category, confidence = classify(text)
+        latencies.append((time.perf_counter() - item_start) * 1000)
+        report.add(expected, category, confidence)
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    per_class = report.per_class()
+    expected_labels = {expected for _, _, expected in corpus}
+    result = {
+        "anzahl": report.total,
+        "genauigkeit": report.accuracy(),
+        "makro_f1": sum(per_class[label]["f1"] for label in expected_labels) / len(expected_labels),
+        "ece": report.expected_calibration_error(),
+        "latenz_ms": {
+            "mittel": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1],
+        },
+        "durchsatz": report.total / duration if duration else 0.0,
+        "vorbereitung_s": setup_s,
+        "speicher_mb": {"nach_vorbereitung": baseline_mb},
+    }
+
+    if classify_batch is not None:
+        start = time.perf_counter()
+        for i in range(0, len(corpus), BATCH_SIZE):
+            classify_batch([text for _, text, _ in corpus[i:i + BATCH_SIZE]])
+        duration = time.perf_counter() - start
+        result["durchsatz_batch"] = len(corpus) / duration if duration else 0.0
+
+    result.update(counters)
+    result["speicher_mb"]["spitze"] = _max_rss_mb()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, previous, accuracy_tolerance, latency_tolerance):
+    """
+    Vergleicht einen Bericht mit einem früheren und listet Verschlechterungen auf.
+
+    Args:
+        report: Der aktuelle Bericht
+        previous: Ein früherer Bericht derselben Suite
+        accuracy_tolerance: Erlaubter Rückgang der Genauigkeit in Prozentpunkten
+        latency_tolerance: Erlaubter Anstieg der p95-Latenz in Prozent
+
+    Returns:
+        Liste der Verschlechterungen als Text
+    """
+    regressions = []
+    print(f"\nVergleich mit dem Bericht vom {previous.get('zeitstempel', '?')} (Commit {previous.get('commit')})")
+    print(f"{'Klassifikator':>13} {'Genauigkeit':>18} {'p95 ms':>22} {'Durchsatz/s':>24}")
+    for name, current in report["klassifikatoren"].items():
+        old = previous.get("klassifikatoren", {}).get(name)
+        if old is None:
+            print(f"{name:>13}  (im früheren Bericht nicht enthalten)")
+            continue
+        accuracy_delta = (current["genauigkeit"] - old["genauigkeit"]) * 100
+        p95_old, p95_new = old["latenz_ms"]["p95"], current["latenz_ms"]["p95"]
+        latency_delta = (p95_new - p95_old) / p95_old * 100 if p95_old else 0.0
+        print(f"{name:>13} {current['genauigkeit'] * 100:>8.1f}% ({accuracy_delta:+5.1f})"
+              f" {p95_new:>10.2f} ({latency_delta:+6.1f}%)"
+              f" {current['durchsatz']:>12.1f} ({old['durchsatz']:>9.1f})")
+        if accuracy_delta < -accuracy_tolerance:
+            regressions.append(f"{name}: Genauigkeit {accuracy_delta:+.1f} Prozentpunkte")
+        if latency_delta > latency_tolerance:
+            regressions.append(f"{name}: p95-Latenz {latency_delta:+.1f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vergleicht Genauigkeit, Latenz, Durchsatz und Speicher der Klassifikatoren')
+    parser.add_argument('--input', type=str, default="synthetische_buergeranfragen.csv", help='CSV-Datei mit Testanfragen')
+    parser.add_argument('--klassifikatoren', type=str, default="keyword,nb,svm",
+                        help=f'Kommagetrennte Auswahl aus {", ".join(CLASSIFIERS)}')
+    parser.add_argument('--training', type=str,
+                        help='Trainingsdaten für nb und svm (Standard: zufällig abgetrennter Teil von --input)')
+    parser.add_argument('--test-anteil', type=float, default=0.2,
+                        help='Anteil von --input, auf dem gemessen wird, wenn --training fehlt')
+    parser.add_argument('--seed', type=int, default=0, help='Startwert der Aufteilung in Training und Test')
+    parser.add_argument('--modell', type=str, help='Gespeichertes lokales Modell (.npz) für den Klassifikator "lokal"')
+    parser.add_argument('--ollama-url', type=str, default=os.environ.get("KI_WEB_OLLAMA_URL", "http://localhost:11434"),
+                        help='Ollama-Server bzw. Stub für den Klassifikator "ollama"')
+    parser.add_argument('--ollama-modell', type=str, default=OLLAMA_MODEL, help='Name des Ollama-Modells')
+    parser.add_argument('--format', type=str, choices=("json", "schema", "text"),
+                        default=os.environ.get("KI_WEB_OLLAMA_FORMAT", "json"), help='Antwortformat für "ollama"')
+    parser.add_argument('--ollama-aufnahmen', type=str,
+                        help='Aufnahmen von ollama_stub.py; startet einen Stub statt --ollama-url zu verwenden')
+    parser.add_argument('--bericht', type=str,
+                        default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        help='Zieldatei für den JSON-Bericht')
+    parser.add_argument('--vergleich', type=str, help='Früherer Bericht, mit dem verglichen wird')
+    parser.add_argument('--toleranz-genauigkeit', type=float, default=1.0,
+                        help='Erlaubter Rückgang der Genauigkeit in Prozentpunkten')
+    parser.add_argument('--toleranz-latenz', type=float, default=20.0,
+                        help='Erlaubter Anstieg der p95-Latenz in Prozent')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.klassifikatoren.split(",") if name.strip()]
+    unknown = set(names) - set(CLASSIFIERS)
+    if unknown:
+        parser.error(f"Unbekannte Klassifikatoren: {', '.join(sorted(unknown))}")
+    if "lokal" in names and not args.modell:
+        parser.error("Für den Klassifikator 'lokal' muss --modell angegeben werden")
+
+    if args.training and os.path.exists(args.training) and os.path.samefile(args.training, args.input):
+        parser.error("--training darf nicht die Testdaten (--input) sein")
+    if not 0 < args.test_anteil < 1:
+        parser.error("--test-anteil muss zwischen 0 und 1 liegen")
+
+    corpus = [entry for chunk in iter_chunks(args.input, BATCH_SIZE) for entry in chunk]
+    if args.training:
+        training = [entry for chunk in iter_chunks(args.training, BATCH_SIZE) for entry in chunk]
+        split = {"training": os.path.abspath(args.training)}
+    else:
+        training, corpus = split_corpus(corpus, args.test_anteil, args.seed)
+        split = {"test_anteil": args.test_anteil, "seed": args.seed}
+    options = {"training": ([text for _, text, _ in training], [label for _, _, label in training]),
+               "modell": os.path.abspath(args.modell) if args.modell else None,
+               "ollama_url": args.ollama_url,
+               "ollama_model": args.ollama_modell,
+               "format": args.format}
+    print(f"{len(corpus)} Testanfragen aus {args.input}, {len(training)} Trainingsanfragen")
+
+    report = {
+        "zeitstempel": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "korpus": os.path.abspath(args.input),
+        "aufteilung": split,
+        "anzahl": len(corpus),
+        "klassifikatoren": {},
+    }
+
+    print(f"{'Klassifikator':>13} {'Genauigkeit':>12} {'Makro-F1':>9} {'p50 ms':>9} {'p95 ms':>9}"
+          f" {'Durchsatz/s':>12} {'Batch/s':>10} {'Speicher MB':>12}")
+    # Aufgezeichnete Ollama-Antworten: Stub im Hauptprozess, die Messprozesse fragen ihn per HTTP
+    stub = None
+    if args.ollama_aufnahmen and "ollama" in names:
+        stub = OllamaStub(Recordings(args.ollama_aufnahmen), port=0).start()
+        options["ollama_url"] = stub.url
+        report["ollama_aufnahmen"] = os.path.abspath(args.ollama_aufnahmen)
+
+    spawn = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            result = executor.submit(run_classifier, name, corpus, options).result()
+        if name == "ollama" and stub is not None:
+            result["stub"] = dict(stub.stats)
+        report["klassifikatoren"][name] = result
+        batch = f"{result['durchsatz_batch']:.0f}" if "durchsatz_batch" in result else "-"
+        peak = result["speicher_mb"]["spitze"]
+        peak = f"{peak:.1f}" if peak is not None else "-"
+        print(f"{name:>13} {result['genauigkeit'] * 100:>11.1f}% {result['makro_f1']:>9.3f}"
+              f" {result['latenz_ms']['p50']:>9.3f} {result['latenz_ms']['p95']:>9.3f}"
+              f" {result['durchsatz']:>12.1f} {batch:>10} {peak:>12}")
+
+    if stub is not None:
+        stub.close()
+
+    with open(args.bericht, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nBericht gespeichert in: {args.bericht}")
+
+    if args.vergleich:
+        with open(args.vergleich, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.toleranz_genauigkeit, args.toleranz_latenz)
+        if regressions:
+            print("\nVERSCHLECHTERUNGEN:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\nKeine Verschlechterungen gegenüber dem früheren Bericht.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import json
+import os
+import sys
+import time
+
+# Module der KI-Web liegen im Nachbarverzeichnis; importiert werden nur die Klassifikatoren,
+# nicht die Flask-App (kein Speicher-Backend, keine Hintergrund-Threads, kein automatisches Training)
+KI_WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "KI-Web")
+sys.path.insert(0, KI_WEB_DIR)
+from cascade import parse_cascade_spec
+from classifiers import (CONFIDENCE_THRESHOLD, MAIN_CATEGORIES, build_cascade, keyword_classifier,
+                         load_local_model, ollama_classifier)
+from ollama_client import OllamaClient
+from prompts import ClassificationPrompts, FORMATS
+from response_parser import ClassificationParser
+
+# Anzahl der Klassen im Kalibrierungsdiagramm (Konfidenz 0-100 in gleich breiten Klassen)
+CALIBRATION_BINS = 10
+
+# Standardwerte für die Stufe "ollama" (wie in der Web-App)
+OLLAMA_URL = os.environ.get("KI_WEB_OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.environ.get("KI_WEB_OLLAMA_MODEL", "llama3")
+# Gleichzeitige Ollama-Aufrufe insgesamt (über alle Prozesse)
+OLLAMA_PARALLEL = 8
+
+# Klassifikator des Worker-Prozesses (wird in _init_worker gesetzt)
+_cascade = None
+_executor = None
+
+
+def iter_chunks(input_file, chunk_size):
+    """
+    Liest die CSV-Datei einmal von vorne nach hinten und liefert Blöcke von Anfragen.
+
+    Args:
+        input_file: CSV-Datei mit den Spalten betreff, nachricht und kategorie
+        chunk_size: Anzahl Anfragen pro Block
+
+    Yields:
+        Listen von Tupeln aus (ID, Text, erwartete Kategorie)
+    """
+    with open(input_file, 'r', encoding='utf-8', newline='') as csvfile:
+        chunk = []
+        for row in csv.DictReader(csvfile):
+            # Betreff und Nachricht wie in app.upload() kombinieren
+            chunk.append((row.get('id', ''), f"{row['betreff']} {row['nachricht']}", row['kategorie']))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def tier_names(cascade_spec):
+    return [name for name, _ in parse_cascade_spec(cascade_spec)]
+
+
+def build_tiers(local_model=None, keyword_mode="substring", ollama_url=OLLAMA_URL,
+                ollama_model=OLLAMA_MODEL, ollama_format="json", ollama_parallel=OLLAMA_PARALLEL):
+    """
+    Stellt die Stufen der Kaskade ohne die Web-App zusammen.
+
+    Args:
+        local_model: Trainierter LocalClassifier für die Stufe "local" (None = Stufe nicht verfügbar)
+        keyword_mode: Matching-Modus der Schlüsselwort-Klassifikation
+        ollama_url: Ollama-Server (oder Stub) für die Stufe "ollama"
+        ollama_model: Name des Ollama-Modells
+        ollama_format: Antwortformat ("json", "schema" oder "text")
+        ollama_parallel: Größe des Verbindungspools zu Ollama
+
+    Returns:
+        Dictionary Name -> (Einzelklassifikation, Batch-Klassifikation, im Batch parallel aufrufen,
+        Ersatzklassifikation)
+    """
+    classify_keywords = keyword_classifier(keyword_mode)
+    tiers = {"keyword": (classify_keywords, None, False, None)}
+    if local_model is not None:
+        tiers["local"] = (local_model.predict, local_model.predict_batch, False, None)
+
+    client = OllamaClient(ollama_url, pool_size=ollama_parallel)
+    query_ollama = ollama_classifier(client, ollama_model,
+                                     ClassificationPrompts(MAIN_CATEGORIES, ollama_format),
+                                     ClassificationParser(MAIN_CATEGORIES, CONFIDENCE_THRESHOLD),
+                                     options={"temperature": 0.1})
+    # Wie in der Web-App: ohne verwertbare Antwort auf Schlüsselwörter ausweichen
+    tiers["ollama"] = (query_ollama, None, True, classify_keywords)
+    return tiers
+
+
+def _init_worker(cascade_spec, local_model, options, ollama_parallel):
+    global _cascade, _executor
+    _cascade = build_cascade(cascade_spec, build_tiers(local_model, ollama_parallel=ollama_parallel, **options))
+    _executor = ThreadPoolExecutor(max_workers=ollama_parallel, thread_name_prefix="ollama")
+
+
+def _classify_chunk(chunk):
+    results = _cascade.classify_batch([text for _, text, _ in chunk], executor=_executor)
+    return [(submission_id, expected, category, confidence)
+            for (submission_id, _, expected), (category, confidence) in zip(chunk, results)]
+
+
+def classify_corpus(input_file, cascade_spec, processes=None, chunk_size=500, local_model=None, options=None,
+                    ollama_parallel=OLLAMA_PARALLEL):
+    """
+    Klassifiziert alle Anfragen der CSV-Datei direkt mit den Klassifikatoren der KI-Web (ohne HTTP).
+
+    Die Blöcke werden auf einen Prozesspool verteilt; es sind höchstens zwei Blöcke pro Prozess
+    gleichzeitig unterwegs, sodass auch große Korpora nicht vollständig im Speicher liegen.
+    Enthält die Kaskade die Stufe "ollama", bestimmt der Ollama-Server den Durchsatz: Ohne Angabe
+    wird dann nur ein Prozess verwendet, und die ollama_parallel Aufrufe werden auf die Prozesse
+    aufgeteilt, damit insgesamt nicht mehr Anfragen gleichzeitig an Ollama gehen.
+
+    Args:
+        input_file: CSV-Datei mit den Testanfragen
+        cascade_spec: Kaskaden-Konfiguration wie in KI_WEB_CASCADE (z.B. "keyword" oder "keyword:80,local:80")
+        processes: Anzahl Prozesse (None = Anzahl CPU-Kerne bzw. 1 mit der Stufe "ollama",
+            1 = im aktuellen Prozess)
+        chunk_size: Anzahl Anfragen pro Block
+        local_model: Trainierter LocalClassifier für die Stufe "local"
+        options: Weitere Argumente für build_tiers() (keyword_mode, ollama_url, ...)
+        ollama_parallel: Höchstzahl gleichzeitiger Ollama-Aufrufe über alle Prozesse
+
+    Yields:
+        Tupel aus (ID, erwartete Kategorie, zugeordnete Kategorie, Konfidenz) in der Reihenfolge der Datei
+    """
+    uses_ollama = "ollama" in tier_names(cascade_spec)
+    processes = processes or (1 if uses_ollama else os.cpu_count() or 1)
+    per_process = max(1, ollama_parallel // processes)
+    initargs = (cascade_spec, local_model, options or {}, per_process)
+    if processes == 1:
+        _init_worker(*initargs)
+        for chunk in iter_chunks(input_file, chunk_size):
+            yield from _classify_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        pending = deque()
+        for chunk in iter_chunks(input_file, chunk_size):
+            pending.append(executor.submit(_classify_chunk, chunk))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class EvaluationReport:
+    """
+    Sammelt Konfusionsmatrix und Kalibrierung der Konfidenzwerte über alle Anfragen.
+    """
+
+    def __init__(self, bins: int = CALIBRATION_BINS):
+        self.bins = bins
+        self.confusion = {}  # (erwartet, zugeordnet) -> Anzahl
+        self.total = 0
+        self.correct = 0
+        # Pro Konfidenzklasse: Anzahl, Summe der Konfidenzen, Anzahl korrekter Zuordnungen
+        self.calibration_bins = [[0, 0.0, 0] for _ in range(bins)]
+
+    def add(self, expected: str, assigned: str, confidence: float) -> None:
+        """
+        Erfasst eine klassifizierte Anfrage.
+
+        Args:
+            expected: Erwartete Kategorie
+            assigned: Zugeordnete Kategorie
+            confidence: Konfidenz der Zuordnung (0-100)
+        """
+        key = (expected, assigned)
+        self.confusion[key] = self.confusion.get(key, 0) + 1
+        correct = expected == assigned
+        self.total += 1
+        self.correct += correct
+        index = min(int(confidence * self.bins / 100), self.bins - 1) if confidence > 0 else 0
+        entry = self.calibration_bins[index]
+        entry[0] += 1
+        entry[1] += confidence
+        entry[2] += correct
+
+    def labels(self):
+        """
+        Alle vorkommenden Kategorien; zuerst die erwarteten, danach nur zugeordnete (z.B. "Nicht zuordbar").
+        """
+        expected = sorted({e for e, _ in self.confusion})
+        return expected + sorted({a for _, a in self.confusion} - set(expected))
+
+    def accuracy(self) -> float:
+        return self.correct / self.total if self.total else 0.0
+
+    def per_class(self) -> dict:
+        """
+        Precision, Recall und F1 pro Kategorie.
+
+        Returns:
+            Dictionary Kategorie -> {precision, recall, f1, anzahl}
+        """
+        stats = {}
+        for label in self.labels():
+            true_positive = self.confusion.get((label, label), 0)
+            assigned = sum(count for (_, a), count in self.confusion.items() if a == label)
+            expected = sum(count for (e, _), count in self.confusion.items() if e == label)
+            precision = true_positive / assigned if assigned else 0.0
+            recall = true_positive / expected if expected else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            stats[label] = {"precision": precision, "recall": recall, "f1": f1, "anzahl": expected}
+        return stats
+
+    def calibration(self) -> list:
+        """
+        Mittlere Konfidenz und tatsächliche Genauigkeit pro Konfidenzklasse.
+
+        Returns:
+            Liste von Dictionaries mit von, bis, anzahl, mittlere_konfidenz und genauigkeit (in Prozent)
+        """
+        width = 100 / self.bins
+        result = []
+        for i, (count, confidence_sum, correct) in enumerate(self.calibration_bins):
+            result.append({
+                "von": i * width,
+                "bis": (i + 1) * width,
+                "anzahl": count,
+                "mittlere_konfidenz": confidence_sum / count if count else 0.0,
+                "genauigkeit": 100 * correct / count if count else 0.0,
+            })
+        return result
+
+    def expected_calibration_error(self) -> float:
+        """
+        Expected Calibration Error: gewichtete mittlere Abweichung zwischen Konfidenz und Genauigkeit (in Prozentpunkten).
+        """
+        if not self.total:
+            return 0.0
+        return sum(entry["anzahl"] / self.total * abs(entry["mittlere_konfidenz"] - entry["genauigkeit"])
+                   for entry in self.calibration())
+
+    def to_dict(self) -> dict:
+        labels = self.labels()
+        return {
+            "anzahl": self.total,
+            "genauigkeit": self.accuracy(),
+            "kategorien": labels,
+            "konfusionsmatrix": [[self.confusion.get((e, a), 0) for a in labels] for e in labels],
+            "pro_kategorie": self.per_class(),
+            "kalibrierung": self.calibration(),
+            "ece": self.expected_calibration_error(),
+        }
+
+    def print_summary(self) -> None:
+        labels = self.labels()
+        width = max(len(label) for label in labels) if labels else 10
+        print(f"\n{'='*60}")
+        print("KONFUSIONSMATRIX (Zeilen: erwartet, Spalten: zugeordnet)")
+        print(f"{'='*60}")
+        print(" " * width + " " + " ".join(f"{i + 1:>6}" for i in range(len(labels))))
+        for i, expected in enumerate(labels):
+            row = " ".join(f"{self.confusion.get((expected, assigned), 0):>6}" for assigned in labels)
+            print(f"{expected:<{width}} {row}   ({i + 1})")
+
+        print(f"\n{'Kategorie':<{width}} {'Precision':>10} {'Recall':>8} {'F1':>8} {'Anzahl':>8}")
+        for label, stats in self.per_class().items():
+            print(f"{label:<{width}} {stats['precision']:>10.3f} {stats['recall']:>8.3f} "
+                  f"{stats['f1']:>8.3f} {stats['anzahl']:>8}")
+
+        print(f"\nKALIBRIERUNG DER KONFIDENZ")
+        print(f"{'Klasse':>10} {'Anzahl':>8} {'Konfidenz':>10} {'Genauigkeit':>12}")
+        for entry in self.calibration():
+            if entry["anzahl"]:
+                print(f"{entry['von']:>4.0f}-{entry['bis']:<4.0f}  {entry['anzahl']:>8} "
+                      f"{entry['mittlere_konfidenz']:>9.1f}% {entry['genauigkeit']:>11.1f}%")
+        print(f"ECE: {self.expected_calibration_error():.1f} Prozentpunkte")
+        print(f"\nGenauigkeit: {self.correct}/{self.total} ({100 * self.accuracy():.1f}%)")
+
+
+def load_training_model(parser, input_file, training=None, model_path=None):
+    """
+    Lädt bzw. trainiert das lokale Modell und stellt sicher, dass es nicht auf den Auswertungsdaten trainiert wird.
+
+    Args:
+        parser: Der ArgumentParser (für Fehlermeldungen)
+        input_file: Die Auswertungsdaten
+        training: CSV-Datei mit Trainingsdaten
+        model_path: Gespeichertes Modell (.npz)
+
+    Returns:
+        Der LocalClassifier
+    """
+    if not training and not model_path:
+        parser.error("Für die Stufe 'local' muss --training oder --modell angegeben werden")
+    if model_path and not os.path.exists(model_path):
+        parser.error(f"Modelldatei nicht gefunden: {model_path}")
+    if training and not model_path and os.path.exists(training) and os.path.samefile(training, input_file):
+        parser.error("--training darf nicht die Auswertungsdaten (--input) sein")
+    model = load_local_model(model_path, training)
+    if model is None:
+        parser.error("Lokales Modell nicht verfügbar (NumPy installiert, Trainingsdatei vorhanden?)")
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline-Auswertung der Klassifikatoren ohne Flask-Server')
+    parser.add_argument('--input', type=str, default="synthetische_buergeranfragen.csv", help='CSV-Datei mit Testanfragen')
+    parser.add_argument('--kaskade', type=str, default=os.environ.get("KI_WEB_CASCADE"),
+                        help='Ausgewertete Stufen wie in KI_WEB_CASCADE, z.B. "keyword", "local" oder "keyword:80,local:80,ollama" '
+                             '(Standard: "keyword:80,local:80" mit --training/--modell, sonst "keyword")')
+    parser.add_argument('--training', type=str, help='Trainingsdaten für die Stufe "local" (nicht die Auswertungsdaten)')
+    parser.add_argument('--modell', type=str, help='Gespeichertes lokales Modell (.npz) für die Stufe "local"')
+    parser.add_argument('--schluesselwort-modus', type=str, default=os.environ.get("KI_WEB_KEYWORD_MODE", "substring"),
+                        help='Matching-Modus der Stufe "keyword" (substring, wort oder stamm)')
+    parser.add_argument('--ollama-url', type=str, default=OLLAMA_URL, help='Ollama-Server bzw. Stub für die Stufe "ollama"')
+    parser.add_argument('--ollama-modell', type=str, default=OLLAMA_MODEL, help='Name des Ollama-Modells')
+    parser.add_argument('--format', type=str, choices=FORMATS, default=os.environ.get("KI_WEB_OLLAMA_FORMAT", "json"),
+                        help='Antwortformat der Stufe "ollama"')
+    parser.add_argument('--prozesse', type=int, default=None,
+                        help='Anzahl Prozesse (Standard: Anzahl CPU-Kerne, mit der Stufe "ollama" 1)')
+    parser.add_argument('--ollama-parallel', type=int, default=OLLAMA_PARALLEL,
+                        help='Gleichzeitige Ollama-Aufrufe insgesamt, auf die Prozesse verteilt')
+    parser.add_argument('--block', type=int, default=500, help='Anfragen pro Block')
+    parser.add_argument('--ergebnisse', type=str, help='CSV-Datei für die Zuordnung jeder Anfrage')
+    parser.add_argument('--json', type=str, help='Datei für den Bericht als JSON')
+    args = parser.parse_args()
+
+    if not args.kaskade:
+        args.kaskade = "keyword:80,local:80" if args.training or args.modell else "keyword"
+    names = tier_names(args.kaskade)
+    unknown = set(names) - {"keyword", "local", "ollama"}
+    if unknown:
+        parser.error(f"Unbekannte Stufen: {', '.join(sorted(unknown))}")
+    local_model = None
+    if "local" in names:
+        local_model = load_training_model(parser, args.input, args.training, args.modell)
+    options = {"keyword_mode": args.schluesselwort_modus, "ollama_url": args.ollama_url,
+               "ollama_model": args.ollama_modell, "ollama_format": args.format}
+
+    print(f"Auswertung von {args.input} mit Kaskade '{args.kaskade}'")
+    report = EvaluationReport()
+    start = time.perf_counter()
+
+    writer = None
+    output = open(args.ergebnisse, 'w', newline='', encoding='utf-8') if args.ergebnisse else None
+    try:
+        if output is not None:
+            writer = csv.writer(output)
+            writer.writerow(['id', 'erwartete_kategorie', 'zugeordnete_kategorie', 'konfidenz', 'korrekt'])
+        for submission_id, expected, assigned, confidence in classify_corpus(args.input, args.kaskade,
+                                                                            args.prozesse, args.block,
+                                                                            local_model, options,
+                                                                            args.ollama_parallel):
+            report.add(expected, assigned, confidence)
+            if writer is not None:
+                writer.writerow([submission_id, expected, assigned, confidence, expected == assigned])
+    finally:
+        if output is not None:
+            output.close()
+
+    duration = time.perf_counter() - start
+    report.print_summary()
+    print(f"Dauer: {duration:.2f} s ({report.total / duration if duration else 0:.0f} Anfragen/s)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(dict(report.to_dict(), kaskade=args.kaskade, dauer_s=duration), f, ensure_ascii=False, indent=2)
+        print(f"Bericht gespeichert in: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+import requests
+
+# Betriebsarten: Antworten eines echten Ollama aufzeichnen oder aufgezeichnete Antworten abspielen
+MODE_RECORD = "aufzeichnen"
+MODE_REPLAY = "abspielen"
+MODES = (MODE_RECORD, MODE_REPLAY)
+
+# Stückelung gestreamter Antworten (Wörter inkl. folgendem Leerraum, ähnlich den Tokens von Ollama)
+_STREAM_PIECE = re.compile(r"\S+\s*|\s+")
+
+
+def prompt_key(body: dict) -> str:
+    """
+    Schlüssel einer Aufnahme: Hash über Modell, Prompt und Antwortformat.
+
+    Optionen wie temperature oder num_predict gehen nicht ein, damit Aufnahmen bei geänderten
+    Generierungsparametern weiter verwendbar bleiben.
+
+    Args:
+        body: Request-Body von /api/generate
+
+    Returns:
+        SHA-256 als Hex-String
+    """
+    material = json.dumps([body.get("model"), body.get("system"), body.get("prompt"), body.get("format")],
+                          ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class Recordings:
+    """
+    Aufgezeichnete /api/generate-Antworten als JSON-Zeilen, im Speicher nach Prompt-Hash indiziert.
+    """
+
+    def __init__(self, path: str):
+        """
+        Lädt vorhandene Aufnahmen.
+
+        Args:
+            path: JSONL-Datei der Aufnahmen (wird beim Aufzeichnen angelegt bzw. ergänzt)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["schluessel"]] = entry["antwort"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        """
+        Liefert die Antwort zu einem Schlüssel oder None.
+        """
+        return self._entries.get(key)
+
+    def put(self, key: str, body: dict, response: dict) -> None:
+        """
+        Speichert eine Antwort (eine bereits vorhandene Aufnahme wird nicht überschrieben).
+
+        Args:
+            key: Prompt-Hash aus prompt_key()
+            body: Der ursprüngliche Request-Body (Modell und Prompt werden zur Nachvollziehbarkeit mitgespeichert)
+            response: Die vollständige, nicht gestreamte Antwort von Ollama
+        """
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = response
+            entry = {"schluessel": key, "model": body.get("model"), "prompt": body.get("prompt"), "antwort": response}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class OllamaStub:
+    """
+    Lokaler Ersatz für Ollama (/api/generate) mit aufgezeichneten Antworten.
+
+    Im Aufzeichnungsmodus werden Anfragen an einen echten Ollama-Server weitergeleitet und die
+    Antworten gespeichert; im Abspielmodus beantwortet der Stub nur noch aus den Aufnahmen
+    (unbekannte Prompts mit HTTP 404). Latenz, Fehlerrate, Durchsatz und Parallelität lassen
+    sich vorgeben; alle Zufallsentscheidungen folgen einem festen Startwert.
+    """
+
+    def __init__(self, recordings: Recordings, mode: str = MODE_REPLAY, upstream: str = None,
+                 host: str = "127.0.0.1", port: int = 11435, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, recorded_latency: float = 0.0, error_rate: float = 0.0,
+                 max_rate: float = None, max_parallel: int = None, seed: int = 42):
+        """
+        Args:
+            recordings: Die Aufnahmen
+            mode: "aufzeichnen" oder "abspielen"
+            upstream: URL des echten Ollama-Servers (nur beim Aufzeichnen)
+            host: Adresse des Stubs
+            port: Port des Stubs (0 = freier Port)
+            latency_ms: Feste zusätzliche Latenz pro Antwort
+            jitter_ms: Zufällige zusätzliche Latenz (gleichverteilt zwischen 0 und jitter_ms)
+            recorded_latency: Faktor für die aufgezeichnete Dauer von Ollama (0 = nicht verwenden)
+            error_rate: Anteil der Anfragen (0.0 bis 1.0), die mit HTTP 500 beantwortet werden
+            max_rate: Höchstens so viele Antworten pro Sekunde (None = unbegrenzt)
+            max_parallel: Höchstens so viele gleichzeitig bearbeitete Anfragen, wie Ollama mit
+                          OLLAMA_NUM_PARALLEL (None = unbegrenzt)
+            seed: Startwert für Jitter und Fehler
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unbekannte Betriebsart: {mode}")
+        if mode == MODE_RECORD and not upstream:
+            raise ValueError("Zum Aufzeichnen wird die URL eines Ollama-Servers benötigt")
+        self.recordings = recordings
+        self.mode = mode
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.recorded_latency = recorded_latency
+        self.error_rate = error_rate
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+        self._next_slot = time.perf_counter()
+        self._slot_lock = threading.Lock()
+        self._parallel = threading.BoundedSemaphore(max_parallel) if max_parallel else None
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._session = requests.Session() if upstream else None
+        self._stats_lock = threading.Lock()
+        self.stats = {"anfragen": 0, "treffer": 0, "fehlend": 0, "aufgezeichnet": 0, "fehler_injiziert": 0}
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-Alive wie bei Ollama
+            disable_nagle_algorithm = True  # Header und Body sonst mit Verzögerung (Delayed ACK)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/stub/stats":
+                    with stub._stats_lock:
+                        self._send_json(200, dict(stub.stats, aufnahmen=len(stub.recordings)))
+                elif self.path == "/api/version":
+                    self._send_json(200, {"version": "stub"})
+                else:
+                    self._send_json(404, {"error": f"unbekannter Pfad {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": "ungültiges JSON"})
+                    return
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": f"unbekannter Pfad {self.path}"})
+                    return
+                stub._handle_generate(self, body)
+
+            def _send_json(self, status, data):
+                payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._serving = False
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStub":
+        """
+        Startet den Server in einem Hintergrund-Thread (z.B. innerhalb eines Benchmarks).
+        """
+        self._serving = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="ollama-stub").start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Bearbeitet Anfragen im aktuellen Thread bis zum Abbruch.
+        """
+        self._serving = True
+        self._server.serve_forever()
+
+    def close(self) -> None:
+        """
+        Beendet den Server.
+        """
+        if self._serving:
+            self._server.shutdown()
+        self._server.server_close()
+        if self._session is not None:
+            self._session.close()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _wait_for_slot(self):
+        # Gleichmäßig verteilte Antwortzeitpunkte für den Durchsatz-Grenzwert
+        if not self._interval:
+            return
+        with self._slot_lock:
+            slot = max(self._next_slot, time.perf_counter())
+            self._next_slot = slot + self._interval
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _handle_generate(self, handler, body):
+        self._count("anfragen")
+        with self._random_lock:
+            inject_error = self._random.random() < self.error_rate
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+
+        if self._parallel is not None:
+            self._parallel.acquire()
+        try:
+            self._wait_for_slot()
+            if inject_error:
+                self._count("fehler_injiziert")
+                time.sleep((self.latency_ms + jitter) / 1000)
+                handler._send_json(500, {"error": "injizierter Fehler"})
+                return
+
+            key = prompt_key(body)
+            response = self.recordings.get(key)
+            if response is None and self.mode == MODE_RECORD:
+                response = self._record(key, body)
+                if response is None:
+                    handler._send_json(502, {"error": "Ollama nicht erreichbar"})
+                    return
+            elif response is None:
+                self._count("fehlend")
+                handler._send_json(404, {"error": f"keine Aufnahme für diesen Prompt ({key[:12]})"})
+                return
+            else:
+                self._count("treffer")
+
+            delay = self.latency_ms + jitter
+            if self.recorded_latency:
+                delay += response.get("total_duration", 0) / 1e6 * self.recorded_latency
+            time.sleep(delay / 1000)
+        finally:
+            if self._parallel is not None:
+                self._parallel.release()
+
+        if body.get("stream", True):
+            self._send_stream(handler, response)
+        else:
+            handler._send_json(200, response)
+
+    def _record(self, key, body):
+        # Immer ohne Streaming weiterleiten, damit die vollständige Antwort samt Zeiten gespeichert wird
+        try:
+            upstream = self._session.post(f"{self.upstream}/api/generate", json=dict(body, stream=False), timeout=300)
+            upstream.raise_for_status()
+            response = upstream.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Aufzeichnung fehlgeschlagen: {str(e)}", file=sys.stderr)
+            return None
+        response.pop("context", None)  # Token-Kontext wird nicht benötigt und ist groß
+        self.recordings.put(key, body, response)
+        self._count("aufgezeichnet")
+        return response
+
+    @staticmethod
+    def _send_stream(handler, response):
+        # Gestreamte Antwort wie bei Ollama: NDJSON-Zeilen, die letzte mit done=True und den Zeiten
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        pieces = _STREAM_PIECE.findall(response.get("response", ""))
+        final = dict(response, response="", done=True)
+        lines = [{"model": response.get("model"), "response": piece, "done": False} for piece in pieces] + [final]
+        try:
+            for line in lines:
+                data = (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Der Client hat nach vollständiger Klassifikation abgebrochen
+            handler.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ollama-Ersatz mit aufgezeichneten Antworten für reproduzierbare Messungen')
+    parser.add_argument('--modus', type=str, choices=MODES, default=MODE_REPLAY,
+                        help='aufzeichnen (an --ziel weiterleiten und speichern) oder abspielen')
+    parser.add_argument('--aufnahmen', type=str, default="ollama_aufnahmen.jsonl", help='JSONL-Datei der Aufnahmen')
+    parser.add_argument('--ziel', type=str, default="http://localhost:11434", help='Echter Ollama-Server zum Aufzeichnen')
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Adresse des Stubs')
+    parser.add_argument('--port', type=int, default=11435, help='Port des Stubs')
+    parser.add_argument('--latenz-ms', type=float, default=0.0, help='Feste zusätzliche Latenz pro Antwort')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Zufällige zusätzliche Latenz (0 bis N ms)')
+    parser.add_argument('--aufgezeichnete-latenz', type=float, default=0.0,
+                        help='Aufgezeichnete Dauer von Ollama mit diesem Faktor nachbilden (z.B. 1.0)')
+    parser.add_argument('--fehlerrate', type=float, default=0.0, help='Anteil der Anfragen mit HTTP 500 (0.0 bis 1.0)')
+    parser.add_argument('--durchsatz', type=float, default=None, help='Höchstens N Antworten pro Sekunde')
+    parser.add_argument('--parallel', type=int, default=None, help='Höchstens N gleichzeitig bearbeitete Anfragen')
+    parser.add_argument('--seed', type=int, default=42, help='Startwert für Jitter und Fehler')
+    args = parser.parse_args()
+
+    recordings = Recordings(args.aufnahmen)
+    stub = OllamaStub(recordings, args.modus, args.ziel if args.modus == MODE_RECORD else None,
+                      host=args.host, port=args.port, latency_ms=args.latenz_ms, jitter_ms=args.jitter_ms,
+                      recorded_latency=args.aufgezeichnete_latenz, error_rate=args.fehlerrate,
+                      max_rate=args.durchsatz, max_parallel=args.parallel, seed=args.seed)
+    print(f"Ollama-Stub ({args.modus}) auf {stub.url} mit {len(recordings)} Aufnahmen aus {args.aufnahmen}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
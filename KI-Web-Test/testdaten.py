@@ -1,10 +1,20 @@
+import argparse
 import csv
+import itertools
 import requests
+import threading
 from bs4 import BeautifulSoup
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Wartezeit pro HTTP-Anfrage in Sekunden; danach zählt die Anfrage als Fehler
+REQUEST_TIMEOUT = 30.0
+
+# Wartezeit in Sekunden, bis asynchron klassifizierte Anfragen (KI_WEB_ASYNC=1) fertig sein müssen
+STATUS_TIMEOUT = 60.0
+
 def parse_response(html_content):
     """
     Parst die HTML-Antwort und extrahiert Kategorie und Konfidenz
@@ -25,6 +35,90 @@ def parse_response(html_content):
     
     return category, confidence
 
+def parse_pending_id(html_content):
+    """
+    Liefert die Anfrage-ID, wenn die Antwort nur den Platzhalter der asynchronen Klassifikation
+    (KI_WEB_ASYNC=1) enthält, sonst None
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    info = soup.find('div', id='category-info', attrs={'data-anfrage-id': True})
+    return info['data-anfrage-id'] if info else None
+
+def wait_for_classifications(session, base_url, pending, timeout=STATUS_TIMEOUT):
+    """
+    Fragt /status/<id> ab, bis die asynchron klassifizierten Anfragen fertig sind
+    
+    Args:
+        session: requests-Session
+        base_url: URL der Flask-App
+        pending: Liste von Tupeln aus (Anfrage-ID, CSV-Zeile)
+        timeout: Gesamte Wartezeit in Sekunden
+        
+    Returns:
+        Tuple aus (Ergebnisse, Anzahl nicht rechtzeitig fertiger Anfragen)
+    """
+    results = []
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        waiting = []
+        for submission_id, row in pending:
+            try:
+                job = session.get(f"{base_url}/status/{submission_id}", timeout=REQUEST_TIMEOUT).json()
+            except (requests.exceptions.RequestException, ValueError):
+                waiting.append((submission_id, row))
+                continue
+            if job.get('status') == 'fertig':
+                results.append(build_result(row, job['kategorie'], job['konfidenz'] or 0))
+            elif job.get('status') == 'ausstehend':
+                waiting.append((submission_id, row))
+            else:
+                # Klassifikation fehlgeschlagen: wie auf der Bestätigungsseite zur manuellen Prüfung
+                results.append(build_result(row, "Manuelle Prüfung", 0))
+        pending = waiting
+        if pending:
+            time.sleep(0.5)
+    return results, len(pending)
+
+def build_form_data(row):
+    """
+    Erstellt die Formulardaten für /upload aus einer CSV-Zeile
+    """
+    return {
+        'first_name': row['vorname'],
+        'last_name': row['nachname'],
+        'e_mail': row['e_mail'],
+        'subject': row['betreff'],
+        'message': row['nachricht']
+    }
+
+def build_result(row, assigned_category, confidence):
+    """
+    Erstellt den Ergebnis-Datensatz für eine klassifizierte Anfrage
+    """
+    return {
+        'id': row['id'],
+        'vorname': row['vorname'],
+        'nachname': row['nachname'],
+        'e_mail': row['e_mail'],
+        'betreff': row['betreff'],
+        'nachricht': row['nachricht'],
+        'erwartete_kategorie': row['kategorie'],
+        'zugeordnete_kategorie': assigned_category,
+        'konfidenz': confidence,
+        'korrekt': row['kategorie'] == assigned_category
+    }
+
+def percentile(sorted_values, p):
+    """
+    Berechnet das p-Perzentil (0-100) einer sortierten Liste mit linearer Interpolation
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
 def process_csv(input_file, output_file, base_url="http://localhost:5000"):
     """
     Liest CSV-Datei, sendet Anfragen an Flask-App und speichert Ergebnisse
@@ -33,47 +127,38 @@ def process_csv(input_file, output_file, base_url="http://localhost:5000"):
     
     # CSV-Datei lesen
     with open(input_file, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        total_rows = sum(1 for _ in reader)
-        csvfile.seek(0)
-        reader = csv.DictReader(csvfile)
+        rows = list(csv.DictReader(csvfile))
+        total_rows = len(rows)
         
         print(f"Verarbeite {total_rows} Anfragen...")
         
-        for idx, row in enumerate(reader, 1):
+        for idx, row in enumerate(rows, 1):
             # Fortschritt anzeigen
             print(f"\nVerarbeite Anfrage {idx}/{total_rows}: {row['vorname']} {row['nachname']}")
             
             # Daten für POST-Request vorbereiten
-            form_data = {
-                'first_name': row['vorname'],
-                'last_name': row['nachname'],
-                'e_mail': row['e_mail'],
-                'subject': row['betreff'],
-                'message': row['nachricht']
-            }
+            form_data = build_form_data(row)
             
             try:
                 # Request senden
-                response = requests.post(f"{base_url}/upload", data=form_data)
+                response = requests.post(f"{base_url}/upload", data=form_data, timeout=REQUEST_TIMEOUT)
                 
                 if response.status_code == 200:
-                    # Kategorie und Konfidenz aus HTML extrahieren
-                    assigned_category, confidence = parse_response(response.text)
+                    # Asynchrone Klassifikation: Ergebnis über /status abwarten
+                    submission_id = parse_pending_id(response.text)
+                    if submission_id is not None:
+                        resolved, _ = wait_for_classifications(requests, base_url, [(submission_id, row)])
+                        if not resolved:
+                            print(f"  → Klassifikation nicht innerhalb von {STATUS_TIMEOUT:.0f}s fertig")
+                            continue
+                        result = resolved[0]
+                        assigned_category, confidence = result['zugeordnete_kategorie'], result['konfidenz']
+                    else:
+                        # Kategorie und Konfidenz aus HTML extrahieren
+                        assigned_category, confidence = parse_response(response.text)
+                        result = build_result(row, assigned_category, confidence)
                     
                     # Ergebnis speichern
-                    result = {
-                        'id': row['id'],
-                        'vorname': row['vorname'],
-                        'nachname': row['nachname'],
-                        'e_mail': row['e_mail'],
-                        'betreff': row['betreff'],
-                        'nachricht': row['nachricht'],
-                        'erwartete_kategorie': row['kategorie'],
-                        'zugeordnete_kategorie': assigned_category,
-                        'konfidenz': confidence,
-                        'korrekt': row['kategorie'] == assigned_category
-                    }
                     results.append(result)
                     
                     print(f"  → Zugeordnet: {assigned_category} (Konfidenz: {confidence}%)")
@@ -89,6 +174,12 @@ def process_csv(input_file, output_file, base_url="http://localhost:5000"):
             # Kleine Pause zwischen Requests
             time.sleep(0.5)
     
+    write_results(results, output_file)
+
+def write_results(results, output_file):
+    """
+    Schreibt die Ergebnisse in eine CSV-Datei und gibt die Genauigkeits-Zusammenfassung aus
+    """
     # Ergebnisse in neue CSV-Datei schreiben
     if results:
         fieldnames = ['id', 'vorname', 'nachname', 'e_mail', 'betreff', 'nachricht', 
@@ -148,11 +239,155 @@ def process_csv(input_file, output_file, base_url="http://localhost:5000"):
         else:
             print("Keine falschen Klassifizierungen!")
 
+class RatePacer:
+    """
+    Verteilt Sendezeitpunkte gleichmäßig, sodass alle Threads zusammen die Ziel-Rate einhalten
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = time.perf_counter()
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            slot = max(self.next_slot, time.perf_counter())
+            self.next_slot = slot + self.interval
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+def load_test(input_file, output_file, base_url="http://localhost:5000",
+              concurrency=10, rate=None, warmup=5.0, duration=30.0, timeout=REQUEST_TIMEOUT):
+    """
+    Lasttest: sendet die Anfragen aus der CSV-Datei nebenläufig und wiederholt an die Flask-App
+    
+    Bei asynchroner Klassifikation (KI_WEB_ASYNC=1) misst die Latenz nur die Annahme der Anfrage;
+    die Kategorien für die Genauigkeit werden nach dem Messfenster über /status abgefragt.
+    
+    Args:
+        input_file: CSV-Datei mit den Testanfragen (wird zyklisch wiederholt)
+        output_file: CSV-Datei für die Ergebnisse
+        base_url: URL der Flask-App
+        concurrency: Anzahl gleichzeitiger Verbindungen
+        rate: Ziel-Rate in Anfragen pro Sekunde (None = so schnell wie möglich)
+        warmup: Aufwärmphase in Sekunden, die nicht in die Messung eingeht
+        duration: Messdauer in Sekunden nach der Aufwärmphase
+        timeout: Wartezeit pro Anfrage in Sekunden; Zeitüberschreitungen zählen als Fehler
+    """
+    with open(input_file, 'r', encoding='utf-8') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    if not rows:
+        print("Keine Anfragen in der Eingabedatei.")
+        return
+    
+    print(f"Lasttest: {concurrency} Verbindungen, Rate: {rate or 'unbegrenzt'} Anfragen/s, "
+          f"Aufwärmen: {warmup}s, Dauer: {duration}s")
+    
+    row_cycle = itertools.cycle(rows)
+    cycle_lock = threading.Lock()
+    pacer = RatePacer(rate)
+    results = []
+    latencies = []
+    pending = []
+    errors = [0]
+    timeouts = [0]
+    results_lock = threading.Lock()
+    
+    start = time.perf_counter()
+    measure_start = start + warmup
+    end = measure_start + duration
+    
+    def worker():
+        # Eigene Session pro Thread: Keep-Alive wie bei einem echten Client
+        session = requests.Session()
+        while True:
+            pacer.wait()
+            if time.perf_counter() >= end:
+                break
+            with cycle_lock:
+                row = next(row_cycle)
+            sent = time.perf_counter()
+            timed_out = False
+            submission_id = result = None
+            try:
+                response = session.post(f"{base_url}/upload", data=build_form_data(row), timeout=timeout)
+                ok = response.status_code == 200
+                if ok:
+                    submission_id = parse_pending_id(response.text)
+                    if submission_id is None:
+                        result = build_result(row, *parse_response(response.text))
+            except requests.exceptions.Timeout:
+                ok, timed_out = False, True
+            except Exception:
+                ok = False
+            received = time.perf_counter()
+            
+            # Nur Anfragen zählen, die vollständig im Messfenster liegen; Fehler zählen ab dem Messbeginn,
+            # damit auch Zeitüberschreitungen über das Fensterende hinaus erfasst werden
+            if sent < measure_start or (ok and received > end):
+                continue
+            with results_lock:
+                if ok:
+                    latencies.append(received - sent)
+                    if submission_id is not None:
+                        pending.append((submission_id, row))
+                    else:
+                        results.append(result)
+                else:
+                    errors[0] += 1
+                    timeouts[0] += timed_out
+        session.close()
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    
+    latencies.sort()
+    completed = len(latencies)
+    
+    print(f"\n{'='*60}")
+    print(f"LASTTEST ZUSAMMENFASSUNG")
+    print(f"{'='*60}")
+    print(f"Erfolgreiche Anfragen: {completed}")
+    print(f"Fehlgeschlagene Anfragen: {errors[0]} (davon Zeitüberschreitungen nach {timeout:.0f}s: {timeouts[0]})")
+    print(f"Durchsatz: {completed / duration:.1f} Anfragen/s")
+    print(f"Latenz p50: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latenz p95: {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Latenz p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    if latencies:
+        print(f"Latenz max: {latencies[-1] * 1000:.1f} ms")
+    
+    if pending:
+        print(f"\nAsynchrone Klassifikation (KI_WEB_ASYNC=1): Latenz ohne Klassifikation gemessen, "
+              f"Kategorien von {len(pending)} Anfragen werden über /status abgefragt ...")
+        with requests.Session() as session:
+            resolved, unfinished = wait_for_classifications(session, base_url, pending)
+        results.extend(resolved)
+        if unfinished:
+            print(f"{unfinished} Anfragen nach {STATUS_TIMEOUT:.0f}s nicht fertig klassifiziert "
+                  f"(nicht in der Genauigkeit enthalten)")
+    
+    write_results(results, output_file)
+
 def main():
+    parser = argparse.ArgumentParser(description='Testet die Klassifikation der Flask-App mit synthetischen Anfragen')
+    parser.add_argument('--input', type=str, default="synthetische_buergeranfragen.csv", help='CSV-Datei mit Testanfragen')
+    parser.add_argument('--url', type=str, default="http://localhost:5000", help='URL der Flask-App')
+    parser.add_argument('--lasttest', action='store_true', help='Lasttest statt einmaligem Durchlauf')
+    parser.add_argument('--nebenlaeufigkeit', type=int, default=10, help='Gleichzeitige Verbindungen im Lasttest')
+    parser.add_argument('--rate', type=float, default=None, help='Ziel-Rate in Anfragen/s im Lasttest (Standard: unbegrenzt)')
+    parser.add_argument('--aufwaermen', type=float, default=5.0, help='Aufwärmphase in Sekunden im Lasttest')
+    parser.add_argument('--dauer', type=float, default=30.0, help='Messdauer in Sekunden im Lasttest')
+    parser.add_argument('--zeitlimit', type=float, default=REQUEST_TIMEOUT,
+                        help='Wartezeit pro Anfrage in Sekunden im Lasttest; danach zählt sie als Fehler')
+    args = parser.parse_args()
+    
     # Konfiguration
-    INPUT_FILE = "synthetische_buergeranfragen.csv"
+    INPUT_FILE = args.input
     OUTPUT_FILE = f"test_ergebnisse_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    FLASK_URL = "http://localhost:5000"  # Anpassen falls Flask auf anderem Port läuft
+    FLASK_URL = args.url  # Anpassen falls Flask auf anderem Port läuft
     
     print("Bürgeranfragen Test-Script")
     print("=" * 60)
@@ -177,7 +412,12 @@ def main():
     
     # CSV verarbeiten
     try:
-        process_csv(INPUT_FILE, OUTPUT_FILE, FLASK_URL)
+        if args.lasttest:
+            load_test(INPUT_FILE, OUTPUT_FILE, FLASK_URL,
+                      concurrency=args.nebenlaeufigkeit, rate=args.rate,
+                      warmup=args.aufwaermen, duration=args.dauer, timeout=args.zeitlimit)
+        else:
+            process_csv(INPUT_FILE, OUTPUT_FILE, FLASK_URL)
     except FileNotFoundError:
         print(f"✗ Datei '{INPUT_FILE}' nicht gefunden!")
         print("Stelle sicher, dass die CSV-Datei im gleichen Verzeichnis liegt.")
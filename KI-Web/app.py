@@ -1,156 +1,622 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify, g, Response, has_request_context
 import os
 from datetime import datetime
-import json
+import atexit
+from contextlib import contextmanager, closing
+import contextvars
+from functools import partial
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 import requests
 
+from ollama_client import OllamaClient
+from classification_cache import ClassificationCache, make_cache_key
+from async_classification import ClassificationJobs, STATUS_PENDING, STATUS_DONE
+from storage import create_storage
+from metrics import MetricsRegistry, CONTENT_TYPE
+from tracing import Tracer
+from coalescer import RequestCoalescer
+from response_parser import ClassificationParser, PATH_FAILED
+from prompts import ClassificationPrompts
+from classifiers import (CONFIDENCE_THRESHOLD, MAIN_CATEGORIES, build_cascade, keyword_classifier,
+                         load_local_model)
+from circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from online_learning import OnlineLearner, current_snapshot
+
 app = Flask(__name__)
 UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Metriken für den /metrics-Endpunkt (Prometheus-Textformat)
+metrics = MetricsRegistry()
+REQUESTS_TOTAL = metrics.counter("ki_web_requests_total", "Anzahl HTTP-Anfragen",
+                                 ("endpoint", "status"))
+REQUEST_DURATION = metrics.histogram("ki_web_request_duration_seconds", "Dauer der HTTP-Anfragen",
+                                     ("endpoint",))
+STAGE_DURATION = metrics.histogram("ki_web_stage_duration_seconds",
+                                   "Dauer der Verarbeitungsschritte (parse, classify, ollama, persist, render)",
+                                   ("stage",))
+OLLAMA_ERRORS = metrics.counter("ki_web_ollama_errors_total",
+                                "Fehlgeschlagene oder übersprungene Ollama-Aufrufe "
+                                "(http, timeout, connection, invalid_response, other, circuit_open, budget_exhausted)",
+                                ("kind",))
+OLLAMA_RESULTS = metrics.counter("ki_web_ollama_classifications_total",
+                                 "Ollama-Klassifikationen nach Herkunft des Ergebnisses (ollama, cache, fallback)",
+                                 ("source",))
+OLLAMA_PARSE_PATHS = metrics.counter("ki_web_ollama_parse_total",
+                                     "Ausgewertete Ollama-Antworten nach Parse-Pfad (json, pipe, name_scan, failed)",
+                                     ("path",))
+OLLAMA_EARLY_STOPS = metrics.counter("ki_web_ollama_stream_early_stop_total",
+                                     "Gestreamte Ollama-Antworten, die nach vollständiger Klassifikation abgebrochen wurden")
+CATEGORY_TOTAL = metrics.counter("ki_web_category_total", "Vergebene Kategorien", ("category",))
+FEEDBACK_TOTAL = metrics.counter("ki_web_feedback_total", "Bestätigte Kategorien über /api/feedback", ("category",))
+
+# Optionales Tracing: Spans pro Anfrage als JSON-Zeilen, ein Anteil der Anfragen mit cProfile/tracemalloc
+TRACING = os.environ.get("KI_WEB_TRACE", "0") == "1"
+TRACE_LOG = os.environ.get("KI_WEB_TRACE_LOG", os.path.join(UPLOAD_FOLDER, "traces.jsonl"))
+PROFILE_RATE = float(os.environ.get("KI_WEB_PROFILE_RATE", "0"))  # Prozent der Anfragen
+
+tracer = Tracer(TRACE_LOG if TRACING else None, profile_rate=PROFILE_RATE / 100)
+atexit.register(tracer.close)
+
+@contextmanager
+def _stage(name):
+    """
+    Misst die Dauer eines Verarbeitungsschritts (Metrik und, falls aktiviert, Span im Trace).
+    
+    Args:
+        name: parse, classify, ollama, persist oder render
+    """
+    with STAGE_DURATION.time(stage=name), tracer.span(name):
+        yield
+
+# Ablage der Anfragen: "jsonl" (Segment-Log), "sqlite" oder "dateien" (eine JSON-Datei pro Anfrage)
+STORAGE_BACKEND = os.environ.get("KI_WEB_STORAGE", "jsonl")
+STORAGE_PATH = os.environ.get(
+    "KI_WEB_STORAGE_PATH",
+    os.path.join(UPLOAD_FOLDER, "anfragen.db") if STORAGE_BACKEND == "sqlite" else UPLOAD_FOLDER
+)
+STORAGE_BATCH_SIZE = int(os.environ.get("KI_WEB_STORAGE_BATCH", "50"))
+STORAGE_FLUSH_INTERVAL = float(os.environ.get("KI_WEB_STORAGE_FLUSH_INTERVAL", "1.0"))
+STORAGE_FSYNC = os.environ.get("KI_WEB_STORAGE_FSYNC", "intervall")  # "immer", "intervall" oder "nie"
+
+submission_storage = create_storage(STORAGE_BACKEND, STORAGE_PATH,
+                                    batch_size=STORAGE_BATCH_SIZE,
+                                    flush_interval=STORAGE_FLUSH_INTERVAL,
+                                    fsync=STORAGE_FSYNC)
+atexit.register(submission_storage.close)
+
 # Ollama-Konfiguration
-OLLAMA_URL = "http://localhost:11434"
-OLLAMA_MODEL = "llama3"  # oder ein anderes verfügbares Modell
-
-# Kategorien-Definitionen
-CATEGORIES = {
-    "KFZ-Zulassung": {
-        "keywords": ["auto", "fahrzeug", "kfz", "pkw", "zulassung", "anmeldung", "ummeldung", 
-                     "kennzeichen", "wunschkennzeichen", "abmeldung", "tüv", "hu", "hauptuntersuchung"],
-        "description": "Anfragen zu Fahrzeugzulassungen, Ummeldungen und Kennzeichen"
-    },
-    "Gewerbeanmeldung": {
-        "keywords": ["gewerbe", "gewerbeschein", "kleingewerbe", "freiberufler", "handelsregister",
-                     "einzelunternehmen", "gmbh", "firma", "selbständig", "gewerbesteuer", "gewerbeamt"],
-        "description": "Anfragen zu Gewerbeanmeldungen und geschäftlichen Tätigkeiten"
-    },
-    "Hundesteuer": {
-        "keywords": ["hund", "hundesteuer", "hundemarke", "welpe", "haustier", "vierbeiner",
-                     "kampfhund", "listenhund", "hundehalter", "hundeanmeldung"],
-        "description": "Anfragen zur Anmeldung von Hunden und Hundesteuer"
-    },
-    "Nicht zuordenbar": {
-        "keywords": [],
-        "description": "Anfragen, die keiner der vordefinierten Kategorien zugeordnet werden können"
-    }
-}
+OLLAMA_URL = os.environ.get("KI_WEB_OLLAMA_URL", "http://localhost:11434")  # z.B. ollama_stub.py
+OLLAMA_MODEL = os.environ.get("KI_WEB_OLLAMA_MODEL", "llama3")  # oder ein anderes verfügbares Modell
+OLLAMA_TIMEOUT = 30
+OLLAMA_POOL_SIZE = int(os.environ.get("KI_WEB_OLLAMA_POOL_SIZE", "10"))
+
+# Gemeinsamer Client mit Connection-Pool für alle Ollama-Aufrufe
+ollama_client = OllamaClient(OLLAMA_URL, pool_size=OLLAMA_POOL_SIZE, timeout=OLLAMA_TIMEOUT)
+
+# Antwortformat: "json" (Ollama-JSON-Modus), "schema" (JSON-Schema mit den Kategorien, ab Ollama 0.5)
+# oder "text" (bisheriges Format KATEGORIE|KONFIDENZ)
+OLLAMA_FORMAT = os.environ.get("KI_WEB_OLLAMA_FORMAT", "json")
+
+# Streaming: Generierung abbrechen, sobald die Klassifikation vollständig ist (KI_WEB_OLLAMA_STREAM=1).
+# OLLAMA_NUM_PREDICT begrenzt die erzeugten Tokens pro klassifizierter Anfrage (auch ohne Streaming).
+OLLAMA_STREAM = os.environ.get("KI_WEB_OLLAMA_STREAM", "0") == "1"
+OLLAMA_NUM_PREDICT = int(os.environ.get("KI_WEB_OLLAMA_NUM_PREDICT", "64"))
+
+# Wie lange Ollama das Modell nach einem Aufruf geladen hält (z.B. "30m", "-1" = unbegrenzt).
+# Solange es geladen bleibt, verarbeitet Ollama den gemeinsamen Prompt-Anfang nicht erneut.
+OLLAMA_KEEP_ALIVE = os.environ.get("KI_WEB_OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_WARMUP = os.environ.get("KI_WEB_OLLAMA_WARMUP", "0") == "1"
+
+# Latenzbudget einer Web-Anfrage: Ollama erhält nur die verbleibende Zeit, danach greift der Fallback
+OLLAMA_LATENCY_BUDGET = float(os.environ.get("KI_WEB_OLLAMA_BUDGET", "10"))
+
+# Schutzschalter: nach CIRCUIT_FAILURES Fehlern in Folge wird Ollama für CIRCUIT_COOLDOWN Sekunden umgangen
+CIRCUIT_FAILURES = int(os.environ.get("KI_WEB_CIRCUIT_FAILURES", "5"))
+CIRCUIT_COOLDOWN = float(os.environ.get("KI_WEB_CIRCUIT_COOLDOWN", "30"))
+
+CIRCUIT_STATE = metrics.gauge("ki_web_ollama_circuit_state",
+                              "Zustand des Ollama-Schutzschalters (0 = geschlossen, 1 = halboffen, 2 = offen)")
+CIRCUIT_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+CIRCUIT_STATE.set(0)
+
+def _circuit_state_changed(old_state, new_state):
+    print(f"Ollama-Schutzschalter: {old_state} -> {new_state}")
+    CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[new_state])
+
+ollama_breaker = CircuitBreaker(CIRCUIT_FAILURES, CIRCUIT_COOLDOWN, on_state_change=_circuit_state_changed)
+
+# Frist (time.perf_counter()) für Ollama-Aufrufe in Threads ohne Request-Kontext, z.B. im Batch-Executor
+# oder in der Bündelung; gesetzt über _run_with_deadline()
+_ollama_deadline = contextvars.ContextVar("ollama_deadline", default=None)
+
+def _request_deadline():
+    """
+    Frist der laufenden Web-Anfrage: Start plus Latenzbudget.
+    
+    Returns:
+        Zeitpunkt in time.perf_counter()-Sekunden oder None außerhalb einer Web-Anfrage
+    """
+    deadline = _ollama_deadline.get()
+    if deadline is None and has_request_context() and "request_start" in g:
+        deadline = g.request_start + OLLAMA_LATENCY_BUDGET
+    return deadline
+
+def _run_with_deadline(deadline, function, *args):
+    # Führt function in einem anderen Thread mit der Frist der auslösenden Web-Anfrage aus
+    token = _ollama_deadline.set(deadline)
+    try:
+        return function(*args)
+    finally:
+        _ollama_deadline.reset(token)
+
+class _DeadlineExecutor:
+    """
+    Reicht die Frist der Web-Anfrage an alle über map() gestarteten Aufrufe weiter.
+    """
+    
+    def __init__(self, executor, deadline):
+        self.executor = executor
+        self.deadline = deadline
+    
+    def map(self, function, *iterables):
+        return self.executor.map(partial(_run_with_deadline, self.deadline, function), *iterables)
+
+def _ollama_timeout():
+    """
+    Timeout für den nächsten Ollama-Aufruf: die Restzeit bis zur Frist der auslösenden Web-Anfrage,
+    höchstens OLLAMA_TIMEOUT. Ohne Frist (Hintergrund-Klassifikation) gilt OLLAMA_TIMEOUT.
+    
+    Returns:
+        Timeout in Sekunden (<= 0, wenn das Budget aufgebraucht ist)
+    """
+    deadline = _request_deadline()
+    if deadline is not None:
+        return min(OLLAMA_TIMEOUT, deadline - time.perf_counter())
+    return OLLAMA_TIMEOUT
+
+# Schlüsselwort-Tabelle einmalig kompilieren; Modus "substring", "wort" (ganze Wörter) oder "stamm"
+KEYWORD_MATCH_MODE = os.environ.get("KI_WEB_KEYWORD_MODE", "substring")
+keyword_based_classification = keyword_classifier(KEYWORD_MATCH_MODE)
+
+# Asynchrone Klassifikation: Anfrage wird sofort gespeichert, die Kategorie im Hintergrund ermittelt
+ASYNC_CLASSIFICATION = os.environ.get("KI_WEB_ASYNC", "0") == "1"
+CLASSIFICATION_WORKERS = int(os.environ.get("KI_WEB_WORKERS", "8"))
+# Höchstzahl ausstehender Hintergrund-Klassifikationen; darüber wird /upload mit 503 abgelehnt
+CLASSIFICATION_QUEUE_SIZE = int(os.environ.get("KI_WEB_QUEUE_SIZE", "1000"))
+
+# Batch-API: maximale Anzahl Anfragen pro Aufruf und parallele Ollama-Aufrufe über alle Batches
+BATCH_MAX_SIZE = int(os.environ.get("KI_WEB_BATCH_MAX_SIZE", "1000"))
+BATCH_CONCURRENCY = int(os.environ.get("KI_WEB_BATCH_CONCURRENCY", "8"))
+
+# Cache für Ollama-Klassifikationen. Der Schlüssel enthält Antwortformat und Prompt-Aufbau
+# (siehe CACHE_PROMPT_KEY); PROMPT_VERSION nur bei anderen Änderungen erhöhen, z.B. an der Auswertung
+PROMPT_VERSION = "3"
+CACHE_MAX_SIZE = int(os.environ.get("KI_WEB_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.environ.get("KI_WEB_CACHE_TTL", "86400"))
+CACHE_DB = os.environ.get("KI_WEB_CACHE_DB")  # z.B. "klassifikationen.db" für persistente Ablage
+
+classification_cache = ClassificationCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL, db_path=CACHE_DB)
+
+# Bündelung: gleichzeitige Ollama-Klassifikationen, die innerhalb von KI_WEB_COALESCE_MAX_WAIT_MS
+# eintreffen, werden mit einem gemeinsamen Prompt beantwortet
+COALESCE = os.environ.get("KI_WEB_COALESCE", "0") == "1"
+COALESCE_MAX_BATCH = int(os.environ.get("KI_WEB_COALESCE_MAX_BATCH", "8"))
+COALESCE_MAX_WAIT_MS = float(os.environ.get("KI_WEB_COALESCE_MAX_WAIT_MS", "5"))
+COALESCE_CONCURRENCY = int(os.environ.get("KI_WEB_COALESCE_CONCURRENCY", "4"))
 
-# Konfidenz-Schwellenwert für die Kategorisierung
-CONFIDENCE_THRESHOLD = 50
+COALESCED_BATCH_SIZE = metrics.histogram("ki_web_ollama_batch_size",
+                                         "Anzahl Anfragen pro gebündeltem Ollama-Prompt",
+                                         buckets=(1, 2, 4, 8, 16, 32, 64))
+
+# Lokaler Klassifikator (Portierung der KNIME-Workflows)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_MODEL_PATH = os.environ.get("KI_WEB_LOCAL_MODEL", os.path.join(APP_DIR, "lokales_modell.npz"))
+LOCAL_TRAINING_CSV = os.path.join(APP_DIR, "..", "KI-Web-Test", "synthetische_buergeranfragen.csv")
+LOCAL_MODEL_THRESHOLD = int(os.environ.get("KI_WEB_LOCAL_THRESHOLD", "80"))
+
+# Online-Lernen: über /api/feedback bestätigte Kategorien fließen ohne Neustart ins lokale Modell.
+# Jede Aktualisierung wird versioniert neben KI_WEB_ONLINE_SNAPSHOT gespeichert (Standard: neben der
+# Modelldatei, z.B. lokales_modell.v3.npz); beim Start wird der jüngste Schnappschuss geladen.
+ONLINE_LEARNING = os.environ.get("KI_WEB_ONLINE_LEARNING", "0") == "1"
+ONLINE_BATCH_SIZE = int(os.environ.get("KI_WEB_ONLINE_BATCH", "20"))
+ONLINE_INTERVAL = float(os.environ.get("KI_WEB_ONLINE_INTERVAL", "5"))
+ONLINE_SNAPSHOT = os.environ.get("KI_WEB_ONLINE_SNAPSHOT", LOCAL_MODEL_PATH)
+ONLINE_MAX_PENDING = int(os.environ.get("KI_WEB_ONLINE_MAX_PENDING", "10000"))
+
+if ONLINE_LEARNING and ONLINE_SNAPSHOT:
+    local_model = load_local_model(current_snapshot(ONLINE_SNAPSHOT)[0], LOCAL_TRAINING_CSV)
+    if local_model is None:
+        local_model = load_local_model(LOCAL_MODEL_PATH, LOCAL_TRAINING_CSV)
+else:
+    local_model = load_local_model(LOCAL_MODEL_PATH, LOCAL_TRAINING_CSV)
+
+def _swap_local_model(model):
+    # Eine einzige Zuweisung: laufende Klassifikationen behalten ihre Referenz auf das alte Modell
+    global local_model
+    local_model = model
+
+online_learner = None
+if ONLINE_LEARNING and local_model is not None:
+    online_learner = OnlineLearner(local_model,
+                                   on_swap=_swap_local_model,
+                                   snapshot_path=ONLINE_SNAPSHOT or None,
+                                   batch_size=ONLINE_BATCH_SIZE,
+                                   interval=ONLINE_INTERVAL,
+                                   max_pending=ONLINE_MAX_PENDING)
+    atexit.register(online_learner.close)
+
+# Klassifikations-Kaskade: günstige Stufen zuerst, Ollama nur bei zu geringer Konfidenz.
+# Format "stufe:schwellenwert,...", die letzte Stufe ohne Schwellenwert entscheidet immer.
+CLASSIFICATION_CASCADE = os.environ.get("KI_WEB_CASCADE", f"keyword:80,local:{LOCAL_MODEL_THRESHOLD},ollama")
+
+def classify_with_local_model(text):
+    """
+    Klassifiziert eine Anfrage mit dem lokalen Modell.
+    
+    Args:
+        text: Der zu klassifizierende Text (Betreff + Nachricht)
+        
+    Returns:
+        Tuple aus (Kategorie, Konfidenz) oder None, wenn kein lokales Modell geladen ist
+    """
+    if local_model is None:
+        return None
+    return local_model.predict(text)
+
+def classify_batch_with_local_model(texts):
+    """
+    Klassifiziert mehrere Anfragen in einem vektorisierten Durchlauf des lokalen Modells.
+    
+    Args:
+        texts: Liste der zu klassifizierenden Texte
+        
+    Returns:
+        Liste von Tupeln aus (Kategorie, Konfidenz) bzw. None-Einträgen ohne lokales Modell
+    """
+    if local_model is None:
+        return [None] * len(texts)
+    return local_model.predict_batch(texts)
 
 def classify_with_ollama(text):
     """
     Klassifiziert eine Anfrage mithilfe von Ollama in eine der Kategorien.
     
+    Wiederholte oder nahezu identische Anfragen werden aus dem Cache beantwortet. Ohne verwertbare
+    Antwort weicht die Kaskade auf die Schlüsselwort-Klassifikation aus.
+    
     Args:
         text: Der zu klassifizierende Text (Betreff + Nachricht)
         
     Returns:
-        Tuple aus (Kategorie, Konfidenz)
+        Tuple aus (Kategorie, Konfidenz) oder None, wenn Ollama kein verwertbares Ergebnis liefert
+    """
+    cache_key = make_cache_key(text, OLLAMA_MODEL, CACHE_PROMPT_KEY)
+    cached = classification_cache.get(cache_key)
+    if cached is not None:
+        OLLAMA_RESULTS.inc(source="cache")
+        return cached
+    
+    if ollama_coalescer is not None:
+        result = _query_ollama_coalesced(text)
+    else:
+        result = _query_ollama(text)
+    if result is None:
+        # Ollama nicht erreichbar oder Antwort unbrauchbar: nicht cachen, die Kaskade nutzt den Fallback
+        OLLAMA_RESULTS.inc(source="fallback")
+        return None
+    
+    OLLAMA_RESULTS.inc(source="ollama")
+    classification_cache.put(cache_key, result)
+    return result
+
+classification_parser = ClassificationParser(MAIN_CATEGORIES, CONFIDENCE_THRESHOLD)
+
+# Prompts und format-Feld je Antwortformat; der Prompt-Anfang wird einmal beim Start aufgebaut
+classification_prompts = ClassificationPrompts(MAIN_CATEGORIES, OLLAMA_FORMAT)
+OLLAMA_RESPONSE_FORMAT = classification_prompts.response_format
+OLLAMA_BATCH_RESPONSE_FORMAT = classification_prompts.batch_response_format
+CLASSIFICATION_PROMPT_PREFIX = classification_prompts.prefix
+BATCH_PROMPT_PREFIX = classification_prompts.batch_prefix
+classification_prompt = classification_prompts.single
+batch_prompt = classification_prompts.batch
+CACHE_PROMPT_KEY = f"{PROMPT_VERSION}:{classification_prompts.fingerprint()}"
+
+def _query_ollama(text):
+    """
+    Fragt Ollama nach der Kategorie einer Anfrage.
+    
+    Args:
+        text: Der zu klassifizierende Text (Betreff + Nachricht)
+        
+    Returns:
+        Tuple aus (Kategorie, Konfidenz) oder None, wenn Ollama kein verwertbares Ergebnis liefert
+    """
+    result = _generate(classification_prompt(text), OLLAMA_RESPONSE_FORMAT)
+    if result is None:
+        return None
+    
+    classification, path = classification_parser.parse(result)
+    _count_parse_path(path)
+    return classification
+
+def _query_ollama_coalesced(text):
+    """
+    Reiht eine Anfrage in die Bündelung ein und wartet höchstens bis zum Ende des Latenzbudgets.
+    
+    Args:
+        text: Der zu klassifizierende Text (Betreff + Nachricht)
+        
+    Returns:
+        Tuple aus (Kategorie, Konfidenz) oder None
+    """
+    timeout = _ollama_timeout()
+    if timeout <= 0:
+        OLLAMA_ERRORS.inc(kind="budget_exhausted")
+        return None
+    try:
+        # Die Frist reist mit, da der gebündelte Aufruf in einem Thread der Bündelung läuft
+        return ollama_coalescer.submit((text, time.perf_counter() + timeout), timeout=timeout)
+    except FutureTimeoutError:
+        print(f"Gebündelte Ollama-Klassifikation nach {timeout:.1f} Sekunden abgebrochen")
+        OLLAMA_ERRORS.inc(kind="timeout")
+        return None
+
+def _query_ollama_bundle(entries):
     """
-    # Erstelle einen Prompt für die Klassifikation (ohne "Nicht zuordbar")
-    main_categories = {k: v for k, v in CATEGORIES.items() if k != "Nicht zuordbar"}
-    categories_list = "\n".join([f"- {cat}: {info['description']}" for cat, info in main_categories.items()])
+    Verarbeitet ein Bündel aus _query_ollama_coalesced() bis zur spätesten Frist seiner Aufrufer;
+    wer früher aufgeben muss, wartet ohnehin nur bis zu seiner eigenen Frist.
     
-    prompt = f"""
-    Klassifiziere die folgende Bürgeranfrage in GENAU EINE der folgenden Kategorien:
+    Args:
+        entries: Liste von Tupeln aus (Text, Frist)
+        
+    Returns:
+        Liste von Tupeln aus (Kategorie, Konfidenz) bzw. None
+    """
+    texts = [text for text, _ in entries]
+    return _run_with_deadline(max(deadline for _, deadline in entries), _query_ollama_batch, texts)
+
+def _query_ollama_batch(texts):
+    """
+    Fragt Ollama mit einem einzigen Prompt nach den Kategorien mehrerer Anfragen.
     
-    {categories_list}
+    Args:
+        texts: Liste der zu klassifizierenden Texte
+        
+    Returns:
+        Liste von Tupeln aus (Kategorie, Konfidenz) bzw. None für Anfragen ohne verwertbare Antwort
+    """
+    if len(texts) == 1:
+        return [_query_ollama(texts[0])]
     
-    Anfrage:
-    {text}
+    result = _generate(batch_prompt(texts), OLLAMA_BATCH_RESPONSE_FORMAT, count=len(texts))
+    if result is None:
+        return [None] * len(texts)
     
-    WICHTIG: 
-    - Antworte NUR mit dem exakten Kategorienamen und einer Konfidenzbewertung
-    - Wenn die Anfrage zu keiner Kategorie passt, antworte mit "KEINE|0"
+    results = []
+    for classification, path in classification_parser.parse_batch(result, len(texts)):
+        _count_parse_path(path)
+        results.append(classification)
+    return results
+
+def _count_parse_path(path):
+    OLLAMA_PARSE_PATHS.inc(path=path)
+    if path == PATH_FAILED:
+        # Keine Kategorie gefunden, der Aufrufer weicht auf Keyword-Matching aus
+        OLLAMA_ERRORS.inc(kind="invalid_response")
+
+def _generate(prompt, response_format=None, count=1):
+    """
+    Sendet einen Prompt an Ollama, unter Beachtung von Latenzbudget und Schutzschalter.
     
-    Format: KATEGORIE|KONFIDENZ
-    Beispiel: KFZ-Zulassung|95
+    Args:
+        prompt: Der Prompt
+        response_format: Optionales format-Feld ("json" oder ein JSON-Schema)
+        count: Anzahl der Anfragen im Prompt (für Token-Grenze und Abbruch beim Streaming)
+        
+    Returns:
+        Der Antworttext oder None, wenn Ollama übersprungen wurde oder nicht antwortet
     """
+    timeout = _ollama_timeout()
+    if timeout <= 0:
+        OLLAMA_ERRORS.inc(kind="budget_exhausted")
+        return None
+    breaker_token = ollama_breaker.allow_request()
+    if breaker_token is None:
+        OLLAMA_ERRORS.inc(kind="circuit_open")
+        return None
+    
+    params = {
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "temperature": 0.1,  # Niedrige Temperatur für konsistente Antworten
+            "num_predict": OLLAMA_NUM_PREDICT * count,
+        }
+    }
+    if response_format is not None:
+        params["format"] = response_format
     
     try:
-        response = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0.1  # Niedrige Temperatur für konsistente Antworten
-            },
-            timeout=30
-        )
+        if OLLAMA_STREAM:
+            with _stage("ollama"):
+                result = _generate_streaming(prompt, timeout, count, params)
+            ollama_breaker.record_success(breaker_token)
+            return result
+        
+        with _stage("ollama"):
+            response = ollama_client.generate(
+                OLLAMA_MODEL,
+                prompt,
+                timeout=timeout,
+                **params
+            )
         
         if response.status_code == 200:
-            result = response.json().get("response", "").strip()
-            
-            # Parse die Antwort
-            if "|" in result:
-                parts = result.split("|")
-                category = parts[0].strip()
-                try:
-                    confidence = int(parts[1].strip().replace("%", ""))
-                except:
-                    confidence = 0
-                
-                # Prüfe ob es "KEINE" ist oder Konfidenz zu niedrig
-                if category == "KEINE" or confidence < CONFIDENCE_THRESHOLD:
-                    return "Nicht zuordbar", confidence
-                
-                # Validiere die Kategorie
-                if category in main_categories:
-                    return category, confidence
-            
-            # Fallback: Versuche die Kategorie direkt zu extrahieren
-            for cat in main_categories:
-                if cat.lower() in result.lower():
-                    return cat, 80  # Standard-Konfidenz
-            
-            # Wenn keine Kategorie gefunden wurde, verwende Keyword-Matching
-            return keyword_based_classification(text)
+            ollama_breaker.record_success(breaker_token)
+            return response.json().get("response", "").strip()
             
         else:
             print(f"Ollama-Fehler: {response.status_code}")
-            return keyword_based_classification(text)
-            
+            OLLAMA_ERRORS.inc(kind="http")
+            ollama_breaker.record_failure(breaker_token)
+            return None
+    
+    except requests.exceptions.HTTPError as e:
+        print(f"Ollama-Fehler: {str(e)}")
+        OLLAMA_ERRORS.inc(kind="http")
+        ollama_breaker.record_failure(breaker_token)
+        return None
+    except requests.exceptions.Timeout:
+        print(f"Ollama-Timeout nach {timeout:.1f} Sekunden")
+        OLLAMA_ERRORS.inc(kind="timeout")
+        ollama_breaker.record_failure(breaker_token)
+        return None
+    except requests.exceptions.ConnectionError as e:
+        print(f"Ollama nicht erreichbar: {str(e)}")
+        OLLAMA_ERRORS.inc(kind="connection")
+        ollama_breaker.record_failure(breaker_token)
+        return None
     except Exception as e:
         print(f"Fehler bei Ollama-Klassifikation: {str(e)}")
-        return keyword_based_classification(text)
+        OLLAMA_ERRORS.inc(kind="other")
+        ollama_breaker.record_failure(breaker_token)
+        return None
 
-def keyword_based_classification(text):
+def _generate_streaming(prompt, timeout, count, params):
     """
-    Fallback-Klassifikation basierend auf Schlüsselwörtern.
+    Liest die Antwort gestreamt und bricht ab, sobald alle Klassifikationen vollständig sind.
     
     Args:
-        text: Der zu klassifizierende Text
+        prompt: Der Prompt
+        timeout: Gesamtzeit in Sekunden, die für die Antwort zur Verfügung steht
+        count: Anzahl der erwarteten Klassifikationen
+        params: Weitere Felder für den Request-Body
         
     Returns:
-        Tuple aus (Kategorie, Konfidenz)
+        Der bis dahin empfangene Antworttext
+        
+    Raises:
+        requests.exceptions.Timeout: wenn die Zeit abläuft, bevor die Antwort vollständig ist
     """
-    text_lower = text.lower()
-    scores = {}
-    
-    # Nur die Hauptkategorien bewerten (nicht "Nicht zuordbar")
-    main_categories = {k: v for k, v in CATEGORIES.items() if k != "Nicht zuordbar"}
-    
-    for category, info in main_categories.items():
-        score = sum(1 for keyword in info["keywords"] if keyword in text_lower)
-        scores[category] = score
+    deadline = time.perf_counter() + timeout
+    result = ""
+    with closing(ollama_client.generate_stream(OLLAMA_MODEL, prompt, timeout=timeout, **params)) as pieces:
+        for piece in pieces:
+            result += piece
+            if classification_parser.is_complete(result, count):
+                OLLAMA_EARLY_STOPS.inc()
+                break
+            if time.perf_counter() > deadline:
+                raise requests.exceptions.Timeout(f"Keine vollständige Antwort nach {timeout:.1f} Sekunden")
+    return result.strip()
+
+def warm_up_ollama():
+    """
+    Lädt das Modell und lässt Ollama den statischen Prompt-Anfang vorab verarbeiten, damit bereits
+    die erste Klassifikation vom Cache profitiert. Fehler werden nur ausgegeben.
+    """
+    prefixes = [(CLASSIFICATION_PROMPT_PREFIX, OLLAMA_RESPONSE_FORMAT)]
+    if COALESCE:
+        prefixes.append((BATCH_PROMPT_PREFIX, OLLAMA_BATCH_RESPONSE_FORMAT))
+    for prefix, response_format in prefixes:
+        params = {"keep_alive": OLLAMA_KEEP_ALIVE, "options": {"temperature": 0.1, "num_predict": 1}}
+        if response_format is not None:
+            params["format"] = response_format
+        try:
+            ollama_client.generate(OLLAMA_MODEL, prefix, **params).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Aufwärmen von Ollama fehlgeschlagen: {str(e)}")
+            return
+
+# Name -> (Einzelklassifikation, Batch-Klassifikation, im Batch parallel aufrufen, Ersatzklassifikation)
+classification_cascade = build_cascade(CLASSIFICATION_CASCADE, {
+    "keyword": (keyword_based_classification, None, False, None),
+    "local": (classify_with_local_model, classify_batch_with_local_model, False, None),
+    "ollama": (classify_with_ollama, None, True, keyword_based_classification),
+})
+
+def classify(text):
+    """
+    Klassifiziert eine Anfrage über die konfigurierte Kaskade.
     
-    # Finde die Kategorie mit dem höchsten Score
-    if scores:
-        best_category = max(scores, key=scores.get)
-        max_score = scores[best_category]
+    Args:
+        text: Der zu klassifizierende Text (Betreff + Nachricht)
         
-        if max_score > 0:
-            # Berechne Konfidenz basierend auf gefundenen Keywords
-            confidence = min(100, max_score * 20)  # 20% pro gefundenem Keyword
-            
-            # Prüfe ob Konfidenz über dem Schwellenwert liegt
-            if confidence >= CONFIDENCE_THRESHOLD:
-                return best_category, confidence
-    
-    # Wenn nichts gefunden wurde oder Konfidenz zu niedrig
-    return "Nicht zuordbar", 30
+    Returns:
+        Tuple aus (Kategorie, Konfidenz)
+    """
+    with _stage("classify"):
+        category, confidence = classification_cascade.classify(text)
+    CATEGORY_TOTAL.inc(category=category)
+    return category, confidence
+
+def _finish_submission(submission_id, category, confidence):
+    submission_storage.update(submission_id, {"kategorie": category, "konfidenz": confidence})
+
+def _requeue_unclassified():
+    """
+    Reiht gespeicherte, noch nicht klassifizierte Anfragen (z.B. nach einem Neustart) erneut ein.
+    Wartet bei voller Warteschlange, bis wieder Platz ist.
+    """
+    requeued = 0
+    try:
+        for record in submission_storage.iter_records():
+            if record.get("kategorie") is None:
+                classification_jobs.submit(record["id"], f"{record.get('betreff', '')} {record.get('nachricht', '')}",
+                                           block=True)
+                requeued += 1
+    except Exception as e:
+        print(f"Fehler beim erneuten Einreihen offener Anfragen: {str(e)}")
+    if requeued:
+        print(f"{requeued} offene Anfragen erneut zur Klassifikation eingereiht")
+
+classification_jobs = None
+if ASYNC_CLASSIFICATION:
+    classification_jobs = ClassificationJobs(classify,
+                                             on_done=_finish_submission,
+                                             max_workers=CLASSIFICATION_WORKERS,
+                                             max_pending=CLASSIFICATION_QUEUE_SIZE)
+    threading.Thread(target=_requeue_unclassified, daemon=True, name="nachklassifikation").start()
+
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch")
+
+ollama_coalescer = None
+if COALESCE:
+    ollama_coalescer = RequestCoalescer(_query_ollama_bundle,
+                                        max_batch_size=COALESCE_MAX_BATCH,
+                                        max_wait=COALESCE_MAX_WAIT_MS / 1000,
+                                        max_concurrent_batches=COALESCE_CONCURRENCY,
+                                        on_batch=COALESCED_BATCH_SIZE.observe)
+    atexit.register(ollama_coalescer.close)
+
+if OLLAMA_WARMUP:
+    threading.Thread(target=warm_up_ollama, daemon=True, name="ollama-aufwaermen").start()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.trace = tracer.start(f"{request.method} {request.path}")
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or "unbekannt"
+    REQUESTS_TOTAL.inc(endpoint=endpoint, status=response.status_code)
+    if "request_start" in g:
+        REQUEST_DURATION.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_trace(exception):
+    # Auch bei Exceptions abschließen, damit das Profil freigegeben wird
+    tracer.finish(g.pop("trace", None),
+                  endpoint=request.endpoint,
+                  status=g.get("response_status", 500),
+                  fehler=str(exception) if exception else None)
 
 @app.route('/')
 def index():
@@ -158,26 +624,33 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload():
+    # Bei voller Warteschlange ablehnen, bevor die Anfrage gespeichert wird
+    if ASYNC_CLASSIFICATION and classification_jobs.full():
+        return "Zu viele Anfragen in Bearbeitung, bitte später erneut versuchen.", 503, {"Retry-After": "30"}
+    
     # Eingaben erfassen
-    first_name = request.form.get('first_name', '')
-    last_name = request.form.get('last_name', '')
-    subject = request.form.get('subject', '')
-    e_mail = request.form.get('e_mail', '')
-    message = request.form.get('message', '')
+    with _stage("parse"):
+        first_name = request.form.get('first_name', '')
+        last_name = request.form.get('last_name', '')
+        subject = request.form.get('subject', '')
+        e_mail = request.form.get('e_mail', '')
+        message = request.form.get('message', '')
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
+    submission_id = uuid.uuid4().hex
+    
     # Kombiniere Betreff und Nachricht für die Klassifikation
     full_text = f"{subject} {message}"
     
-    # Klassifiziere die Anfrage
-    category, confidence = classify_with_ollama(full_text)
-    
-    # Basisdateiname
-    base_name = f"{last_name}_{first_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    # Klassifiziere die Anfrage (im asynchronen Modus erst nach dem Speichern)
+    if ASYNC_CLASSIFICATION:
+        category, confidence = None, None
+    else:
+        category, confidence = classify(full_text)
     
-
     # JSON-Daten vorbereiten
     data = {
+        "id": submission_id,
         "zeitstempel": timestamp,
         "vorname": first_name,
         "nachname": last_name,
@@ -188,15 +661,136 @@ def upload():
         "konfidenz": confidence
     }
     
-    # JSON-Datei speichern
-    json_filename = f"{base_name}.json"
-    json_path = os.path.join(UPLOAD_FOLDER, json_filename)
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    # Anfrage speichern
+    with _stage("persist"):
+        submission_storage.save(data)
+    
+    if ASYNC_CLASSIFICATION:
+        # Nur falls die Warteschlange seit der Prüfung oben voll geworden ist, kurz auf einen Platz warten
+        classification_jobs.submit(submission_id, full_text, block=True)
+        with _stage("render"):
+            return render_template('bestätigung.html',
+                                 anfrage_id=submission_id,
+                                 status=STATUS_PENDING)
+    
+    with _stage("render"):
+        return render_template('bestätigung.html', 
+                             kategorie=category, 
+                             konfidenz=confidence,
+                             status=STATUS_DONE)
+
+@app.route('/status/<submission_id>')
+def status(submission_id):
+    """
+    Liefert den Klassifikationsstatus einer asynchron verarbeiteten Anfrage.
+    
+    Aufträge, die der Pool nicht (mehr) kennt, z.B. nach einem Neustart oder nach Verdrängung
+    aus der Statusliste, werden aus der Ablage beantwortet.
+    """
+    job = classification_jobs.status(submission_id) if classification_jobs else None
+    if job is not None:
+        return jsonify(job)
+    record = submission_storage.get(submission_id)
+    if record is None:
+        return jsonify({"fehler": "Unbekannte Anfrage"}), 404
+    return jsonify({"status": STATUS_PENDING if record.get("kategorie") is None else STATUS_DONE,
+                    "kategorie": record.get("kategorie"),
+                    "konfidenz": record.get("konfidenz")})
+
+@app.route('/api/classify/batch', methods=['POST'])
+def classify_batch():
+    """
+    Klassifiziert viele Anfragen in einem Aufruf.
+    
+    Erwartet JSON der Form {"anfragen": [{"id": ..., "betreff": ..., "nachricht": ...}, ...]}
+    und liefert {"ergebnisse": [{"id": ..., "kategorie": ..., "konfidenz": ...}, ...]}
+    in derselben Reihenfolge.
+    """
+    payload = request.get_json(silent=True)
+    anfragen = payload.get("anfragen") if isinstance(payload, dict) else None
+    if not isinstance(anfragen, list) or not all(isinstance(a, dict) for a in anfragen):
+        return jsonify({"fehler": "Erwartet wird {\"anfragen\": [{\"betreff\": ..., \"nachricht\": ...}]}"}), 400
+    if len(anfragen) > BATCH_MAX_SIZE:
+        return jsonify({"fehler": f"Maximal {BATCH_MAX_SIZE} Anfragen pro Aufruf"}), 413
+    
+    texts = [f"{a.get('betreff', '')} {a.get('nachricht', '')}" for a in anfragen]
+    with _stage("classify"):
+        results = classification_cascade.classify_batch(texts, executor=_DeadlineExecutor(batch_executor,
+                                                                                          _request_deadline()))
+    for category, _ in results:
+        CATEGORY_TOTAL.inc(category=category)
+    
+    return jsonify({"ergebnisse": [
+        {"id": a.get("id"), "kategorie": category, "konfidenz": confidence}
+        for a, (category, confidence) in zip(anfragen, results)
+    ]})
+
+@app.route('/api/feedback', methods=['POST'])
+def feedback():
+    """
+    Nimmt die bestätigte oder korrigierte Kategorie einer gespeicherten Anfrage entgegen.
+    
+    Erwartet JSON der Form {"id": ..., "kategorie": ...}; die Anfrage muss in der Ablage vorhanden
+    sein. Betreff und Nachricht können mitgeschickt werden und ersetzen dann den gespeicherten Text.
+    Die Kategorie wird in der Ablage vermerkt und bei aktivem Online-Lernen (KI_WEB_ONLINE_LEARNING=1)
+    ins lokale Modell eingearbeitet.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not payload.get("id") or payload.get("kategorie") not in MAIN_CATEGORIES:
+        return jsonify({"fehler": "Erwartet wird {\"id\": ..., \"kategorie\": ...} mit einer der Kategorien "
+                                  + ", ".join(MAIN_CATEGORIES)}), 400
+    submission_id = payload["id"]
+    category = payload["kategorie"]
+    
+    record = submission_storage.get(submission_id)
+    if record is None:
+        return jsonify({"fehler": "Unbekannte Anfrage"}), 404
+    if "betreff" in payload or "nachricht" in payload:
+        record = payload
+    
+    submission_storage.update(submission_id, {"kategorie": category, "bestaetigt": True})
+    FEEDBACK_TOTAL.inc(category=category)
+    if online_learner is not None:
+        online_learner.add(f"{record.get('betreff', '')} {record.get('nachricht', '')}", category)
     
-    return render_template('bestätigung.html', 
-                         kategorie=category, 
-                         konfidenz=confidence)
+    return jsonify({"id": submission_id, "kategorie": category, "gelernt": online_learner is not None})
+
+@app.route('/api/online/stats')
+def online_stats():
+    """
+    Liefert Version und Zähler des Online-Lernens.
+    """
+    if online_learner is None:
+        return jsonify({"aktiv": False})
+    return jsonify(dict(online_learner.stats(), aktiv=True))
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """
+    Liefert Treffer- und Fehlschlagzähler des Klassifikations-Caches.
+    """
+    return jsonify(classification_cache.stats())
+
+@app.route('/api/cascade/stats')
+def cascade_stats():
+    """
+    Liefert die Zähler der Klassifikations-Kaskade (wie viele Anfragen welche Stufe erreicht haben).
+    """
+    return jsonify(classification_cascade.stats())
+
+@app.route('/api/ollama/circuit')
+def circuit_stats():
+    """
+    Liefert Zustand und Zähler des Ollama-Schutzschalters.
+    """
+    return jsonify(ollama_breaker.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Liefert alle Metriken im Prometheus-Textformat.
+    """
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+# Status-Werte eines Klassifikationsauftrags
+STATUS_PENDING = "ausstehend"
+STATUS_DONE = "fertig"
+STATUS_FAILED = "fehler"
+
+
+class QueueFullError(Exception):
+    """
+    Die Warteschlange der Hintergrund-Klassifikation ist voll.
+    """
+
+
+class ClassificationJobs:
+    """
+    Führt Klassifikationen in einem Hintergrund-Thread-Pool aus und merkt sich
+    den Status jedes Auftrags, damit die Bestätigungsseite ihn abfragen kann.
+    """
+
+    def __init__(self, classify, on_done=None, max_workers=8, max_finished=10000, max_pending=1000):
+        """
+        Initialisiert den Auftrags-Pool.
+
+        Args:
+            classify: Funktion text -> (Kategorie, Konfidenz)
+            on_done: Optionaler Callback (job_id, Kategorie, Konfidenz), z.B. zum Persistieren
+            max_workers: Anzahl paralleler Klassifikationen
+            max_finished: Anzahl abgeschlossener Aufträge, deren Status gehalten wird
+            max_pending: Höchstzahl wartender und laufender Aufträge
+        """
+        self.classify = classify
+        self.on_done = on_done
+        self.max_finished = max_finished
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="klassifikation")
+        self._pending = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+
+    def submit(self, job_id, text, block=False):
+        """
+        Nimmt einen Auftrag an und startet die Klassifikation im Hintergrund.
+
+        Args:
+            job_id: Eindeutige ID der Anfrage
+            text: Der zu klassifizierende Text
+            block: Bei voller Warteschlange warten, bis ein Platz frei wird, statt abzulehnen
+
+        Raises:
+            QueueFullError: Wenn bereits max_pending Aufträge ausstehen und block False ist
+        """
+        with self._lock:
+            while len(self._pending) >= self.max_pending:
+                if not block:
+                    raise QueueFullError(f"{len(self._pending)} Klassifikationen ausstehend")
+                self._space.wait()
+            self._pending[job_id] = {"status": STATUS_PENDING, "kategorie": None, "konfidenz": None}
+        self._executor.submit(self._run, job_id, text)
+
+    def full(self) -> bool:
+        """
+        Gibt an, ob die Warteschlange voll ist.
+        """
+        with self._lock:
+            return len(self._pending) >= self.max_pending
+
+    def status(self, job_id):
+        """
+        Liefert den aktuellen Status eines Auftrags.
+
+        Args:
+            job_id: ID der Anfrage
+
+        Returns:
+            Dictionary mit status, kategorie und konfidenz oder None, falls unbekannt
+        """
+        with self._lock:
+            job = self._pending.get(job_id) or self._finished.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self, wait=True):
+        """
+        Beendet den Thread-Pool.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id, text):
+        try:
+            category, confidence = self.classify(text)
+            if self.on_done is not None:
+                self.on_done(job_id, category, confidence)
+            result = {"status": STATUS_DONE, "kategorie": category, "konfidenz": confidence}
+        except Exception as e:
+            print(f"Fehler bei Hintergrund-Klassifikation {job_id}: {str(e)}")
+            result = {"status": STATUS_FAILED, "kategorie": None, "konfidenz": None}
+
+        with self._lock:
+            self._pending.pop(job_id, None)
+            self._space.notify()
+            self._finished[job_id] = result
+            # Nur abgeschlossene Aufträge verdrängen, ausstehende bleiben erhalten
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
@@ -0,0 +1,196 @@
+import threading
+
+
+def parse_cascade_spec(spec: str, min_threshold: int = 0):
+    """
+    Liest eine Kaskaden-Konfiguration wie "keyword:80,local:80,ollama".
+
+    Args:
+        spec: Kommagetrennte Stufen, jeweils Name und optional ":Schwellenwert"
+        min_threshold: Untergrenze für alle Schwellenwerte (z.B. CONFIDENCE_THRESHOLD)
+
+    Returns:
+        Liste von Tupeln (Name, Schwellenwert oder None)
+    """
+    tiers = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, threshold = part.partition(":")
+        tiers.append((name.strip(), max(int(threshold), min_threshold) if threshold else None))
+    return tiers
+
+
+class ClassificationCascade:
+    """
+    Führt Klassifikatoren von günstig nach teuer aus.
+
+    Eine Stufe entscheidet, wenn ihre Konfidenz den Schwellenwert der Stufe erreicht.
+    Sonst wird an die nächste Stufe eskaliert. Eine Stufe ohne Schwellenwert entscheidet immer.
+    Liegt das Endergebnis unter min_confidence, lautet es "Nicht zuordbar".
+    """
+
+    def __init__(self, min_confidence: int = 0):
+        """
+        Args:
+            min_confidence: Mindestkonfidenz des Endergebnisses (z.B. CONFIDENCE_THRESHOLD)
+        """
+        self.tiers = []
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._below_threshold = 0
+        self._counters = {}
+        self._batch_options = {}
+        self._fallbacks = {}
+
+    def add_tier(self, name: str, classify, threshold: int = None,
+                 classify_batch=None, parallel: bool = False, fallback=None) -> None:
+        """
+        Hängt eine Stufe an die Kaskade an.
+
+        Args:
+            name: Name der Stufe (für die Zähler)
+            classify: Funktion text -> (Kategorie, Konfidenz) oder None, falls nicht verfügbar
+            threshold: Mindestkonfidenz, ab der die Stufe entscheidet (None = entscheidet immer)
+            classify_batch: Optionale Funktion texte -> Liste von Ergebnissen für Batch-Inferenz
+            parallel: Ob die Stufe im Batch-Betrieb parallel aufgerufen wird (z.B. für Netzwerkaufrufe)
+            fallback: Optionale Ersatzfunktion text -> (Kategorie, Konfidenz), falls die Stufe kein
+                Ergebnis liefert. Ein Ersatzergebnis entscheidet nie selbst, sondern wird als
+                "fallback" gezählt und nur verwendet, wenn keine spätere Stufe entscheidet.
+        """
+        self.tiers.append((name, classify, threshold))
+        self._batch_options[name] = (classify_batch, parallel)
+        self._fallbacks[name] = fallback
+        self._counters[name] = {"aufrufe": 0, "entschieden": 0, "fallback": 0}
+
+    def classify(self, text: str):
+        """
+        Klassifiziert einen Text mit der ersten ausreichend sicheren Stufe.
+
+        Args:
+            text: Der zu klassifizierende Text
+
+        Returns:
+            Tuple aus (Kategorie, Konfidenz)
+        """
+        result = None
+        decided_by = None
+        called = []
+        fallbacks = []
+        for name, classify, threshold in self.tiers:
+            tier_result = classify(text)
+            called.append(name)
+            if tier_result is None:
+                fallback = self._fallbacks[name]
+                if fallback is not None:
+                    fallbacks.append(name)
+                    result = self._better(result, fallback(text))
+                continue
+            result = tier_result
+            if threshold is None or tier_result[1] >= threshold:
+                decided_by = name
+                break
+
+        result, below_threshold = self._final(result)
+        self._count(called, decided_by, fallbacks, below_threshold)
+        return result
+
+    def classify_batch(self, texts, executor=None):
+        """
+        Klassifiziert mehrere Texte. Jede Stufe erhält nur die Texte, die noch nicht entschieden sind.
+
+        Stufen mit Batch-Funktion werden einmal für alle offenen Texte aufgerufen, parallele Stufen
+        laufen über den übergebenen Executor (begrenzte Nebenläufigkeit).
+
+        Args:
+            texts: Liste der zu klassifizierenden Texte
+            executor: Optionaler concurrent.futures.Executor für parallele Stufen
+
+        Returns:
+            Liste von Tupeln aus (Kategorie, Konfidenz) in der Reihenfolge der Texte
+        """
+        results = [None] * len(texts)
+        decided_by = [None] * len(texts)
+        called = [[] for _ in texts]
+        fallbacks = [[] for _ in texts]
+        pending = list(range(len(texts)))
+
+        for name, classify, threshold in self.tiers:
+            if not pending:
+                break
+            pending_texts = [texts[i] for i in pending]
+            classify_batch, parallel = self._batch_options[name]
+            if classify_batch is not None:
+                tier_results = classify_batch(pending_texts)
+            elif parallel and executor is not None:
+                tier_results = list(executor.map(classify, pending_texts))
+            else:
+                tier_results = [classify(text) for text in pending_texts]
+
+            fallback = self._fallbacks[name]
+            still_pending = []
+            for i, tier_result in zip(pending, tier_results):
+                called[i].append(name)
+                if tier_result is None and fallback is not None:
+                    fallbacks[i].append(name)
+                    results[i] = self._better(results[i], fallback(texts[i]))
+                elif tier_result is not None:
+                    results[i] = tier_result
+                    if threshold is None or tier_result[1] >= threshold:
+                        decided_by[i] = name
+                        continue
+                still_pending.append(i)
+            pending = still_pending
+
+        final = [self._final(result) for result in results]
+        for i, (_, below_threshold) in enumerate(final):
+            self._count(called[i], decided_by[i], fallbacks[i], below_threshold)
+        return [result for result, _ in final]
+
+    def stats(self) -> dict:
+        """
+        Liefert die Zähler pro Stufe und den Anteil der Anfragen, die die letzte Stufe nicht erreicht haben.
+
+        Returns:
+            Dictionary mit anfragen, stufen, vermieden_letzte_stufe und unter_schwelle
+            (Endergebnisse, die wegen zu geringer Konfidenz zu "Nicht zuordbar" wurden)
+        """
+        with self._lock:
+            last = self.tiers[-1][0] if self.tiers else None
+            avoided = self._requests - (self._counters[last]["aufrufe"] if last else 0)
+            return {
+                "anfragen": self._requests,
+                "stufen": {name: dict(counter) for name, counter in self._counters.items()},
+                "vermieden_letzte_stufe": avoided,
+                "vermieden_quote": avoided / self._requests if self._requests else 0.0,
+                "unter_schwelle": self._below_threshold,
+            }
+
+    @staticmethod
+    def _better(result, fallback_result):
+        # Ein Ersatzergebnis verdrängt kein sichereres Ergebnis einer früheren Stufe
+        if result is None or (fallback_result is not None and fallback_result[1] > result[1]):
+            return fallback_result
+        return result
+
+    def _final(self, result):
+        # Liefert (Endergebnis, ob es wegen zu geringer Konfidenz ersetzt wurde)
+        if result is None:
+            return ("Nicht zuordbar", 0), False
+        if result[1] < self.min_confidence and result[0] != "Nicht zuordbar":
+            return ("Nicht zuordbar", result[1]), True
+        return result, False
+
+    def _count(self, called, decided_by, fallbacks, below_threshold):
+        with self._lock:
+            self._requests += 1
+            for name in called:
+                self._counters[name]["aufrufe"] += 1
+            for name in fallbacks:
+                self._counters[name]["fallback"] += 1
+            if decided_by is not None:
+                self._counters[decided_by]["entschieden"] += 1
+            if below_threshold:
+                self._below_threshold += 1
@@ -0,0 +1,148 @@
+import threading
+import time
+
+# Zustände des Schutzschalters
+STATE_CLOSED = "geschlossen"   # Aufrufe laufen normal
+STATE_OPEN = "offen"           # Aufrufe werden sofort abgelehnt
+STATE_HALF_OPEN = "halboffen"  # einzelne Testaufrufe prüfen, ob der Dienst wieder antwortet
+
+
+class CircuitBreaker:
+    """
+    Schutzschalter für Aufrufe eines entfernten Dienstes (hier Ollama).
+
+    Nach failure_threshold aufeinanderfolgenden Fehlern öffnet der Schalter und lehnt Aufrufe
+    für cooldown Sekunden sofort ab. Danach lässt er im halboffenen Zustand einen Testaufruf zu:
+    Gelingt er, schließt der Schalter, sonst öffnet er erneut.
+
+    Jeder Zustandswechsel beginnt eine neue Generation. allow_request() gibt die Generation als
+    Marke zurück; Ergebnisse mit der Marke einer früheren Generation (z.B. ein langsamer Aufruf,
+    der noch vor dem Öffnen zugelassen wurde) werden ignoriert.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0,
+                 on_state_change=None, clock=time.monotonic):
+        """
+        Initialisiert den Schalter im geschlossenen Zustand.
+
+        Args:
+            failure_threshold: Anzahl aufeinanderfolgender Fehler, ab der der Schalter öffnet
+            cooldown: Wartezeit in Sekunden, bevor ein Testaufruf zugelassen wird
+            on_state_change: Optionale Funktion (alter Zustand, neuer Zustand), z.B. für Metriken
+            clock: Zeitquelle (für Tests austauschbar)
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.on_state_change = on_state_change
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._generation = 1
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started = None
+        self._trips = 0
+        self._rejected = 0
+        self._stale = 0
+
+    @property
+    def state(self) -> str:
+        """
+        Aktueller Zustand (ein abgelaufener offener Zustand wird als halboffen gemeldet).
+        """
+        with self._lock:
+            if self._state == STATE_OPEN and self._clock() - self._opened_at >= self.cooldown:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """
+        Prüft, ob ein Aufruf durchgeführt werden darf.
+
+        Jeder zugelassene Aufruf muss mit record_success() oder record_failure() und der
+        zurückgegebenen Marke abgeschlossen werden.
+
+        Returns:
+            Die Marke (Generation bei der Zulassung) oder None, wenn der Aufruf abgelehnt wird
+        """
+        with self._lock:
+            now = self._clock()
+            if self._state == STATE_CLOSED:
+                return self._generation
+            if self._state == STATE_OPEN and now - self._opened_at >= self.cooldown:
+                self._set_state(STATE_HALF_OPEN)
+            # Halboffen: nur ein Testaufruf gleichzeitig (ein hängengebliebener Test verfällt nach cooldown)
+            if self._state == STATE_HALF_OPEN and (self._probe_started is None
+                                                   or now - self._probe_started >= self.cooldown):
+                self._probe_started = now
+                return self._generation
+            self._rejected += 1
+            return None
+
+    def record_success(self, token) -> None:
+        """
+        Meldet einen erfolgreichen Aufruf; schließt den Schalter.
+
+        Args:
+            token: Die Marke aus allow_request()
+        """
+        with self._lock:
+            if self._is_stale(token):
+                return
+            self._failures = 0
+            self._probe_started = None
+            if self._state != STATE_CLOSED:
+                self._set_state(STATE_CLOSED)
+
+    def record_failure(self, token) -> None:
+        """
+        Meldet einen fehlgeschlagenen Aufruf (Fehler oder Timeout).
+
+        Args:
+            token: Die Marke aus allow_request()
+        """
+        with self._lock:
+            if self._is_stale(token):
+                return
+            self._failures += 1
+            self._probe_started = None
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != STATE_OPEN:
+                    self._trips += 1
+                    self._set_state(STATE_OPEN)
+                self._opened_at = self._clock()
+
+    def stats(self) -> dict:
+        """
+        Liefert Zustand und Zähler des Schalters.
+
+        Returns:
+            Dictionary mit zustand, aufeinanderfolgende_fehler, ausloesungen, abgelehnt, veraltet
+            (ignorierte Ergebnisse früherer Generationen) und verbleibende_sperrzeit (Sekunden bis
+            zum nächsten Testaufruf)
+        """
+        state = self.state
+        with self._lock:
+            remaining = 0.0
+            if self._state == STATE_OPEN:
+                remaining = max(0.0, self.cooldown - (self._clock() - self._opened_at))
+            return {
+                "zustand": state,
+                "aufeinanderfolgende_fehler": self._failures,
+                "ausloesungen": self._trips,
+                "abgelehnt": self._rejected,
+                "veraltet": self._stale,
+                "verbleibende_sperrzeit": round(remaining, 3),
+            }
+
+    def _is_stale(self, token):
+        if token == self._generation:
+            return False
+        self._stale += 1
+        return True
+
+    def _set_state(self, state):
+        old, self._state = self._state, state
+        self._generation += 1
+        if self.on_state_change is not None:
+            self.on_state_change(old, state)
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalisiert einen Anfragetext, damit fast identische Anfragen denselben Schlüssel erhalten.
+
+    Groß-/Kleinschreibung, Satzzeichen und Leerraum werden vereinheitlicht.
+
+    Args:
+        text: Der Anfragetext (Betreff + Nachricht)
+
+    Returns:
+        Der normalisierte Text
+    """
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    """
+    Erzeugt den Cache-Schlüssel aus normalisiertem Text, Modellname und Prompt-Version.
+
+    Args:
+        text: Der Anfragetext
+        model: Name des Ollama-Modells
+        prompt_version: Version des Klassifikations-Prompts
+
+    Returns:
+        SHA-256-Hash als Hex-String
+    """
+    raw = f"{model}\0{prompt_version}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Begrenzter Cache für Klassifikationsergebnisse mit LRU- und TTL-Verdrängung.
+
+    Optional werden die Einträge zusätzlich in einer SQLite-Datenbank abgelegt,
+    sodass sie einen Neustart der App überdauern. Abgelaufene Zeilen werden beim Lesen und
+    zusätzlich höchstens alle purge_interval Sekunden gesammelt gelöscht.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 86400, db_path: str = None,
+                 purge_interval: float = 3600):
+        """
+        Initialisiert den Cache.
+
+        Args:
+            max_size: Maximale Anzahl Einträge im Speicher
+            ttl: Gültigkeitsdauer eines Eintrags in Sekunden (None = unbegrenzt)
+            db_path: Pfad zur SQLite-Datenbank für die persistente Ablage (None = nur Speicher)
+            purge_interval: Mindestabstand zwischen zwei Löschläufen in der SQLite-Ablage in Sekunden
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS klassifikationen ("
+                "schluessel TEXT PRIMARY KEY, kategorie TEXT, konfidenz INTEGER, erstellt REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS klassifikationen_erstellt ON klassifikationen (erstellt)")
+            self._db.commit()
+            self.purge_expired()
+
+    def get(self, key: str):
+        """
+        Sucht ein Ergebnis im Cache.
+
+        Args:
+            key: Schlüssel aus make_cache_key()
+
+        Returns:
+            Tuple aus (Kategorie, Konfidenz) oder None bei einem Fehlschlag
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[2], now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT kategorie, konfidenz, erstellt FROM klassifikationen WHERE schluessel = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[2], now):
+                    self._store(key, row)
+                    self.hits += 1
+                    return row[0], row[1]
+                if row is not None:
+                    self._db.execute("DELETE FROM klassifikationen WHERE schluessel = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result) -> None:
+        """
+        Legt ein Ergebnis im Cache ab.
+
+        Args:
+            key: Schlüssel aus make_cache_key()
+            result: Tuple aus (Kategorie, Konfidenz)
+        """
+        category, confidence = result
+        entry = (category, confidence, time.time())
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO klassifikationen VALUES (?, ?, ?, ?)",
+                    (key,) + entry
+                )
+                self._db.commit()
+        if self._db is not None and entry[2] - self._last_purge >= self.purge_interval:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """
+        Löscht abgelaufene Einträge aus der SQLite-Ablage.
+
+        Returns:
+            Anzahl gelöschter Zeilen
+        """
+        if self._db is None or self.ttl is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._last_purge = now
+            deleted = self._db.execute("DELETE FROM klassifikationen WHERE erstellt < ?", (now - self.ttl,)).rowcount
+            self._db.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        """
+        Liefert die Treffer- und Fehlschlagzähler.
+
+        Returns:
+            Dictionary mit treffer, fehlschlaege, trefferquote und groesse
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "treffer": self.hits,
+                "fehlschlaege": self.misses,
+                "trefferquote": self.hits / total if total else 0.0,
+                "groesse": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """
+        Leert den Cache einschließlich der SQLite-Ablage.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM klassifikationen")
+                self._db.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _store(self, key, entry):
+        self._entries[key] = tuple(entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,157 @@
+import os
+
+import requests
+
+from cascade import ClassificationCascade, parse_cascade_spec
+from keyword_matcher import KeywordMatcher
+
+try:
+    from local_classifier import LocalClassifier, load_training_data
+except ImportError:  # NumPy nicht installiert: lokaler Klassifikator steht nicht zur Verfügung
+    LocalClassifier = None
+
+# Kategorien-Definitionen
+CATEGORIES = {
+    "KFZ-Zulassung": {
+        "keywords": ["auto", "fahrzeug", "kfz", "pkw", "zulassung", "anmeldung", "ummeldung",
+                     "kennzeichen", "wunschkennzeichen", "abmeldung", "tüv", "hu", "hauptuntersuchung"],
+        "description": "Anfragen zu Fahrzeugzulassungen, Ummeldungen und Kennzeichen"
+    },
+    "Gewerbeanmeldung": {
+        "keywords": ["gewerbe", "gewerbeschein", "kleingewerbe", "freiberufler", "handelsregister",
+                     "einzelunternehmen", "gmbh", "firma", "selbständig", "gewerbesteuer", "gewerbeamt"],
+        "description": "Anfragen zu Gewerbeanmeldungen und geschäftlichen Tätigkeiten"
+    },
+    "Hundesteuer": {
+        "keywords": ["hund", "hundesteuer", "hundemarke", "welpe", "haustier", "vierbeiner",
+                     "kampfhund", "listenhund", "hundehalter", "hundeanmeldung"],
+        "description": "Anfragen zur Anmeldung von Hunden und Hundesteuer"
+    },
+    "Nicht zuordenbar": {
+        "keywords": [],
+        "description": "Anfragen, die keiner der vordefinierten Kategorien zugeordnet werden können"
+    }
+}
+
+# Konfidenz-Schwellenwert für die Kategorisierung
+CONFIDENCE_THRESHOLD = 50
+
+# Hauptkategorien für Schlüsselwörter und Prompts (ohne "Nicht zuordbar")
+MAIN_CATEGORIES = {k: v for k, v in CATEGORIES.items() if k != "Nicht zuordbar"}
+
+
+def keyword_classifier(mode: str = "substring"):
+    """
+    Kompiliert die Schlüsselwort-Tabelle einmalig und liefert die Klassifikationsfunktion.
+
+    Args:
+        mode: Matching-Modus "substring", "wort" (ganze Wörter) oder "stamm"
+
+    Returns:
+        Funktion text -> (Kategorie, Konfidenz)
+    """
+    matcher = KeywordMatcher({k: v["keywords"] for k, v in MAIN_CATEGORIES.items()}, mode=mode)
+
+    def keyword_based_classification(text):
+        """
+        Fallback-Klassifikation basierend auf Schlüsselwörtern.
+
+        Args:
+            text: Der zu klassifizierende Text
+
+        Returns:
+            Tuple aus (Kategorie, Konfidenz)
+        """
+        # Alle Hauptkategorien in einem Durchlauf über den Text bewerten
+        scores = matcher.scores(text)
+
+        # Finde die Kategorie mit dem höchsten Score
+        if scores:
+            best_category = max(scores, key=scores.get)
+            max_score = scores[best_category]
+
+            if max_score > 0:
+                # Berechne Konfidenz basierend auf gefundenen Keywords
+                confidence = min(100, max_score * 20)  # 20% pro gefundenem Keyword
+
+                # Prüfe ob Konfidenz über dem Schwellenwert liegt
+                if confidence >= CONFIDENCE_THRESHOLD:
+                    return best_category, confidence
+
+        # Wenn nichts gefunden wurde oder Konfidenz zu niedrig
+        return "Nicht zuordbar", 30
+
+    return keyword_based_classification
+
+
+def load_local_model(model_path: str = None, training_csv: str = None):
+    """
+    Lädt das lokale Modell oder trainiert es aus einer CSV-Datei, falls keins gespeichert ist.
+
+    Args:
+        model_path: Pfad zur gespeicherten Modelldatei (.npz)
+        training_csv: CSV-Datei mit Trainingsdaten, falls die Modelldatei fehlt
+
+    Returns:
+        Der lokale Klassifikator oder None, wenn keiner verfügbar ist
+    """
+    if LocalClassifier is None:
+        return None
+    if model_path and os.path.exists(model_path):
+        return LocalClassifier.load(model_path)
+    if training_csv and os.path.exists(training_csv):
+        return LocalClassifier().fit(*load_training_data(training_csv))
+    return None
+
+
+def ollama_classifier(client, model: str, prompts, parser, **params):
+    """
+    Einfache Ollama-Klassifikation ohne Cache, Schutzschalter und Bündelung der Web-App,
+    z.B. für Offline-Auswertungen und Benchmarks.
+
+    Args:
+        client: Der OllamaClient
+        model: Name des Ollama-Modells
+        prompts: ClassificationPrompts für das gewünschte Antwortformat
+        parser: ClassificationParser mit denselben Kategorien
+        **params: Weitere Felder für den Request-Body (z.B. options, keep_alive)
+
+    Returns:
+        Funktion text -> (Kategorie, Konfidenz) oder None, wenn Ollama kein verwertbares Ergebnis liefert
+    """
+    if prompts.response_format is not None:
+        params["format"] = prompts.response_format
+
+    def classify_with_ollama(text):
+        try:
+            response = client.generate(model, prompts.single(text), **params)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Ollama-Fehler: {str(e)}")
+            return None
+        classification, _ = parser.parse(response.json().get("response", "").strip())
+        return classification
+
+    return classify_with_ollama
+
+
+def build_cascade(spec: str, tiers: dict) -> ClassificationCascade:
+    """
+    Baut die Klassifikations-Kaskade aus einer Konfiguration wie "keyword:80,local:80,ollama".
+
+    Args:
+        spec: Die Kaskaden-Konfiguration
+        tiers: Dictionary Name -> (Einzelklassifikation, Batch-Klassifikation, im Batch parallel aufrufen,
+            Ersatzklassifikation ohne Ergebnis der Stufe)
+
+    Returns:
+        Die konfigurierte ClassificationCascade
+    """
+    cascade = ClassificationCascade(min_confidence=CONFIDENCE_THRESHOLD)
+    for name, threshold in parse_cascade_spec(spec, min_threshold=CONFIDENCE_THRESHOLD):
+        if name not in tiers:
+            raise ValueError(f"Unbekannte Stufe in KI_WEB_CASCADE: {name}")
+        classify_one, classify_many, parallel, fallback = tiers[name]
+        cascade.add_tier(name, classify_one, threshold, classify_batch=classify_many, parallel=parallel,
+                         fallback=fallback)
+    return cascade
@@ -0,0 +1,109 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import queue
+import threading
+import time
+
+
+class RequestCoalescer:
+    """
+    Fasst gleichzeitig eintreffende Einzelaufrufe zu Batches zusammen.
+
+    Ein Verteiler-Thread wartet auf den ersten Auftrag und sammelt danach höchstens max_wait
+    Sekunden (oder bis max_batch_size erreicht ist) weitere Aufträge. Der Batch wird an
+    process_batch übergeben; bis zu max_concurrent_batches Batches laufen gleichzeitig, sodass
+    neue Aufträge gesammelt werden, während ältere Batches noch verarbeitet werden.
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = 8, max_wait: float = 0.005,
+                 max_concurrent_batches: int = 4, on_batch=None):
+        """
+        Startet den Verteiler-Thread.
+
+        Args:
+            process_batch: Funktion Liste von Aufträgen -> Liste von Ergebnissen (gleiche Reihenfolge)
+            max_batch_size: Maximale Anzahl Aufträge pro Batch
+            max_wait: Maximale Wartezeit auf weitere Aufträge in Sekunden
+            max_concurrent_batches: Anzahl gleichzeitig verarbeiteter Batches
+            on_batch: Optionaler Callback mit der Batch-Größe (z.B. für Metriken)
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches,
+                                            thread_name_prefix="batch-ollama")
+        self._slots = threading.BoundedSemaphore(max_concurrent_batches)
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True, name="buendelung")
+        self._dispatcher.start()
+
+    def submit(self, item, timeout: float = None):
+        """
+        Reiht einen Auftrag ein und wartet auf sein Ergebnis.
+
+        Args:
+            item: Der Auftrag (z.B. der zu klassifizierende Text)
+            timeout: Maximale Wartezeit in Sekunden (None = unbegrenzt)
+
+        Returns:
+            Das Ergebnis des Auftrags
+
+        Raises:
+            concurrent.futures.TimeoutError: wenn das Ergebnis nicht rechtzeitig vorliegt
+        """
+        if self._closed:
+            raise RuntimeError("Bündelung ist bereits beendet")
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=timeout)
+
+    def close(self) -> None:
+        """
+        Beendet den Verteiler; bereits eingereihte Aufträge werden noch verarbeitet.
+        """
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            # Höchstens max_concurrent_batches Batches gleichzeitig; währenddessen sammelt die Queue weiter
+            self._slots.acquire()
+            self._executor.submit(self._run_batch, batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        try:
+            if self.on_batch is not None:
+                self.on_batch(len(batch))
+            results = self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{len(results)} Ergebnisse für {len(batch)} Aufträge")
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
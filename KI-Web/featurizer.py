@@ -0,0 +1,274 @@
+from itertools import chain
+import os
+
+import numpy as np
+
+from text_preprocessing import preprocess
+
+# Dateiendungen der gespeicherten Vokabular- und IDF-Arrays (einzeln per np.load(mmap_mode="r") ladbar)
+VOCABULARY_SUFFIX = ".vokabular.npy"
+IDF_SUFFIX = ".idf.npy"
+
+
+class CSRMatrix:
+    """
+    Dünn besetzte Matrix im CSR-Format (Compressed Sparse Row).
+
+    Zeile i besteht aus den Spalten indices[indptr[i]:indptr[i + 1]] mit den Werten
+    data[indptr[i]:indptr[i + 1]]. Enthält nur die Operationen, die die lokalen Klassifikatoren
+    benötigen; alle laufen vektorisiert über die besetzten Einträge.
+    """
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = tuple(shape)
+        self._rows = None
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """
+        Zeilennummer jedes besetzten Eintrags.
+        """
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return self._rows
+
+    def __getitem__(self, rows) -> "CSRMatrix":
+        # Auswahl von Zeilen über ein Index-Array (z.B. ein Mini-Batch)
+        rows = np.asarray(rows)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=self.indptr.dtype)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return CSRMatrix(self.data[positions], self.indices[positions], indptr, (len(rows), self.shape[1]))
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """
+        Produkt mit einer dichten Matrix (Spalten, k).
+
+        Returns:
+            Dichte Matrix (Zeilen, k)
+        """
+        contributions = self.data[:, None] * dense[self.indices]
+        return np.stack([np.bincount(self.rows, weights=contributions[:, j], minlength=self.shape[0])
+                         for j in range(dense.shape[1])], axis=1)
+
+    __matmul__ = dot
+
+    def transpose_dot(self, dense: np.ndarray) -> np.ndarray:
+        """
+        Produkt der transponierten Matrix mit einer dichten Matrix (Zeilen, k).
+
+        Returns:
+            Dichte Matrix (Spalten, k)
+        """
+        contributions = self.data[:, None] * dense[self.rows]
+        return np.stack([np.bincount(self.indices, weights=contributions[:, j], minlength=self.shape[1])
+                         for j in range(dense.shape[1])], axis=1)
+
+    def sum_by_group(self, groups: np.ndarray, num_groups: int) -> np.ndarray:
+        """
+        Summiert die Zeilen je Gruppe (z.B. Termhäufigkeiten je Klasse).
+
+        Args:
+            groups: Gruppennummer jeder Zeile (0 bis num_groups - 1)
+            num_groups: Anzahl der Gruppen
+
+        Returns:
+            Dichte Matrix (Gruppen, Spalten)
+        """
+        keys = groups[self.rows] * self.shape[1] + self.indices
+        sums = np.bincount(keys, weights=self.data, minlength=num_groups * self.shape[1])
+        return sums.reshape(num_groups, self.shape[1])
+
+    def normalize(self) -> "CSRMatrix":
+        """
+        Skaliert jede Zeile auf euklidische Länge 1 (leere Zeilen bleiben leer).
+        """
+        norms = np.sqrt(np.bincount(self.rows, weights=self.data ** 2, minlength=self.shape[0]))
+        norms[norms == 0] = 1
+        normalized = CSRMatrix(self.data / norms[self.rows], self.indices, self.indptr, self.shape)
+        normalized._rows = self._rows
+        return normalized
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros(self.shape)
+        np.add.at(dense, (self.rows, self.indices), self.data)
+        return dense
+
+
+class TfidfFeaturizer:
+    """
+    Dokumentvektoren wie die KNIME-Knotenkette Bag Of Words Creator -> TF (-> IDF) -> Document Vector.
+
+    Das Vokabular ist ein sortiertes String-Array; Terme werden per binärer Suche (np.searchsorted)
+    für alle Dokumente eines Batches gleichzeitig ihren Spalten zugeordnet. Vokabular und IDF-Gewichte
+    werden als .npy-Dateien gespeichert und beim Laden nur eingeblendet (Memory-Mapping), sodass
+    ein Modell auch mit großem Vokabular in Millisekunden bereitsteht.
+    """
+
+    def __init__(self, relative: bool = False, idf: bool = False):
+        """
+        Args:
+            relative: Relative statt absoluter Termhäufigkeit (KNIME TF-Knoten, Option "Relative")
+            idf: Termhäufigkeiten mit der inversen Dokumenthäufigkeit gewichten
+        """
+        self.relative = relative
+        self.idf = idf
+        self.terms = np.array([], dtype=str)
+        self.idf_weights = np.array([])
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def settings(self) -> dict:
+        """
+        Einstellungen für die Modell-Metadaten (Vokabular und IDF speichert save()).
+        """
+        return {"relative": self.relative, "idf": self.idf}
+
+    def fit(self, texts) -> "TfidfFeaturizer":
+        """
+        Baut Vokabular und IDF-Gewichte aus Trainingstexten auf.
+
+        Args:
+            texts: Liste der Trainingstexte
+
+        Returns:
+            Der Featurizer
+        """
+        self.fit_transform(texts)
+        return self
+
+    def fit_transform(self, texts) -> CSRMatrix:
+        """
+        Baut Vokabular und IDF-Gewichte auf und liefert die Dokumentvektoren der Trainingstexte.
+
+        Args:
+            texts: Liste der Trainingstexte
+
+        Returns:
+            CSR-Matrix (Texte, Vokabular)
+        """
+        documents = [preprocess(text) for text in texts]
+        lengths, tokens = self._flatten(documents)
+        self.terms, columns = np.unique(tokens, return_inverse=True)
+        counts = self._count(lengths, columns.reshape(-1), np.ones(len(tokens), dtype=bool))
+
+        # Variante "Smooth" des KNIME-IDF-Knotens: log10(1 + Dokumente / Dokumenthäufigkeit)
+        document_frequency = np.bincount(counts.indices, minlength=len(self.terms))
+        self.idf_weights = np.log10(1 + len(documents) / np.maximum(document_frequency, 1))
+        return self._weight(counts, lengths)
+
+    def transform(self, texts) -> CSRMatrix:
+        """
+        Berechnet die Dokumentvektoren eines Batches; unbekannte Terme werden ignoriert.
+
+        Args:
+            texts: Liste der Texte
+
+        Returns:
+            CSR-Matrix (Texte, Vokabular)
+        """
+        return self._transform_tokens(*self._flatten([preprocess(text) for text in texts]))
+
+    def partial_fit_transform(self, texts):
+        """
+        Erweitert das Vokabular um die unbekannten Terme der Texte und liefert ihre Dokumentvektoren.
+
+        Neue Terme werden an ihrer sortierten Position eingefügt; die IDF-Gewichte der bekannten Terme
+        bleiben unverändert, neue Terme erhalten das Gewicht des seltensten bekannten Terms.
+
+        Args:
+            texts: Liste der Texte
+
+        Returns:
+            Tuple aus (CSR-Matrix (Texte, erweitertes Vokabular), Einfügepositionen der neuen Terme
+            bezogen auf das bisherige Vokabular, passend für np.insert)
+        """
+        lengths, tokens = self._flatten([preprocess(text) for text in texts])
+        new_terms = np.setdiff1d(tokens, self.terms)
+        positions = np.searchsorted(self.terms, new_terms)
+        if len(new_terms):
+            rarest = self.idf_weights.max() if len(self.idf_weights) else np.log10(2)
+            self.terms = np.insert(self.terms.astype(np.result_type(self.terms, new_terms)), positions, new_terms)
+            self.idf_weights = np.insert(self.idf_weights, positions, rarest)
+        return self._transform_tokens(lengths, tokens), positions
+
+    def _transform_tokens(self, lengths, tokens) -> CSRMatrix:
+        if len(self.terms) == 0 or len(tokens) == 0:
+            known = np.zeros(len(tokens), dtype=bool)
+            columns = np.zeros(len(tokens), dtype=np.intp)
+        else:
+            columns = np.minimum(np.searchsorted(self.terms, tokens), len(self.terms) - 1)
+            known = self.terms[columns] == tokens
+        return self._weight(self._count(lengths, columns, known), lengths)
+
+    def save(self, prefix: str) -> None:
+        """
+        Speichert Vokabular und IDF-Gewichte als <prefix>.vokabular.npy und <prefix>.idf.npy.
+
+        Die Dateien werden unter einem temporären Namen geschrieben und dann ersetzt, damit
+        Prozesse, die die bisherigen Dateien eingeblendet haben, unverändert weiterlesen.
+
+        Args:
+            prefix: Pfad ohne Dateiendung
+        """
+        for suffix, array in ((VOCABULARY_SUFFIX, self.terms), (IDF_SUFFIX, self.idf_weights)):
+            temporary = prefix + suffix + ".tmp"
+            with open(temporary, "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(temporary, prefix + suffix)
+
+    @classmethod
+    def load(cls, prefix: str, relative: bool = False, idf: bool = False, mmap: bool = True) -> "TfidfFeaturizer":
+        """
+        Lädt einen mit save() gespeicherten Featurizer.
+
+        Args:
+            prefix: Pfad ohne Dateiendung
+            relative: Einstellung aus settings()
+            idf: Einstellung aus settings()
+            mmap: Arrays einblenden statt vollständig einzulesen
+
+        Returns:
+            Der Featurizer
+        """
+        featurizer = cls(relative, idf)
+        mode = "r" if mmap else None
+        featurizer.terms = np.load(prefix + VOCABULARY_SUFFIX, mmap_mode=mode, allow_pickle=False)
+        featurizer.idf_weights = np.load(prefix + IDF_SUFFIX, mmap_mode=mode, allow_pickle=False)
+        return featurizer
+
+    @staticmethod
+    def _flatten(documents):
+        lengths = np.fromiter((len(tokens) for tokens in documents), dtype=np.int64, count=len(documents))
+        tokens = np.array(list(chain.from_iterable(documents)), dtype=str)
+        return lengths, tokens
+
+    def _count(self, lengths, columns, known) -> CSRMatrix:
+        # Absolute Termhäufigkeiten: (Zeile, Spalte)-Paare zählen, sortiert nach Zeile und Spalte
+        num_rows, num_columns = len(lengths), max(len(self.terms), 1)
+        rows = np.repeat(np.arange(num_rows), lengths)[known]
+        keys, counts = np.unique(rows * num_columns + columns[known], return_counts=True)
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // num_columns, minlength=num_rows), out=indptr[1:])
+        return CSRMatrix(counts.astype(float), keys % num_columns, indptr, (num_rows, len(self.terms)))
+
+    def _weight(self, counts: CSRMatrix, lengths) -> CSRMatrix:
+        data = counts.data
+        if self.relative:
+            # Relativ zur Anzahl aller Terme des Dokuments (auch der unbekannten), wie KNIME "TF rel"
+            data = data / lengths[counts.rows]
+        if self.idf:
+            data = data * self.idf_weights[counts.indices]
+        weighted = CSRMatrix(data, counts.indices, counts.indptr, counts.shape)
+        weighted._rows = counts._rows
+        return weighted
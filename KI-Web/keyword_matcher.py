@@ -0,0 +1,141 @@
+import re
+
+from text_preprocessing import stem, tokenize
+
+# Matching-Modi
+MODE_SUBSTRING = "substring"  # wie bisher: Schlüsselwort irgendwo im Text
+MODE_WORD = "wort"            # nur ganze Wörter
+MODE_STEM = "stamm"           # ganze Wörter nach Snowball-Stemming
+MODES = (MODE_SUBSTRING, MODE_WORD, MODE_STEM)
+
+# Bis zu dieser Tabellengröße ist im Substring-Modus die direkte Suche je Schlüsselwort
+# schneller als der kombinierte Ausdruck (siehe KI-Web-Test/benchmark_keyword_matcher.py)
+SMALL_TABLE_LIMIT = 300
+
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return trie
+
+
+def _trie_to_regex(node) -> str:
+    # Erzeugt aus dem Präfixbaum eine Alternation, in der gemeinsame Präfixe nur einmal vorkommen
+    is_end = "" in node
+    branches = [re.escape(char) + _trie_to_regex(child)
+                for char, child in sorted(node.items()) if char != ""]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    group = "(?:" + "|".join(branches) + ")"
+    return group + "?" if is_end else group
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    Bewertet alle Kategorien in einem einzigen Durchlauf über den Text.
+
+    Die Schlüsselwörter werden einmalig zu einem regulären Ausdruck in Form eines Präfixbaums
+    kompiliert. Der Ausdruck steht in einem Lookahead, sodass an jeder Textposition das längste
+    passende Schlüsselwort gefunden wird. Kürzere Schlüsselwörter an derselben Position (z.B.
+    "hund" in "hundesteuer") werden über eine vorberechnete Präfixtabelle mitgezählt.
+
+    Kleine Tabellen werden im Substring-Modus direkt durchsucht, weil das dort schneller ist.
+    """
+
+    def __init__(self, categories: dict, mode: str = MODE_SUBSTRING):
+        """
+        Kompiliert die Schlüsselwort-Tabelle.
+
+        Args:
+            categories: Dictionary Kategorie -> Liste von Schlüsselwörtern
+            mode: "substring", "wort" oder "stamm"
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unbekannter Matching-Modus: {mode}")
+        self.mode = mode
+        self.categories = list(categories)
+
+        # Schlüsselwort (normalisiert) -> Kategorien, in denen es vorkommt
+        self._keyword_categories = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                key = self._normalize_keyword(keyword)
+                if key:
+                    self._keyword_categories.setdefault(key, []).append(category)
+
+        # Für jedes Schlüsselwort alle Schlüsselwörter, die ein Präfix davon sind (inkl. sich selbst)
+        self._prefixes = {}
+        for keyword in self._keyword_categories:
+            self._prefixes[keyword] = [keyword[:i] for i in range(1, len(keyword) + 1)
+                                       if keyword[:i] in self._keyword_categories]
+
+        # Kleine Tabelle: vorberechnete Liste (Schlüsselwort, Kategorien) statt Ausdruck
+        self._small_table = None
+        if mode == MODE_SUBSTRING and len(self._keyword_categories) <= SMALL_TABLE_LIMIT:
+            self._small_table = list(self._keyword_categories.items())
+
+        trie_regex = _trie_to_regex(_build_trie(self._keyword_categories))
+        if not trie_regex:
+            self._pattern = None
+        elif mode == MODE_SUBSTRING:
+            self._pattern = re.compile(f"(?=({trie_regex}))")
+        else:
+            self._pattern = re.compile(f"\\b(?=({trie_regex}))")
+
+    def scores(self, text: str) -> dict:
+        """
+        Zählt pro Kategorie die verschiedenen Schlüsselwörter, die im Text vorkommen.
+
+        Args:
+            text: Der zu bewertende Text
+
+        Returns:
+            Dictionary Kategorie -> Anzahl gefundener Schlüsselwörter (alle Kategorien, gleiche Reihenfolge)
+        """
+        scores = dict.fromkeys(self.categories, 0)
+        if self._pattern is None:
+            return scores
+
+        text = self._normalize_text(text)
+        if self._small_table is not None:
+            for keyword, categories in self._small_table:
+                if keyword in text:
+                    for category in categories:
+                        scores[category] += 1
+            return scores
+
+        check_boundary = self.mode != MODE_SUBSTRING
+        found = set()
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for keyword in self._prefixes[match.group(1)]:
+                if check_boundary:
+                    end = start + len(keyword)
+                    if end < len(text) and _is_word_char(text[end]):
+                        continue
+                found.add(keyword)
+
+        for keyword in found:
+            for category in self._keyword_categories[keyword]:
+                scores[category] += 1
+        return scores
+
+    def _normalize_keyword(self, keyword: str) -> str:
+        if self.mode == MODE_STEM:
+            return " ".join(stem(token) for token in tokenize(keyword))
+        return keyword.lower()
+
+    def _normalize_text(self, text: str) -> str:
+        if self.mode == MODE_STEM:
+            return " ".join(stem(token) for token in tokenize(text))
+        return text.lower()
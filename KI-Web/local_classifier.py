@@ -0,0 +1,332 @@
+import argparse
+import copy
+import csv
+import json
+import os
+
+import numpy as np
+
+from featurizer import TfidfFeaturizer
+
+# Unterstützte Verfahren (entsprechend den KNIME-Workflows)
+ALGORITHMS = ("nb", "svm")
+
+
+class LocalClassifier:
+    """
+    In-Process-Klassifikator nach dem Vorbild der KNIME-Workflows.
+
+    Die Texte durchlaufen dieselbe Vorverarbeitung (Satzzeichen entfernen, Kleinschreibung,
+    Stoppwortfilter, Snowball-Stemming), werden vom TfidfFeaturizer als dünn besetzte
+    Termfrequenz-Vektoren dargestellt und mit Multinomial Naive Bayes oder einer linearen SVM
+    klassifiziert.
+    """
+
+    def __init__(self, algorithm: str = "nb", alpha: float = 1.0,
+                 epochs: int = 50, regularization: float = 1e-3, idf: bool = False):
+        """
+        Initialisiert den Klassifikator.
+
+        Args:
+            algorithm: "nb" (Multinomial Naive Bayes) oder "svm" (lineare SVM, One-vs-Rest)
+            alpha: Laplace-Glättung für Naive Bayes
+            epochs: Anzahl der Trainingsdurchläufe für die SVM
+            regularization: L2-Regularisierung der SVM
+            idf: Termfrequenzen zusätzlich mit der inversen Dokumenthäufigkeit gewichten
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unbekanntes Verfahren: {algorithm}")
+        self.algorithm = algorithm
+        self.alpha = alpha
+        self.epochs = epochs
+        self.regularization = regularization
+        self.idf = idf
+        self.featurizer = TfidfFeaturizer(idf=idf)
+        self.classes = []
+        self.weights = None  # (Vokabular, Klassen)
+        self.bias = None     # (Klassen,)
+        # Trainingszustand für partial_fit(): Zählstände (Naive Bayes) bzw. bisherige Schritte (SVM)
+        self.term_counts = None   # (Klassen, Vokabular)
+        self.class_counts = None  # (Klassen,)
+        self.steps = 0
+
+    def fit(self, texts, labels) -> "LocalClassifier":
+        """
+        Trainiert den Klassifikator.
+
+        Args:
+            texts: Liste der Trainingstexte
+            labels: Liste der zugehörigen Kategorien
+
+        Returns:
+            Der trainierte Klassifikator
+        """
+        self.featurizer = TfidfFeaturizer(idf=self.idf)
+        X = self.featurizer.fit_transform(texts)
+        self.classes, y = np.unique(np.array(labels, dtype=str), return_inverse=True)
+        self.classes = self.classes.tolist()
+
+        if self.algorithm == "nb":
+            self._fit_naive_bayes(X, y)
+        else:
+            self._fit_svm(X, y)
+        return self
+
+    def partial_fit(self, texts, labels) -> "LocalClassifier":
+        """
+        Aktualisiert ein trainiertes Modell mit weiteren Anfragen, ohne die bisherigen Trainingsdaten.
+
+        Unbekannte Terme erweitern das Vokabular, unbekannte Kategorien die Klassen. Bei Naive Bayes
+        werden nur die Zählstände erhöht (das Ergebnis entspricht einem Training auf allen Anfragen),
+        bei der SVM läuft ein weiterer Durchlauf des stochastischen Gradientenverfahrens.
+
+        Args:
+            texts: Liste der neuen Texte
+            labels: Liste der zugehörigen Kategorien
+
+        Returns:
+            Der aktualisierte Klassifikator
+        """
+        if self.weights is None:
+            return self.fit(texts, labels)
+        resumable = self.term_counts is not None if self.algorithm == "nb" else self.steps > 0
+        if not resumable:
+            raise ValueError("Das Modell enthält keinen Trainingszustand (älteres Format) und muss neu trainiert werden")
+
+        X, new_terms = self.featurizer.partial_fit_transform(texts)
+        if len(new_terms):
+            self.weights = np.insert(self.weights, new_terms, 0.0, axis=0)
+            if self.term_counts is not None:
+                self.term_counts = np.insert(self.term_counts, new_terms, 0.0, axis=1)
+        for label in sorted(set(labels) - set(self.classes)):
+            self.classes.append(label)
+            self.weights = np.hstack([self.weights, np.zeros((self.weights.shape[0], 1))])
+            self.bias = np.append(self.bias, 0.0)
+            if self.term_counts is not None:
+                self.term_counts = np.vstack([self.term_counts, np.zeros((1, self.term_counts.shape[1]))])
+                self.class_counts = np.append(self.class_counts, 0)
+
+        index = {label: i for i, label in enumerate(self.classes)}
+        y = np.array([index[label] for label in labels], dtype=np.intp)
+        if self.algorithm == "nb":
+            self.term_counts += X.sum_by_group(y, len(self.classes))
+            self.class_counts += np.bincount(y, minlength=len(self.classes))
+            self._update_naive_bayes()
+        else:
+            self._svm_epochs(X, y, 1, np.random.default_rng(self.steps))
+        return self
+
+    def copy(self) -> "LocalClassifier":
+        """
+        Unabhängige Kopie, die per partial_fit() verändert werden kann, während das Original
+        weiter klassifiziert.
+        """
+        clone = copy.copy(self)
+        clone.featurizer = copy.copy(self.featurizer)
+        clone.classes = list(self.classes)
+        for name in ("weights", "bias", "term_counts", "class_counts"):
+            value = getattr(self, name)
+            setattr(clone, name, None if value is None else np.array(value))
+        return clone
+
+    def predict(self, text: str):
+        """
+        Klassifiziert einen einzelnen Text.
+
+        Args:
+            text: Der zu klassifizierende Text
+
+        Returns:
+            Tuple aus (Kategorie, Konfidenz in Prozent)
+        """
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts):
+        """
+        Klassifiziert mehrere Texte in einem vektorisierten Durchlauf.
+
+        Args:
+            texts: Liste der zu klassifizierenden Texte
+
+        Returns:
+            Liste von Tupeln aus (Kategorie, Konfidenz in Prozent)
+        """
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[i], int(round(probabilities[row, i] * 100)))
+                for row, i in enumerate(best)]
+
+    def predict_proba(self, texts) -> np.ndarray:
+        """
+        Berechnet die Klassenwahrscheinlichkeiten.
+
+        Args:
+            texts: Liste der Texte
+
+        Returns:
+            Matrix (Texte, Klassen) mit Wahrscheinlichkeiten
+        """
+        X = self.featurizer.transform(texts)
+        if self.algorithm == "svm":
+            X = X.normalize()
+        scores = X @ self.weights + self.bias
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def save(self, path: str) -> None:
+        """
+        Speichert das Modell als .npz-Datei; Vokabular und IDF-Gewichte liegen daneben als
+        .npy-Dateien (siehe TfidfFeaturizer.save()), damit sie beim Laden eingeblendet werden können.
+        Jede Datei wird erst vollständig geschrieben und dann umbenannt, sodass ein laufender Prozess
+        nie eine halb geschriebene Datei liest.
+
+        Args:
+            path: Zielpfad
+        """
+        meta = {
+            "algorithm": self.algorithm,
+            "alpha": self.alpha,
+            "epochs": self.epochs,
+            "regularization": self.regularization,
+            "classes": self.classes,
+            "featurizer": self.featurizer.settings(),
+            "steps": self.steps,
+        }
+        arrays = {"weights": self.weights, "bias": self.bias}
+        if self.term_counts is not None:
+            arrays.update(term_counts=self.term_counts, class_counts=self.class_counts)
+        # Vokabular zuerst: load() prüft, ob es zu den Gewichten passt
+        self.featurizer.save(_featurizer_prefix(path))
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        """
+        Lädt ein mit save() gespeichertes Modell.
+
+        Args:
+            path: Pfad zur .npz-Datei
+
+        Returns:
+            Der geladene Klassifikator
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            weights = data["weights"]
+            bias = data["bias"]
+            counts = {name: data[name] for name in ("term_counts", "class_counts") if name in data.files}
+        settings = meta.get("featurizer", {})
+        model = cls(meta["algorithm"], meta["alpha"], meta["epochs"], meta["regularization"],
+                    idf=settings.get("idf", False))
+        model.classes = meta["classes"]
+        model.bias = bias
+        model.steps = meta.get("steps", 0)
+        model.term_counts = counts.get("term_counts")
+        model.class_counts = counts.get("class_counts")
+        if "vocabulary" in meta:
+            # Älteres Format: Vokabular als Dictionary Term -> Zeile in den Metadaten
+            terms = sorted(meta["vocabulary"], key=meta["vocabulary"].get)
+            order = np.argsort(np.array(terms, dtype=str))
+            model.featurizer.terms = np.array(terms, dtype=str)[order]
+            model.featurizer.idf_weights = np.ones(len(terms))
+            model.weights = weights[order]
+        else:
+            model.featurizer = TfidfFeaturizer.load(_featurizer_prefix(path), **settings)
+            model.weights = weights
+        if len(model.featurizer) != model.weights.shape[0]:
+            raise ValueError(f"Vokabular ({len(model.featurizer)} Terme) passt nicht zum Modell "
+                             f"({model.weights.shape[0]} Zeilen): {path}")
+        return model
+
+    def _fit_naive_bayes(self, X, y):
+        self.term_counts = X.sum_by_group(y, len(self.classes))
+        self.class_counts = np.bincount(y, minlength=len(self.classes))
+        self._update_naive_bayes()
+
+    def _update_naive_bayes(self):
+        smoothed = self.term_counts + self.alpha
+        self.weights = np.log(smoothed / smoothed.sum(axis=1, keepdims=True)).T
+        self.bias = np.log(self.class_counts / self.class_counts.sum())
+
+    def _fit_svm(self, X, y):
+        self.weights = np.zeros((X.shape[1], len(self.classes)))
+        self.bias = np.zeros(len(self.classes))
+        self.steps = 0
+        self._svm_epochs(X, y, self.epochs, np.random.default_rng(0))
+
+    def _svm_epochs(self, X, y, epochs, rng, batch_size=32):
+        # Lineare SVM (One-vs-Rest) mit Hinge-Loss, trainiert per Mini-Batch-Pegasos.
+        # Der Bias wird wie ein konstantes Zusatzmerkmal mitgelernt (und mitregularisiert).
+        # Die Schrittweite sinkt über alle bisherigen Schritte, auch über partial_fit() hinweg.
+        X = X.normalize()
+        n = X.shape[0]
+        Y = np.where(y[:, None] == np.arange(len(self.classes)), 1.0, -1.0)
+        W = self.weights
+        b = self.bias
+        step = self.steps
+        for _ in range(epochs):
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                batch = order[start:start + batch_size]
+                X_batch = X[batch]
+                step += 1
+                eta = 1.0 / (self.regularization * step)
+                violated = (Y[batch] * (X_batch @ W + b)) < 1
+                gradient = Y[batch] * violated
+                W *= 1 - eta * self.regularization
+                b *= 1 - eta * self.regularization
+                W += (eta / len(batch)) * X_batch.transpose_dot(gradient)
+                b += (eta / len(batch)) * gradient.sum(axis=0)
+        self.steps = step
+
+
+def _featurizer_prefix(path: str) -> str:
+    # lokales_modell.npz -> lokales_modell.vokabular.npy / lokales_modell.idf.npy
+    return os.path.splitext(path)[0]
+
+
+def load_training_data(csv_path: str):
+    """
+    Liest Trainingsdaten im Format von synthetische_buergeranfragen.csv.
+
+    Args:
+        csv_path: Pfad zur CSV-Datei
+
+    Returns:
+        Tuple aus (Texte, Kategorien)
+    """
+    texts, labels = [], []
+    with open(csv_path, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            texts.append(f"{row['betreff']} {row['nachricht']}")
+            labels.append(row['kategorie'])
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trainiert den lokalen Klassifikator')
+    parser.add_argument('--csv', type=str, default="../KI-Web-Test/synthetische_buergeranfragen.csv",
+                        help='CSV-Datei mit Trainingsdaten')
+    parser.add_argument('--output', type=str, default="lokales_modell.npz", help='Zieldatei für das Modell')
+    parser.add_argument('--algorithmus', type=str, choices=ALGORITHMS, default="nb",
+                        help='nb (Naive Bayes) oder svm (lineare SVM)')
+    parser.add_argument('--idf', action='store_true', help='Termfrequenzen mit der inversen Dokumenthäufigkeit gewichten')
+
+    args = parser.parse_args()
+
+    texts, labels = load_training_data(args.csv)
+    model = LocalClassifier(args.algorithmus, idf=args.idf).fit(texts, labels)
+    model.save(args.output)
+
+    correct = sum(1 for (category, _), label in zip(model.predict_batch(texts), labels) if category == label)
+    print(f"Modell mit {len(texts)} Anfragen und {len(model.featurizer)} Termen trainiert.")
+    print(f"Trainingsgenauigkeit: {correct / len(texts) * 100:.1f}%")
+    print(f"Gespeichert in: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
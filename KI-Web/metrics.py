@@ -0,0 +1,205 @@
+from contextlib import contextmanager
+import threading
+import time
+
+# Standard-Grenzen der Latenz-Histogramme in Sekunden
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Content-Type des Prometheus-Textformats
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Gemeinsame Basis aller Metriken mit festen Label-Namen.
+    """
+
+    type_name = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} erwartet die Labels {self.labelnames}, erhalten: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return "\n".join(lines)
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in items]
+
+
+class Counter(_Metric):
+    """
+    Monoton steigender Zähler.
+    """
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Erhöht den Zähler.
+
+        Args:
+            amount: Betrag der Erhöhung
+            **labels: Werte aller Label-Namen
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Liefert den aktuellen Stand für die angegebenen Labels.
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Momentaner Wert, der steigen und fallen kann (z.B. ein Zustand).
+    """
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Setzt den Wert.
+
+        Args:
+            value: Der neue Wert
+            **labels: Werte aller Label-Namen
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Verteilung von Messwerten (z.B. Latenzen) in kumulativen Klassen.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Erfasst einen Messwert.
+
+        Args:
+            value: Der Messwert (bei Latenzen in Sekunden)
+            **labels: Werte aller Label-Namen
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"klassen": [0] * len(self.buckets), "summe": 0.0, "anzahl": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["klassen"][i] += 1
+                    break
+            state["summe"] += value
+            state["anzahl"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Misst die Dauer des umschlossenen Blocks (auch wenn er mit einer Exception endet).
+
+        Args:
+            **labels: Werte aller Label-Namen
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["klassen"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_number(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(state['summe'])}")
+            lines.append(f"{self.name}_count{labels} {state['anzahl']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Sammlung aller Metriken einer Anwendung, ausgegeben im Prometheus-Textformat.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        """
+        Legt einen Zähler an und registriert ihn.
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        """
+        Legt einen Messwert an und registriert ihn.
+        """
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        """
+        Legt ein Histogramm an und registriert es.
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Gibt alle Metriken im Prometheus-Textformat aus.
+
+        Returns:
+            Der Text für den /metrics-Endpunkt
+        """
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+    def _register(self, metric):
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Metrik {metric.name} ist bereits registriert")
+        self._metrics.append(metric)
+        return metric
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Standardwerte für den Verbindungspool
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+
+class OllamaClient:
+    """
+    Gemeinsamer HTTP-Client für Ollama mit Connection-Pool und Keep-Alive.
+
+    Alle Aufrufe laufen über eine requests.Session, sodass TCP-Verbindungen zum
+    Ollama-Server wiederverwendet statt pro Prompt neu aufgebaut werden.
+
+    Höchstens pool_size Aufrufe laufen gleichzeitig. Das Warten auf einen freien Platz zählt zum
+    Timeout des Aufrufs; urllib3 selbst blockiert nie (pool_block=False), da requests dort keine
+    Wartezeit begrenzen kann.
+    """
+
+    def __init__(self,
+                 base_url: str = "http://localhost:11434",
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initialisiert den Client.
+
+        Args:
+            base_url: URL des Ollama-Servers
+            pool_size: Maximale Anzahl offener Verbindungen (sollte >= Anzahl paralleler Aufrufe sein)
+            timeout: Standard-Timeout pro Aufruf in Sekunden
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    def generate(self, model: str, prompt: str, timeout: float = None, **params) -> requests.Response:
+        """
+        Sendet einen Prompt an /api/generate.
+
+        Args:
+            model: Name des Ollama-Modells
+            prompt: Der Prompt für das Modell
+            timeout: Timeout für diesen Aufruf in Sekunden (Standard: Client-Timeout)
+            **params: Weitere Felder für den Request-Body (z.B. temperature, options)
+
+        Returns:
+            Die HTTP-Antwort von Ollama
+
+        Raises:
+            requests.exceptions.Timeout: auch, wenn innerhalb des Timeouts kein Platz im Pool frei wird
+        """
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        payload.update(params)
+        remaining = self._acquire(timeout if timeout is not None else self.timeout)
+        try:
+            return self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=remaining
+            )
+        finally:
+            self._slots.release()
+
+    def generate_stream(self, model: str, prompt: str, timeout: float = None, **params):
+        """
+        Sendet einen Prompt an /api/generate und liefert die Antwort stückweise, sobald Ollama sie erzeugt.
+
+        Beendet der Aufrufer die Iteration vorzeitig (break bzw. close()), wird die Verbindung
+        geschlossen und Ollama bricht die Generierung ab.
+
+        Args:
+            model: Name des Ollama-Modells
+            prompt: Der Prompt für das Modell
+            timeout: Timeout für Verbindungsaufbau und jedes einzelne Stück in Sekunden
+            **params: Weitere Felder für den Request-Body (z.B. format, options)
+
+        Yields:
+            Die erzeugten Textstücke
+
+        Raises:
+            requests.HTTPError: bei einer Fehlerantwort von Ollama
+            requests.exceptions.Timeout: auch, wenn innerhalb des Timeouts kein Platz im Pool frei wird
+        """
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        payload.update(params)
+        remaining = self._acquire(timeout if timeout is not None else self.timeout)
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=remaining,
+                stream=True
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise requests.HTTPError(chunk["error"], response=response)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+        finally:
+            response.close()
+            self._slots.release()
+
+    def _acquire(self, timeout: float) -> float:
+        # Wartet auf einen freien Platz und liefert die verbleibende Zeit für den eigentlichen Aufruf
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=max(timeout, 0)):
+            raise requests.exceptions.Timeout(f"Keine freie Verbindung zu Ollama nach {timeout:.1f} Sekunden")
+        return max(timeout - (time.monotonic() - start), 0.001)
+
+    def close(self) -> None:
+        """
+        Schließt alle offenen Verbindungen.
+        """
+        self.session.close()
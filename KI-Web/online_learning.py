@@ -0,0 +1,226 @@
+import glob
+import os
+import re
+import threading
+import time
+
+try:
+    from featurizer import IDF_SUFFIX, VOCABULARY_SUFFIX
+    _ARRAY_SUFFIXES = (VOCABULARY_SUFFIX, IDF_SUFFIX)
+except ImportError:  # NumPy nicht installiert: ohne lokales Modell entstehen keine Schnappschüsse
+    _ARRAY_SUFFIXES = ()
+
+# Datei neben dem Basispfad, die die Nummer des aktuellen Schnappschusses enthält
+POINTER_SUFFIX = ".aktuell"
+
+
+def snapshot_file(base_path: str, version: int) -> str:
+    """
+    Pfad eines versionierten Schnappschusses, z.B. lokales_modell.npz -> lokales_modell.v3.npz.
+
+    Args:
+        base_path: Basispfad (KI_WEB_ONLINE_SNAPSHOT)
+        version: Nummer des Schnappschusses
+
+    Returns:
+        Der Pfad des Schnappschusses
+    """
+    root, extension = os.path.splitext(base_path)
+    return f"{root}.v{version}{extension}"
+
+
+def current_snapshot(base_path: str):
+    """
+    Liefert den zuletzt gespeicherten Schnappschuss.
+
+    Args:
+        base_path: Basispfad (KI_WEB_ONLINE_SNAPSHOT)
+
+    Returns:
+        Tuple aus (Pfad, Nummer); ohne Schnappschuss (base_path, 0)
+    """
+    try:
+        with open(base_path + POINTER_SUFFIX, "r", encoding="utf-8") as f:
+            version = int(f.read().strip())
+    except (OSError, ValueError):
+        return base_path, 0
+    path = snapshot_file(base_path, version)
+    if not os.path.exists(path):
+        return base_path, 0
+    return path, version
+
+
+class OnlineLearner:
+    """
+    Lernt aus bestätigten Kategorien, ohne den laufenden Klassifikator anzuhalten.
+
+    Rückmeldungen werden gesammelt und von einem Hintergrund-Thread in Blöcken eingearbeitet:
+    Eine Kopie des aktuellen Modells wird per partial_fit() aktualisiert und danach als Ganzes
+    gegen das bisherige Modell getauscht. Laufende Klassifikationen rechnen mit dem alten Modell
+    zu Ende, neue sehen sofort das neue; ein halb aktualisiertes Modell ist nie sichtbar.
+
+    Jedes neue Modell wird unter einem eigenen, versionierten Dateinamen gespeichert; danach wird
+    nur die Verweisdatei <snapshot_path>.aktuell ersetzt. Dateien, die ein geladenes Modell noch
+    eingeblendet hat, werden so nie überschrieben (unter Windows schlägt das fehl).
+    """
+
+    def __init__(self, model, on_swap=None, snapshot_path: str = None,
+                 batch_size: int = 20, interval: float = 5.0, max_pending: int = 10000):
+        """
+        Startet den Hintergrund-Thread.
+
+        Args:
+            model: Der aktuelle lokale Klassifikator (LocalClassifier)
+            on_swap: Callback mit dem neuen Modell, z.B. um es in der App einzusetzen
+            snapshot_path: Basispfad der Schnappschüsse (None = nicht speichern), siehe current_snapshot()
+            batch_size: Anzahl Rückmeldungen, ab der sofort aktualisiert wird
+            interval: Maximale Wartezeit einer Rückmeldung in Sekunden
+            max_pending: Höchstzahl wartender Rückmeldungen; darüber werden die ältesten verworfen
+        """
+        self.model = model
+        self.on_swap = on_swap
+        self.snapshot_path = snapshot_path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.version = 0
+        self.learned = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_update = None
+        self._snapshot_version = current_snapshot(snapshot_path)[1] if snapshot_path else 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True, name="online-lernen")
+        self._worker.start()
+
+    def add(self, text: str, label: str) -> None:
+        """
+        Nimmt eine bestätigte Kategorie entgegen.
+
+        Args:
+            text: Text der Anfrage (Betreff + Nachricht)
+            label: Die bestätigte Kategorie
+        """
+        with self._lock:
+            self._pending.append((text, label))
+            self._trim_pending()
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    def update(self) -> bool:
+        """
+        Arbeitet alle gesammelten Rückmeldungen ein und tauscht das Modell.
+
+        Das bisherige Modell bleibt im Einsatz, wenn etwas fehlschlägt. Nur bei vorübergehenden
+        Fehlern beim Speichern (OSError) bleiben die Rückmeldungen für den nächsten Versuch erhalten;
+        scheitert das Training selbst (z.B. ValueError bei einem Modell im alten Format), würde es
+        beim nächsten Mal erneut scheitern, und die Rückmeldungen werden verworfen und gezählt.
+
+        Returns:
+            True, wenn ein neues Modell eingesetzt wurde
+        """
+        with self._update_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return False
+            try:
+                texts, labels = zip(*pending)
+                updated = self.model.copy().partial_fit(list(texts), list(labels))
+                if self.snapshot_path:
+                    self._save_snapshot(updated)
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = pending
+                    self._trim_pending()
+                raise
+            except Exception:
+                with self._lock:
+                    self.dropped += len(pending)
+                raise
+            self.model = updated
+            if self.on_swap is not None:
+                self.on_swap(updated)
+            self.version += 1
+            self.learned += len(pending)
+            self.last_update = time.time()
+            return True
+
+    def stats(self) -> dict:
+        """
+        Liefert Zähler für den Statistik-Endpunkt.
+        """
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "version": self.version,
+            "gelernt": self.learned,
+            "ausstehend": pending,
+            "verworfen": self.dropped,
+            "fehler": self.errors,
+            "letzte_aktualisierung": self.last_update,
+            "vokabular": len(self.model.featurizer),
+            "kategorien": list(self.model.classes),
+        }
+
+    def close(self) -> None:
+        """
+        Beendet den Hintergrund-Thread und arbeitet verbliebene Rückmeldungen noch ein.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wakeup.set()
+        self._worker.join()
+        self._update_safely()
+
+    def _trim_pending(self):
+        # Älteste Rückmeldungen verwerfen, damit die Warteschlange nicht unbegrenzt wächst (unter _lock)
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.dropped += excess
+
+    def _save_snapshot(self, model):
+        version = self._snapshot_version + 1
+        model.save(snapshot_file(self.snapshot_path, version))
+        pointer = self.snapshot_path + POINTER_SUFFIX
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(str(version))
+        os.replace(pointer + ".tmp", pointer)
+        self._snapshot_version = version
+        self._remove_old_snapshots(version - 1)
+
+    def _remove_old_snapshots(self, keep_from):
+        # Ältere Schnappschüsse löschen; den vorigen behalten, laufende Klassifikationen nutzen ihn evtl. noch
+        root, extension = os.path.splitext(self.snapshot_path)
+        for path in glob.glob(glob.escape(root) + ".v*" + extension):
+            match = re.search(r"\.v(\d+)" + re.escape(extension) + "$", path)
+            if match is None or int(match.group(1)) >= keep_from:
+                continue
+            prefix = path[:-len(extension)] if extension else path
+            for name in (path,) + tuple(prefix + suffix for suffix in _ARRAY_SUFFIXES):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Unter Windows noch eingeblendet: beim nächsten Mal erneut versuchen
+                    print(f"Alter Schnappschuss {name} nicht gelöscht: {str(e)}")
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self._update_safely()
+
+    def _update_safely(self):
+        try:
+            self.update()
+        except Exception as e:
+            self.errors += 1
+            print(f"Fehler beim Aktualisieren des lokalen Modells: {str(e)}")
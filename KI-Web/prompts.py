@@ -0,0 +1,116 @@
+import hashlib
+
+from response_parser import classification_schema, batch_schema
+
+# Unterstützte Antwortformate (KI_WEB_OLLAMA_FORMAT)
+FORMATS = ("json", "schema", "text")
+
+TEXT_ANSWER_INSTRUCTIONS = """- Antworte NUR mit dem exakten Kategorienamen und einer Konfidenzbewertung
+    - Wenn die Anfrage zu keiner Kategorie passt, antworte mit "KEINE|0"
+    
+    Format: KATEGORIE|KONFIDENZ
+    Beispiel: KFZ-Zulassung|95"""
+TEXT_BATCH_ANSWER_INSTRUCTIONS = """- Antworte NUR mit einer Zeile pro Anfrage: Nummer, exakter Kategoriename und Konfidenzbewertung
+    - Wenn eine Anfrage zu keiner Kategorie passt, antworte für sie mit "KEINE|0"
+    
+    Format: NR|KATEGORIE|KONFIDENZ
+    Beispiel: 1|KFZ-Zulassung|95"""
+JSON_ANSWER_INSTRUCTIONS = """- Antworte NUR mit JSON aus dem exakten Kategorienamen und einer Konfidenzbewertung (0-100)
+    - Wenn die Anfrage zu keiner Kategorie passt, antworte mit {"kategorie": "KEINE", "konfidenz": 0}
+    
+    Format: {"kategorie": KATEGORIE, "konfidenz": KONFIDENZ}
+    Beispiel: {"kategorie": "KFZ-Zulassung", "konfidenz": 95}"""
+JSON_BATCH_ANSWER_INSTRUCTIONS = """- Antworte NUR mit JSON: ein Eintrag pro Anfrage mit Nummer, exaktem Kategorienamen und Konfidenzbewertung (0-100)
+    - Wenn eine Anfrage zu keiner Kategorie passt, antworte für sie mit "KEINE" und Konfidenz 0
+    
+    Format: {"ergebnisse": [{"nr": NR, "kategorie": KATEGORIE, "konfidenz": KONFIDENZ}, ...]}
+    Beispiel: {"ergebnisse": [{"nr": 1, "kategorie": "KFZ-Zulassung", "konfidenz": 95}]}"""
+
+
+class ClassificationPrompts:
+    """
+    Prompts und format-Feld der Ollama-Klassifikation für ein Antwortformat.
+
+    Anweisungen und Kategorienliste bilden einen einmal aufgebauten, festen Prompt-Anfang; die
+    Anfrage steht zuletzt. Ollama verwendet den Cache des bereits verarbeiteten, identischen
+    Anfangs weiter und wertet pro Aufruf nur noch den Anfragetext aus.
+    """
+
+    def __init__(self, categories: dict, response_format: str = "json"):
+        """
+        Baut die Prompt-Anfänge auf.
+
+        Args:
+            categories: Dictionary Kategorie -> {"description": ...} (ohne "Nicht zuordbar")
+            response_format: "json", "schema" oder "text" (siehe FORMATS)
+        """
+        if response_format == "text":
+            self.answer_instructions = TEXT_ANSWER_INSTRUCTIONS
+            self.batch_answer_instructions = TEXT_BATCH_ANSWER_INSTRUCTIONS
+            self.response_format = None
+            self.batch_response_format = None
+        elif response_format in ("json", "schema"):
+            self.answer_instructions = JSON_ANSWER_INSTRUCTIONS
+            self.batch_answer_instructions = JSON_BATCH_ANSWER_INSTRUCTIONS
+            if response_format == "schema":
+                self.response_format = classification_schema(categories)
+                self.batch_response_format = batch_schema(categories)
+            else:
+                self.response_format = self.batch_response_format = "json"
+        else:
+            raise ValueError(f"Unbekanntes Antwortformat in KI_WEB_OLLAMA_FORMAT: {response_format}")
+        self.format = response_format
+
+        self.categories_list = "\n".join([f"- {cat}: {info['description']}" for cat, info in categories.items()])
+        self.prefix = f"""Klassifiziere die folgende Bürgeranfrage in GENAU EINE der folgenden Kategorien:
+
+{self.categories_list}
+
+WICHTIG:
+{self.answer_instructions}
+
+Anfrage:
+"""
+        self.batch_prefix = f"""Klassifiziere jede der folgenden Bürgeranfragen in GENAU EINE der folgenden Kategorien:
+
+{self.categories_list}
+
+WICHTIG:
+{self.batch_answer_instructions}
+
+"""
+
+    def fingerprint(self) -> str:
+        """
+        Kurzer Hash über Antwortformat und Prompt-Anfänge, z.B. für Cache-Schlüssel: Ändern sich
+        Format, Anweisungen oder Kategorien, ändert sich auch der Fingerabdruck.
+
+        Returns:
+            Die ersten 16 Stellen des SHA-256-Hashs als Hex-String
+        """
+        raw = "\0".join((self.format, self.prefix, self.batch_prefix))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def single(self, text: str) -> str:
+        """
+        Baut den Prompt für eine einzelne Anfrage.
+
+        Args:
+            text: Der zu klassifizierende Text (Betreff + Nachricht)
+
+        Returns:
+            Der Prompt (statischer Anfang + Anfrage)
+        """
+        return self.prefix + text
+
+    def batch(self, texts) -> str:
+        """
+        Baut den Prompt für mehrere nummerierte Anfragen.
+
+        Args:
+            texts: Liste der zu klassifizierenden Texte
+
+        Returns:
+            Der Prompt (statischer Anfang + Anfragen)
+        """
+        return self.batch_prefix + "\n\n".join(f"### Anfrage {number}\n{text}" for number, text in enumerate(texts, 1))
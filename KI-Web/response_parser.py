@@ -0,0 +1,215 @@
+import json
+import re
+
+# Parse-Pfade (für Metriken): strukturierte JSON-Antwort, Textformat "KATEGORIE|KONFIDENZ",
+# Suche nach einem Kategorienamen im Text, keine Kategorie erkennbar
+PATH_JSON = "json"
+PATH_PIPE = "pipe"
+PATH_NAME_SCAN = "name_scan"
+PATH_FAILED = "failed"
+PATHS = (PATH_JSON, PATH_PIPE, PATH_NAME_SCAN, PATH_FAILED)
+
+# Antwort des Modells, wenn keine Kategorie passt
+NO_CATEGORY = "KEINE"
+
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+_DECODER = json.JSONDecoder()
+
+# Vollständige Textantworten: auf die Konfidenz folgt bereits ein weiteres Zeichen
+_COMPLETE_LINE = re.compile(r"^[^|\n{]+\|\s*\d+(?=\D)", re.MULTILINE)
+_COMPLETE_BATCH_LINE = re.compile(r"^\s*\d+\s*[.):]?\s*\|[^|\n]+\|\s*\d+(?=\D)", re.MULTILINE)
+
+
+def _load_object(text: str):
+    # Liest das JSON-Objekt am Anfang des Textes; nachfolgender Text wird ignoriert
+    try:
+        return _DECODER.raw_decode(text)[0]
+    except ValueError:
+        return None
+
+
+def classification_schema(categories) -> dict:
+    """
+    JSON-Schema für das format-Feld von Ollama (eine Klassifikation).
+
+    Args:
+        categories: Zulässige Kategorienamen
+
+    Returns:
+        Das Schema als Dictionary
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "kategorie": {"type": "string", "enum": list(categories) + [NO_CATEGORY]},
+            "konfidenz": {"type": "integer", "minimum": 0, "maximum": 100},
+        },
+        "required": ["kategorie", "konfidenz"],
+    }
+
+
+def batch_schema(categories) -> dict:
+    """
+    JSON-Schema für das format-Feld von Ollama (mehrere nummerierte Klassifikationen).
+
+    Args:
+        categories: Zulässige Kategorienamen
+
+    Returns:
+        Das Schema als Dictionary
+    """
+    item = classification_schema(categories)
+    item = dict(item, properties=dict(item["properties"], nr={"type": "integer"}),
+                required=["nr"] + item["required"])
+    return {
+        "type": "object",
+        "properties": {"ergebnisse": {"type": "array", "items": item}},
+        "required": ["ergebnisse"],
+    }
+
+
+class ClassificationParser:
+    """
+    Liest Kategorie und Konfidenz aus Antworten des Modells.
+
+    Bevorzugt wird die strukturierte JSON-Antwort, die gegen die bekannten Kategorien geprüft wird.
+    Liefert das Modell trotzdem Text, greifen das Format "KATEGORIE|KONFIDENZ" und zuletzt die
+    Suche nach einem Kategorienamen. Jeder Aufruf meldet, welcher Pfad verwendet wurde.
+    """
+
+    def __init__(self, categories, threshold: int, unassigned: str = "Nicht zuordbar",
+                 name_scan_confidence: int = 80):
+        """
+        Args:
+            categories: Zulässige Kategorienamen
+            threshold: Konfidenz, unter der eine Antwort als "nicht zuordbar" gilt
+            unassigned: Kategorie für "KEINE" bzw. zu geringe Konfidenz
+            name_scan_confidence: Konfidenz, wenn nur ein Kategoriename im Text gefunden wurde
+        """
+        self.categories = list(categories)
+        self.threshold = threshold
+        self.unassigned = unassigned
+        self.name_scan_confidence = name_scan_confidence
+        self._by_name = {category.casefold(): category for category in self.categories}
+
+    def parse(self, text: str):
+        """
+        Liest eine einzelne Klassifikation.
+
+        Args:
+            text: Der Antworttext des Modells
+
+        Returns:
+            Tuple aus (Ergebnis, Pfad); Ergebnis ist (Kategorie, Konfidenz) oder None
+        """
+        text = text.strip()
+        if text.startswith("{"):
+            data = _load_object(text)
+            if isinstance(data, dict):
+                result = self._from_fields(data.get("kategorie"), data.get("konfidenz"))
+                if result is not None:
+                    return result, PATH_JSON
+
+        if "|" in text:
+            category, _, rest = text.partition("|")
+            result = self._from_fields(category, rest.split("|")[0])
+            if result is not None:
+                return result, PATH_PIPE
+
+        # Letzter Versuch: Kategorienamen im Text suchen
+        lowered = text.casefold()
+        for category in self.categories:
+            if category.casefold() in lowered:
+                return (category, self.name_scan_confidence), PATH_NAME_SCAN
+
+        return None, PATH_FAILED
+
+    def parse_batch(self, text: str, count: int):
+        """
+        Liest nummerierte Klassifikationen mehrerer Anfragen.
+
+        Erwartet {"ergebnisse": [{"nr": 1, "kategorie": ..., "konfidenz": ...}, ...]} oder
+        Zeilen der Form "NR|KATEGORIE|KONFIDENZ".
+
+        Args:
+            text: Der Antworttext des Modells
+            count: Anzahl der Anfragen im Prompt
+
+        Returns:
+            Liste von Tupeln aus (Ergebnis, Pfad) in der Reihenfolge der Anfragen
+        """
+        results = [(None, PATH_FAILED)] * count
+        text = text.strip()
+
+        if text.startswith("{"):
+            data = _load_object(text)
+            entries = data.get("ergebnisse") if isinstance(data, dict) else None
+            if isinstance(entries, list):
+                for entry in entries:
+                    if not isinstance(entry, dict):
+                        continue
+                    index = self._index(entry.get("nr"), count)
+                    if index is None or results[index][0] is not None:
+                        continue
+                    result = self._from_fields(entry.get("kategorie"), entry.get("konfidenz"))
+                    if result is not None:
+                        results[index] = (result, PATH_JSON)
+                return results
+
+        for line in text.splitlines():
+            number, _, rest = line.strip().partition("|")
+            index = self._index(number.strip().rstrip(".):"), count)
+            if index is not None and results[index][0] is None:
+                results[index] = self.parse(rest)
+        return results
+
+    def is_complete(self, text: str, count: int = 1) -> bool:
+        """
+        Prüft, ob eine gestreamte Antwort bereits alle Klassifikationen enthält.
+
+        Args:
+            text: Der bisher empfangene Antworttext
+            count: Anzahl erwarteter Klassifikationen (1 für eine einzelne Anfrage)
+
+        Returns:
+            True, wenn die Generierung abgebrochen werden kann
+        """
+        stripped = text.strip()
+        if stripped.startswith("{"):
+            return "}" in stripped and _load_object(stripped) is not None
+        if count == 1:
+            return _COMPLETE_LINE.search(text) is not None
+        return len(_COMPLETE_BATCH_LINE.findall(text)) >= count
+
+    def _from_fields(self, category, confidence):
+        # Prüft Kategorie und Konfidenz; None, wenn die Kategorie unbekannt ist
+        if not isinstance(category, str):
+            return None
+        confidence = self._confidence(confidence)
+        category = category.strip().strip('"\'')
+        if category.upper() == NO_CATEGORY or confidence < self.threshold:
+            return self.unassigned, confidence
+        category = self._by_name.get(category.casefold())
+        if category is None:
+            return None
+        return category, confidence
+
+    @staticmethod
+    def _confidence(value) -> int:
+        if isinstance(value, bool):
+            return 0
+        if isinstance(value, (int, float)):
+            return max(0, min(100, int(round(value))))
+        if isinstance(value, str):
+            match = _NUMBER.search(value)
+            if match:
+                return max(0, min(100, int(round(float(match.group().replace(",", "."))))))
+        return 0
+
+    @staticmethod
+    def _index(number, count):
+        if isinstance(number, str):
+            number = int(number) if number.isdigit() else None
+        if isinstance(number, int) and not isinstance(number, bool) and 1 <= number <= count:
+            return number - 1
+        return None
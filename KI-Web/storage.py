@@ -0,0 +1,439 @@
+from collections import OrderedDict
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# fsync-Strategien
+FSYNC_ALWAYS = "immer"       # nach jedem Schreibvorgang
+FSYNC_INTERVAL = "intervall"  # höchstens alle fsync_interval Sekunden
+FSYNC_NEVER = "nie"          # dem Betriebssystem überlassen
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+
+class SubmissionStorage:
+    """
+    Basisklasse für die Ablage eingegangener Anfragen.
+
+    Schreibvorgänge werden gepuffert und gesammelt geschrieben, sobald batch_size Einträge
+    vorliegen oder flush_interval Sekunden vergangen sind.
+    """
+
+    def __init__(self, batch_size: int = 1, flush_interval: float = 1.0,
+                 fsync: str = FSYNC_INTERVAL, fsync_interval: float = 1.0):
+        """
+        Initialisiert den Puffer.
+
+        Args:
+            batch_size: Anzahl Einträge, ab der sofort geschrieben wird
+            flush_interval: Maximale Verweildauer eines Eintrags im Puffer in Sekunden
+            fsync: fsync-Strategie ("immer", "intervall" oder "nie")
+            fsync_interval: Mindestabstand zwischen zwei fsync-Aufrufen bei "intervall"
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Strategie: {fsync}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._buffer = []
+        self._lock = threading.RLock()
+        self._last_fsync = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher = None
+        if batch_size > 1:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True,
+                                             name="speicher-flush")
+            self._flusher.start()
+
+    def save(self, record: dict) -> None:
+        """
+        Speichert eine neue Anfrage.
+
+        Args:
+            record: Die Anfrage; muss ein eindeutiges Feld "id" enthalten
+        """
+        self._append({"id": record["id"], "daten": record})
+
+    def update(self, record_id: str, fields: dict) -> None:
+        """
+        Ändert Felder einer gespeicherten Anfrage (z.B. die Kategorie nach asynchroner Klassifikation).
+
+        Args:
+            record_id: ID der Anfrage
+            fields: Zu ändernde Felder
+        """
+        self._append({"id": record_id, "aktualisierung": fields})
+
+    def flush(self) -> None:
+        """
+        Schreibt alle gepufferten Einträge.
+        """
+        with self._lock:
+            if self._buffer:
+                entries, self._buffer = self._buffer, []
+                self._write(entries)
+
+    def close(self) -> None:
+        """
+        Schreibt den Puffer und gibt Ressourcen frei. Mehrfache Aufrufe sind unschädlich.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            self.flush()
+            self._release()
+
+    def iter_records(self):
+        """
+        Liefert alle gespeicherten Anfragen mit eingearbeiteten Änderungen.
+
+        Returns:
+            Iterator über die Anfragen als Dictionaries
+        """
+        raise NotImplementedError
+
+    def get(self, record_id: str):
+        """
+        Liefert eine gespeicherte Anfrage mit eingearbeiteten Änderungen.
+
+        Args:
+            record_id: ID der Anfrage
+
+        Returns:
+            Die Anfrage als Dictionary oder None, falls unbekannt
+        """
+        # Standard: alle Anfragen durchsuchen; Backends mit Index überschreiben das
+        for record in self.iter_records():
+            if record.get("id") == record_id:
+                return record
+        return None
+
+    def _append(self, entry):
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def _write(self, entries):
+        raise NotImplementedError
+
+    def _release(self):
+        pass
+
+    def _fsync_due(self) -> bool:
+        if self.fsync == FSYNC_ALWAYS:
+            return True
+        if self.fsync == FSYNC_INTERVAL and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._last_fsync = time.monotonic()
+            return True
+        return False
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Fehler beim Schreiben der Anfragen: {str(e)}")
+
+
+class JsonFileStorage(SubmissionStorage):
+    """
+    Bisheriges Verfahren: eine eingerückte JSON-Datei pro Anfrage.
+
+    Die ID der Anfrage ist Teil des Dateinamens, sodass gleichnamige Anfragen in derselben
+    Sekunde sich nicht mehr gegenseitig überschreiben.
+    """
+
+    # Anzahl zuletzt geschriebener Pfade, die für update() gemerkt werden
+    MAX_REMEMBERED_PATHS = 10000
+
+    def __init__(self, directory: str, **options):
+        """
+        Args:
+            directory: Verzeichnis der JSON-Dateien
+            **options: Puffer- und fsync-Optionen (siehe SubmissionStorage)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._paths = OrderedDict()
+        super().__init__(**options)
+
+    def _path_for(self, record_id, record=None):
+        path = self._paths.get(record_id)
+        if path is None and record is not None:
+            stamp = time.strftime('%Y%m%d_%H%M%S')
+            path = os.path.join(self.directory,
+                                f"{record['nachname']}_{record['vorname']}_{stamp}_{record_id}.json")
+            self._paths[record_id] = path
+            if len(self._paths) > self.MAX_REMEMBERED_PATHS:
+                self._paths.popitem(last=False)
+        if path is None:
+            # Nicht mehr gemerkt: im Verzeichnis suchen
+            matches = glob.glob(os.path.join(self.directory, f"*_{glob.escape(record_id)}.json"))
+            path = matches[0] if matches else None
+        return path
+
+    def _write(self, entries):
+        for entry in entries:
+            if "daten" in entry:
+                path = self._path_for(entry["id"], entry["daten"])
+                data = entry["daten"]
+            else:
+                path = self._path_for(entry["id"])
+                if path is None:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                data.update(entry["aktualisierung"])
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+                if self._fsync_due():
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def get(self, record_id):
+        self.flush()
+        path = self._path_for(record_id)
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_records(self):
+        self.flush()
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                yield json.load(f)
+
+
+class JsonlSegmentStorage(SubmissionStorage):
+    """
+    Append-only-Log im JSON-Lines-Format, aufgeteilt in Segmente fester Maximalgröße.
+
+    Neue Anfragen und Änderungen werden als eigene Zeilen angehängt; iter_records() führt sie zusammen.
+    get() liest nur die Zeilen der gesuchten Anfrage über einen Index ID -> (Segment, Byte-Position),
+    der beim ersten Aufruf einmal aufgebaut und danach beim Schreiben fortgeführt wird. Segmente werden
+    binär geschrieben, damit die Byte-Positionen auch unter Windows (Zeilenenden) stimmen.
+    """
+
+    SEGMENT_PATTERN = "anfragen-{:06d}.jsonl"
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024, **options):
+        """
+        Args:
+            directory: Verzeichnis der Segmentdateien
+            max_segment_bytes: Größe, ab der ein neues Segment begonnen wird
+            **options: Puffer- und fsync-Optionen (siehe SubmissionStorage)
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        self._segment_number = int(os.path.basename(segments[-1])[9:15]) if segments else 1
+        self._file = self._open_segment()
+        self._index = None
+        super().__init__(**options)
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "anfragen-*.jsonl")))
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, self.SEGMENT_PATTERN.format(self._segment_number))
+        self._truncate_incomplete_line(path)
+        return open(path, "ab")
+
+    @staticmethod
+    def _truncate_incomplete_line(path, block_size=64 * 1024):
+        # Nach einem Absturz während des Schreibens endet das Segment evtl. mit einer halben Zeile.
+        # Sie wird abgeschnitten, damit neue Einträge nicht an sie angehängt werden.
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - block_size)
+                f.seek(start)
+                block = f.read(position - start)
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                print(f"Unvollständige Zeile am Ende von {path} entfernt ({end - position} Byte)")
+                f.truncate(position)
+
+    def _write(self, entries):
+        lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+        path = self._file.name
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        if self._index is not None:
+            offset = self._file.tell() - sum(len(line) for line in lines)
+            for entry, line in zip(entries, lines):
+                self._index.setdefault(entry["id"], []).append((path, offset))
+                offset += len(line)
+        if self._fsync_due():
+            os.fsync(self._file.fileno())
+        if self._file.tell() >= self.max_segment_bytes:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._segment_number += 1
+            self._file = self._open_segment()
+
+    def _release(self):
+        if self.fsync != FSYNC_NEVER:
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    def iter_records(self):
+        self.flush()
+        records = {}
+        for path in self._segments():
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Unlesbare Zeile {number} in {path} übersprungen")
+                        continue
+                    if "daten" in entry:
+                        records[entry["id"]] = entry["daten"]
+                    elif entry["id"] in records:
+                        records[entry["id"]].update(entry["aktualisierung"])
+        return iter(records.values())
+
+    def get(self, record_id):
+        with self._lock:
+            self.flush()
+            if self._index is None:
+                self._index = self._build_index()
+            positions = list(self._index.get(record_id, ()))
+        record = None
+        for path, offset in positions:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                line = f.readline()
+            try:
+                entry = json.loads(line.decode("utf-8", errors="replace"))
+            except json.JSONDecodeError:
+                print(f"Unlesbare Zeile an Position {offset} in {path} übersprungen")
+                continue
+            if entry.get("id") != record_id:
+                continue
+            if "daten" in entry:
+                record = entry["daten"]
+            elif record is not None:
+                record.update(entry["aktualisierung"])
+        return record
+
+    def _build_index(self):
+        # Einmaliger Durchlauf über alle Segmente; danach führt _write() den Index fort
+        index = {}
+        for path in self._segments():
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record_id = json.loads(line.decode("utf-8", errors="replace"))["id"]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        record_id = None
+                    if record_id is not None:
+                        index.setdefault(record_id, []).append((path, offset))
+                    offset += len(line)
+        return index
+
+
+class SqliteStorage(SubmissionStorage):
+    """
+    Ablage in einer SQLite-Datenbank mit Indizes auf Zeitstempel und Kategorie.
+    """
+
+    _SYNCHRONOUS = {FSYNC_ALWAYS: "FULL", FSYNC_INTERVAL: "NORMAL", FSYNC_NEVER: "OFF"}
+
+    def __init__(self, db_path: str, **options):
+        """
+        Args:
+            db_path: Pfad zur SQLite-Datenbank
+            **options: Puffer- und fsync-Optionen (siehe SubmissionStorage)
+        """
+        fsync = options.get("fsync", FSYNC_INTERVAL)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={self._SYNCHRONOUS.get(fsync, 'NORMAL')}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS anfragen ("
+            "id TEXT PRIMARY KEY, zeitstempel TEXT, kategorie TEXT, konfidenz INTEGER, daten TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_anfragen_zeitstempel ON anfragen (zeitstempel)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_anfragen_kategorie ON anfragen (kategorie)")
+        self._db.commit()
+        super().__init__(**options)
+
+    def _write(self, entries):
+        with self._db:
+            for entry in entries:
+                if "daten" in entry:
+                    data = entry["daten"]
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO anfragen VALUES (?, ?, ?, ?, ?)",
+                        (entry["id"], data.get("zeitstempel"), data.get("kategorie"),
+                         data.get("konfidenz"), json.dumps(data, ensure_ascii=False))
+                    )
+                else:
+                    row = self._db.execute("SELECT daten FROM anfragen WHERE id = ?",
+                                           (entry["id"],)).fetchone()
+                    if row is None:
+                        continue
+                    data = json.loads(row[0])
+                    data.update(entry["aktualisierung"])
+                    self._db.execute(
+                        "UPDATE anfragen SET kategorie = ?, konfidenz = ?, daten = ? WHERE id = ?",
+                        (data.get("kategorie"), data.get("konfidenz"),
+                         json.dumps(data, ensure_ascii=False), entry["id"])
+                    )
+
+    def _release(self):
+        self._db.close()
+
+    def get(self, record_id):
+        self.flush()
+        with self._lock:
+            row = self._db.execute("SELECT daten FROM anfragen WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def iter_records(self):
+        self.flush()
+        with self._lock:
+            rows = self._db.execute("SELECT daten FROM anfragen ORDER BY zeitstempel").fetchall()
+        return (json.loads(row[0]) for row in rows)
+
+
+# Verfügbare Speicher-Backends
+BACKENDS = ("dateien", "jsonl", "sqlite")
+
+
+def create_storage(backend: str, path: str, **options) -> SubmissionStorage:
+    """
+    Erzeugt das konfigurierte Speicher-Backend.
+
+    Args:
+        backend: "dateien" (eine JSON-Datei pro Anfrage), "jsonl" (Segment-Log) oder "sqlite"
+        path: Verzeichnis (dateien, jsonl) bzw. Datenbankdatei (sqlite)
+        **options: Puffer- und fsync-Optionen (siehe SubmissionStorage)
+
+    Returns:
+        Das Speicher-Backend
+    """
+    if backend == "dateien":
+        return JsonFileStorage(path, **options)
+    if backend == "jsonl":
+        return JsonlSegmentStorage(path, **options)
+    if backend == "sqlite":
+        return SqliteStorage(path, **options)
+    raise ValueError(f"Unbekanntes Speicher-Backend: {backend}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Module der KI-Web liegen im übergeordneten Verzeichnis
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from async_classification import STATUS_DONE, STATUS_PENDING, ClassificationJobs, QueueFullError
+
+
+def test_jobs_report_status_and_call_on_done():
+    finished = []
+    jobs = ClassificationJobs(lambda text: ("Hundesteuer", 90), on_done=lambda *args: finished.append(args),
+                              max_workers=2)
+    jobs.submit("a1", "Hund anmelden")
+    jobs.shutdown()
+    assert jobs.status("a1") == {"status": STATUS_DONE, "kategorie": "Hundesteuer", "konfidenz": 90}
+    assert finished == [("a1", "Hundesteuer", 90)]
+    assert jobs.status("fehlt") is None
+
+
+def test_full_queue_rejects_or_blocks():
+    release = threading.Event()
+
+    def classify(text):
+        release.wait()
+        return "Hundesteuer", 90
+
+    jobs = ClassificationJobs(classify, max_workers=1, max_pending=1)
+    jobs.submit("a1", "Hund")
+    assert jobs.full()
+    assert jobs.status("a1")["status"] == STATUS_PENDING
+    with pytest.raises(QueueFullError):
+        jobs.submit("b2", "Hund")
+
+    waiting = threading.Thread(target=jobs.submit, args=("c3", "Hund"), kwargs={"block": True})
+    waiting.start()
+    release.set()
+    waiting.join(timeout=5)
+    assert not waiting.is_alive()
+    jobs.shutdown()
+    assert jobs.status("c3")["status"] == STATUS_DONE
@@ -0,0 +1,70 @@
+from cascade import ClassificationCascade, parse_cascade_spec
+
+
+def _fixed(result, calls=None):
+    def classify(text):
+        if calls is not None:
+            calls.append(text)
+        return result
+    return classify
+
+
+def test_parse_cascade_spec_raises_low_thresholds():
+    assert parse_cascade_spec("keyword:20, local:80,,ollama", min_threshold=50) == [
+        ("keyword", 50), ("local", 80), ("ollama", None)]
+
+
+def test_first_confident_tier_decides():
+    later = []
+    cascade = ClassificationCascade()
+    cascade.add_tier("keyword", _fixed(("Hundesteuer", 90)), 80)
+    cascade.add_tier("ollama", _fixed(("KFZ-Zulassung", 99), later))
+
+    assert cascade.classify("Hund anmelden") == ("Hundesteuer", 90)
+    assert later == []
+    stats = cascade.stats()
+    assert stats["stufen"]["keyword"]["entschieden"] == 1
+    assert stats["vermieden_letzte_stufe"] == 1
+
+
+def test_result_below_min_confidence_is_not_assignable():
+    cascade = ClassificationCascade(min_confidence=50)
+    cascade.add_tier("keyword", _fixed(("Gewerbeanmeldung", 43)), 80)
+    cascade.add_tier("local", _fixed(None), 80)
+
+    assert cascade.classify("Anfrage") == ("Nicht zuordbar", 43)
+    assert cascade.classify_batch(["a", "b"]) == [("Nicht zuordbar", 43)] * 2
+    assert cascade.stats()["unter_schwelle"] == 3
+
+
+def test_fallback_is_counted_and_does_not_decide():
+    cascade = ClassificationCascade(min_confidence=50)
+    cascade.add_tier("ollama", _fixed(None), fallback=_fixed(("Hundesteuer", 60)))
+
+    assert cascade.classify("Hund") == ("Hundesteuer", 60)
+    assert cascade.classify_batch(["Hund", "Hund"]) == [("Hundesteuer", 60)] * 2
+    counter = cascade.stats()["stufen"]["ollama"]
+    assert counter == {"aufrufe": 3, "entschieden": 0, "fallback": 3}
+
+
+def test_fallback_keeps_more_confident_earlier_result():
+    cascade = ClassificationCascade(min_confidence=50)
+    cascade.add_tier("local", _fixed(("KFZ-Zulassung", 70)), 80)
+    cascade.add_tier("ollama", _fixed(None), fallback=_fixed(("Nicht zuordbar", 30)))
+
+    assert cascade.classify("Auto") == ("KFZ-Zulassung", 70)
+
+
+def test_batch_only_passes_undecided_texts_to_next_tier():
+    seen = []
+
+    def classify_batch(texts):
+        seen.extend(texts)
+        return [("KFZ-Zulassung", 95) for _ in texts]
+
+    cascade = ClassificationCascade()
+    cascade.add_tier("keyword", lambda text: ("Hundesteuer", 90) if "Hund" in text else None, 80)
+    cascade.add_tier("local", _fixed(None), classify_batch=classify_batch)
+
+    assert cascade.classify_batch(["Hund", "Auto"]) == [("Hundesteuer", 90), ("KFZ-Zulassung", 95)]
+    assert seen == ["Auto"]
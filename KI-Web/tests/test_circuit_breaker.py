@@ -0,0 +1,91 @@
+import pytest
+
+from circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=clock,
+                             on_state_change=lambda old, new: changes.append(new))
+    breaker.changes = changes
+    return breaker
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.allow_request())
+
+
+def test_open_half_open_closed(breaker, clock):
+    _trip(breaker)
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow_request() is None
+
+    clock.now = 10
+    assert breaker.state == STATE_HALF_OPEN
+    probe = breaker.allow_request()
+    assert probe is not None
+    assert breaker.allow_request() is None  # nur ein Testaufruf gleichzeitig
+
+    breaker.record_success(probe)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.changes == [STATE_OPEN, STATE_HALF_OPEN, STATE_CLOSED]
+    stats = breaker.stats()
+    assert (stats["ausloesungen"], stats["abgelehnt"]) == (1, 2)
+
+
+def test_failed_probe_reopens(breaker, clock):
+    _trip(breaker)
+    clock.now = 10
+    breaker.record_failure(breaker.allow_request())
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()["verbleibende_sperrzeit"] == 10
+
+
+def test_stale_success_does_not_close_open_breaker(breaker, clock):
+    slow = breaker.allow_request()
+    _trip(breaker)
+
+    breaker.record_success(slow)
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()["veraltet"] == 1
+
+
+def test_stale_failures_do_not_extend_cooldown(breaker, clock):
+    calls = [breaker.allow_request() for _ in range(5)]
+    breaker.record_failure(calls[0])
+    breaker.record_failure(calls[1])
+    assert breaker.state == STATE_OPEN
+
+    clock.now = 9
+    for token in calls[2:]:
+        breaker.record_failure(token)
+    assert breaker.stats()["verbleibende_sperrzeit"] == 1
+    clock.now = 10
+    assert breaker.allow_request() is not None
+
+
+def test_stale_result_does_not_decide_probe(breaker, clock):
+    slow = breaker.allow_request()
+    _trip(breaker)
+    clock.now = 10
+    probe = breaker.allow_request()
+    breaker.record_failure(slow)
+    assert breaker.state == STATE_HALF_OPEN
+
+    breaker.record_success(probe)
+    assert breaker.state == STATE_CLOSED
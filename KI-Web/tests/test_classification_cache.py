@@ -0,0 +1,57 @@
+import sqlite3
+
+from classification_cache import ClassificationCache, make_cache_key
+from prompts import ClassificationPrompts
+
+CATEGORIES = {"Hundesteuer": {"description": "Hunde"}, "KFZ-Zulassung": {"description": "Fahrzeuge"}}
+
+
+def _rows(db_path):
+    with sqlite3.connect(db_path) as db:
+        return [row[0] for row in db.execute("SELECT schluessel FROM klassifikationen ORDER BY schluessel")]
+
+
+def test_near_identical_texts_share_a_key():
+    assert make_cache_key("Hund anmelden!", "llama3", "3") == make_cache_key("  hund, ANMELDEN ", "llama3", "3")
+    assert make_cache_key("Hund anmelden", "llama3", "3") != make_cache_key("Hund anmelden", "llama3", "4")
+
+
+def test_prompt_fingerprint_depends_on_format_and_categories():
+    json_prompts = ClassificationPrompts(CATEGORIES, "json")
+    assert json_prompts.fingerprint() == ClassificationPrompts(dict(CATEGORIES), "json").fingerprint()
+    assert json_prompts.fingerprint() != ClassificationPrompts(CATEGORIES, "schema").fingerprint()
+    assert json_prompts.fingerprint() != ClassificationPrompts(
+        dict(CATEGORIES, Gewerbeanmeldung={"description": "Gewerbe"}), "json").fingerprint()
+
+
+def test_expired_sqlite_row_is_deleted_on_lookup(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    clock = [1000.0]
+    monkeypatch.setattr("classification_cache.time.time", lambda: clock[0])
+    cache = ClassificationCache(ttl=10, db_path=db_path, purge_interval=3600)
+    cache.put("alt", ("Hundesteuer", 90))
+    cache._entries.clear()  # nur die SQLite-Ablage behalten
+
+    clock[0] += 20
+    assert cache.get("alt") is None
+    assert _rows(db_path) == []
+
+
+def test_expired_sqlite_rows_are_purged_on_start_and_periodically(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    clock = [1000.0]
+    monkeypatch.setattr("classification_cache.time.time", lambda: clock[0])
+    cache = ClassificationCache(ttl=10, db_path=db_path, purge_interval=100)
+    cache.put("a", ("Hundesteuer", 90))
+    clock[0] += 50
+    cache.put("b", ("Hundesteuer", 90))
+    assert _rows(db_path) == ["a", "b"]
+
+    clock[0] += 60
+    cache.put("c", ("KFZ-Zulassung", 80))
+    assert _rows(db_path) == ["c"]
+
+    cache.put("d", ("KFZ-Zulassung", 80))
+    clock[0] += 20
+    ClassificationCache(ttl=10, db_path=db_path)
+    assert _rows(db_path) == []
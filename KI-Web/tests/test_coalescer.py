@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+
+import pytest
+
+from coalescer import RequestCoalescer
+
+
+def _submit_all(coalescer, items, timeout=5):
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        return list(executor.map(lambda item: coalescer.submit(item, timeout=timeout), items))
+
+
+def test_concurrent_submissions_share_a_batch():
+    batches = []
+    coalescer = RequestCoalescer(lambda items: [item.upper() for item in items], max_batch_size=4,
+                                 max_wait=0.5, on_batch=batches.append)
+    try:
+        assert _submit_all(coalescer, ["a", "b", "c", "d"]) == ["A", "B", "C", "D"]
+    finally:
+        coalescer.close()
+    assert batches == [4]
+
+
+def test_batches_are_limited_to_max_batch_size():
+    sizes = []
+
+    def process(items):
+        sizes.append(len(items))
+        return items
+
+    coalescer = RequestCoalescer(process, max_batch_size=2, max_wait=0.2)
+    try:
+        assert sorted(_submit_all(coalescer, list(range(5)))) == list(range(5))
+    finally:
+        coalescer.close()
+    assert max(sizes) <= 2 and sum(sizes) == 5
+
+
+def test_errors_and_wrong_result_counts_reach_every_caller():
+    def process(items):
+        if "kaputt" in items:
+            raise RuntimeError("Ollama nicht erreichbar")
+        return items[:-1]
+
+    coalescer = RequestCoalescer(process, max_batch_size=1, max_wait=0)
+    try:
+        with pytest.raises(RuntimeError):
+            coalescer.submit("kaputt", timeout=5)
+        with pytest.raises(ValueError):
+            coalescer.submit("text", timeout=5)
+    finally:
+        coalescer.close()
+
+
+def test_submit_times_out_and_close_finishes_queued_work():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return items
+
+    coalescer = RequestCoalescer(process, max_batch_size=1, max_wait=0, max_concurrent_batches=1)
+    with pytest.raises(FutureTimeoutError):
+        coalescer.submit("langsam", timeout=0.05)
+    release.set()
+    coalescer.close()
+    with pytest.raises(RuntimeError):
+        coalescer.submit("zu spät")
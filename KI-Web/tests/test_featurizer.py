@@ -0,0 +1,76 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from featurizer import CSRMatrix, TfidfFeaturizer
+from text_preprocessing import preprocess
+
+TEXTS = ["Hund anmelden Hundesteuer Hund", "Auto zulassen Kennzeichen", "Gewerbe anmelden"]
+
+
+def _dense_counts(featurizer, texts):
+    # Erwartete Termhäufigkeiten, Term für Term ausgezählt
+    columns = {term: column for column, term in enumerate(featurizer.terms)}
+    dense = np.zeros((len(texts), len(featurizer)))
+    for row, text in enumerate(texts):
+        for token in preprocess(text):
+            if token in columns:
+                dense[row, columns[token]] += 1
+    return dense
+
+
+def test_csr_operations_match_dense():
+    dense = np.array([[0, 2.0, 0], [1.0, 0, 3.0], [0, 0, 0], [4.0, 5.0, 0]])
+    rows, columns = np.nonzero(dense)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=4))])
+    matrix = CSRMatrix(dense[rows, columns], columns, indptr, dense.shape)
+    other = np.arange(6.0).reshape(3, 2)
+
+    assert np.allclose(matrix.toarray(), dense)
+    assert np.allclose(matrix @ other, dense @ other)
+    assert np.allclose(matrix.transpose_dot(np.ones((4, 2))), dense.T @ np.ones((4, 2)))
+    assert np.allclose(matrix[np.array([3, 1])].toarray(), dense[[3, 1]])
+    assert np.allclose(matrix.sum_by_group(np.array([0, 1, 1, 0]), 2), [dense[[0, 3]].sum(0), dense[[1, 2]].sum(0)])
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    assert np.allclose(matrix.normalize().toarray(), dense / np.where(norms == 0, 1, norms))
+
+
+def test_fit_transform_counts_terms():
+    featurizer = TfidfFeaturizer()
+    vectors = featurizer.fit_transform(TEXTS)
+    assert list(featurizer.terms) == sorted(set(token for text in TEXTS for token in preprocess(text)))
+    assert np.allclose(vectors.toarray(), _dense_counts(featurizer, TEXTS))
+
+
+def test_transform_ignores_unknown_terms_and_weights():
+    featurizer = TfidfFeaturizer(relative=True, idf=True).fit(TEXTS)
+    texts = ["Hund Wohnmobil", "", "Unbekannt"]
+    vectors = featurizer.transform(texts)
+
+    lengths = np.array([len(preprocess(text)) for text in texts], dtype=float)
+    expected = _dense_counts(featurizer, texts) / np.maximum(lengths, 1)[:, None] * featurizer.idf_weights
+    assert vectors.shape == (3, len(featurizer))
+    assert np.allclose(vectors.toarray(), expected)
+    assert vectors.toarray()[1:].sum() == 0
+
+
+def test_partial_fit_transform_inserts_new_terms():
+    featurizer = TfidfFeaturizer(idf=True).fit(TEXTS)
+    old_terms, old_idf = list(featurizer.terms), featurizer.idf_weights.copy()
+
+    vectors, positions = featurizer.partial_fit_transform(["Wohnmobil zulassen"])
+    new_terms = sorted(set(featurizer.terms) - set(old_terms))
+    assert new_terms and list(featurizer.terms) == sorted(old_terms + new_terms)
+    assert list(np.insert(np.array(old_terms), positions, new_terms)) == list(featurizer.terms)
+    assert np.allclose(featurizer.idf_weights[np.isin(featurizer.terms, old_terms)], old_idf)
+    assert vectors.shape == (1, len(featurizer))
+
+
+def test_save_and_load_memory_mapped(tmp_path):
+    featurizer = TfidfFeaturizer(idf=True).fit(TEXTS)
+    prefix = str(tmp_path / "modell")
+    featurizer.save(prefix)
+
+    loaded = TfidfFeaturizer.load(prefix, **featurizer.settings())
+    assert isinstance(loaded.terms, np.memmap)
+    assert np.allclose(loaded.transform(TEXTS).toarray(), featurizer.transform(TEXTS).toarray())
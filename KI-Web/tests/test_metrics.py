@@ -0,0 +1,54 @@
+import pytest
+
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_renders_labels_in_prometheus_format(registry):
+    counter = registry.counter("ki_web_requests_total", "Anzahl der Anfragen", ["endpoint", "status"])
+    counter.inc(endpoint="/upload", status=200)
+    counter.inc(2, endpoint="/upload", status=200)
+    counter.inc(endpoint='/a"b', status=500)
+
+    assert counter.value(endpoint="/upload", status="200") == 3
+    assert registry.render() == (
+        "# HELP ki_web_requests_total Anzahl der Anfragen\n"
+        "# TYPE ki_web_requests_total counter\n"
+        'ki_web_requests_total{endpoint="/a\\"b",status="500"} 1\n'
+        'ki_web_requests_total{endpoint="/upload",status="200"} 3\n')
+
+
+def test_wrong_labels_are_rejected(registry):
+    counter = registry.counter("ki_web_fehler_total", "Fehler", ["kind"])
+    with pytest.raises(ValueError):
+        counter.inc(art="timeout")
+    with pytest.raises(ValueError):
+        registry.gauge("ki_web_fehler_total", "Doppelt")
+
+
+def test_gauge_without_labels(registry):
+    gauge = registry.gauge("ki_web_circuit_state", "Zustand des Schutzschalters")
+    gauge.set(1)
+    gauge.set(0.5)
+    assert registry.render().splitlines()[-1] == "ki_web_circuit_state 0.5"
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.histogram("ki_web_stage_seconds", "Dauer", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, stage="ollama")
+    with pytest.raises(RuntimeError):
+        with histogram.time(stage="parse"):
+            raise RuntimeError("abgebrochen")
+
+    lines = registry.render().splitlines()
+    assert 'ki_web_stage_seconds_bucket{stage="ollama",le="0.1"} 1' in lines
+    assert 'ki_web_stage_seconds_bucket{stage="ollama",le="1"} 3' in lines
+    assert 'ki_web_stage_seconds_bucket{stage="ollama",le="+Inf"} 4' in lines
+    assert 'ki_web_stage_seconds_sum{stage="ollama"} 4.25' in lines
+    assert 'ki_web_stage_seconds_count{stage="ollama"} 4' in lines
+    assert 'ki_web_stage_seconds_count{stage="parse"} 1' in lines
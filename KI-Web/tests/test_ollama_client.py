@@ -0,0 +1,44 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from ollama_client import OllamaClient
+
+
+@pytest.fixture
+def silent_server():
+    # Nimmt Verbindungen an, antwortet aber nie
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    yield f"http://127.0.0.1:{server.getsockname()[1]}"
+    server.close()
+
+
+def test_waiting_for_a_free_connection_counts_towards_the_timeout(silent_server):
+    client = OllamaClient(silent_server, pool_size=1)
+    outcome = []
+
+    def occupy():
+        # Belegt die einzige Verbindung; das Ergebnis wird im Haupt-Thread geprüft
+        try:
+            client.generate("m", "p", timeout=1.0)
+            outcome.append(None)
+        except Exception as e:
+            outcome.append(e)
+
+    busy = threading.Thread(target=occupy)
+    busy.start()
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        client.generate("m", "p", timeout=0.2)
+    assert time.monotonic() - start < 0.8
+    busy.join()
+    client.close()
+    assert len(outcome) == 1
+    assert isinstance(outcome[0], requests.exceptions.Timeout)
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from local_classifier import LocalClassifier
+from online_learning import OnlineLearner, current_snapshot, snapshot_file
+
+TEXTS = ["Hund anmelden Hundesteuer", "Welpe Hundemarke beantragen", "Auto zulassen Kennzeichen",
+         "Fahrzeug ummelden Zulassung", "Gewerbe anmelden Kleingewerbe", "Firma gründen Gewerbeschein"]
+LABELS = ["Hundesteuer", "Hundesteuer", "KFZ-Zulassung", "KFZ-Zulassung",
+          "Gewerbeanmeldung", "Gewerbeanmeldung"]
+
+
+@pytest.fixture
+def learner(tmp_path):
+    swapped = []
+    learner = OnlineLearner(LocalClassifier().fit(TEXTS, LABELS), on_swap=swapped.append,
+                            snapshot_path=str(tmp_path / "modell.npz"), batch_size=1000, interval=3600)
+    learner.swapped = swapped
+    yield learner
+    learner.close()
+
+
+def test_update_swaps_model_and_writes_versioned_snapshots(learner, tmp_path):
+    base = str(tmp_path / "modell.npz")
+    for number in range(3):
+        learner.add(f"Wohnmobil Saisonkennzeichen {number}", "KFZ-Zulassung")
+        assert learner.update()
+
+    assert learner.swapped[-1] is learner.model
+    assert learner.stats()["version"] == 3
+    assert current_snapshot(base) == (snapshot_file(base, 3), 3)
+    assert not os.path.exists(base)
+    # Nur die aktuelle und die vorige Version bleiben liegen
+    assert not os.path.exists(snapshot_file(base, 1))
+    assert os.path.exists(snapshot_file(base, 2))
+
+    loaded = LocalClassifier.load(snapshot_file(base, 3))
+    assert loaded.predict("Wohnmobil Saisonkennzeichen")[0] == "KFZ-Zulassung"
+
+
+def test_numbering_continues_after_restart(learner, tmp_path):
+    base = str(tmp_path / "modell.npz")
+    learner.add("Dackel anmelden", "Hundesteuer")
+    learner.update()
+
+    restarted = OnlineLearner(learner.model, snapshot_path=base, interval=3600)
+    try:
+        restarted.add("Kampfhund Steuer", "Hundesteuer")
+        restarted.update()
+    finally:
+        restarted.close()
+    assert current_snapshot(base)[1] == 2
+
+
+def test_failed_update_keeps_pending_feedback(learner, monkeypatch):
+    model = learner.model
+    learner.add("Dackel anmelden", "Hundesteuer")
+
+    def fail(self, path):
+        raise OSError("Datenträger voll")
+    monkeypatch.setattr(LocalClassifier, "save", fail)
+    with pytest.raises(OSError):
+        learner.update()
+    assert learner.model is model
+    assert learner.stats()["ausstehend"] == 1
+
+    monkeypatch.undo()
+    learner.add("Welpe anmelden", "Hundesteuer")
+    assert learner.update()
+    assert learner.stats()["gelernt"] == 2
+    assert learner.stats()["ausstehend"] == 0
+
+
+def test_failed_training_drops_batch(learner, monkeypatch):
+    learner.add("Dackel anmelden", "Hundesteuer")
+
+    def fail(self, texts, labels):
+        raise ValueError("Modell im alten Format")
+    monkeypatch.setattr(LocalClassifier, "partial_fit", fail)
+    with pytest.raises(ValueError):
+        learner.update()
+    stats = learner.stats()
+    assert (stats["ausstehend"], stats["verworfen"]) == (0, 1)
+    assert not learner.update()
+
+
+def test_pending_feedback_is_bounded(tmp_path):
+    learner = OnlineLearner(LocalClassifier().fit(TEXTS, LABELS), batch_size=1000, interval=3600,
+                            max_pending=3)
+    try:
+        for number in range(5):
+            learner.add(f"Dackel {number}", "Hundesteuer")
+        assert learner.stats()["ausstehend"] == 3
+        assert learner.stats()["verworfen"] == 2
+        assert [text for text, _ in learner._pending] == ["Dackel 2", "Dackel 3", "Dackel 4"]
+    finally:
+        learner.close()
@@ -0,0 +1,66 @@
+import pytest
+
+from response_parser import (PATH_FAILED, PATH_JSON, PATH_NAME_SCAN, PATH_PIPE, ClassificationParser,
+                             batch_schema, classification_schema)
+
+CATEGORIES = ["KFZ-Zulassung", "Gewerbeanmeldung", "Hundesteuer"]
+
+
+@pytest.fixture
+def parser():
+    return ClassificationParser(CATEGORIES, threshold=50)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"kategorie": "Hundesteuer", "konfidenz": 92}', (("Hundesteuer", 92), PATH_JSON)),
+    ('{"kategorie": "hundesteuer", "konfidenz": "87%"} Begründung folgt', (("Hundesteuer", 87), PATH_JSON)),
+    ('{"kategorie": "KEINE", "konfidenz": 0}', (("Nicht zuordbar", 0), PATH_JSON)),
+    ("KFZ-Zulassung|95", (("KFZ-Zulassung", 95), PATH_PIPE)),
+    ("Gewerbeanmeldung | 40", (("Nicht zuordbar", 40), PATH_PIPE)),
+    ("Das ist eindeutig Hundesteuer.", (("Hundesteuer", 80), PATH_NAME_SCAN)),
+    ("Keine Ahnung", (None, PATH_FAILED)),
+])
+def test_parse(parser, text, expected):
+    assert parser.parse(text) == expected
+
+
+def test_unknown_json_category_falls_back_to_name_scan(parser):
+    result, path = parser.parse('{"kategorie": "Baugenehmigung", "konfidenz": 90, "notiz": "eher KFZ-Zulassung"}')
+    assert (result, path) == (("KFZ-Zulassung", 80), PATH_NAME_SCAN)
+
+
+def test_confidence_is_clamped(parser):
+    assert parser.parse('{"kategorie": "Hundesteuer", "konfidenz": 150}')[0] == ("Hundesteuer", 100)
+    assert parser.parse('{"kategorie": "Hundesteuer", "konfidenz": true}')[0] == ("Nicht zuordbar", 0)
+
+
+def test_parse_batch_json_keeps_order_and_ignores_invalid_entries(parser):
+    text = ('{"ergebnisse": [{"nr": 2, "kategorie": "Hundesteuer", "konfidenz": 90},'
+            ' {"nr": 1, "kategorie": "KFZ-Zulassung", "konfidenz": 85},'
+            ' {"nr": 2, "kategorie": "Gewerbeanmeldung", "konfidenz": 99},'
+            ' {"nr": 7, "kategorie": "Hundesteuer", "konfidenz": 99}, "kaputt"]}')
+    assert parser.parse_batch(text, 3) == [
+        (("KFZ-Zulassung", 85), PATH_JSON), (("Hundesteuer", 90), PATH_JSON), (None, PATH_FAILED)]
+
+
+def test_parse_batch_text_lines(parser):
+    text = "1. | Hundesteuer | 90\n2)|KEINE|0\nunsinn\n3|Gewerbeanmeldung|70"
+    assert parser.parse_batch(text, 3) == [
+        (("Hundesteuer", 90), PATH_PIPE), (("Nicht zuordbar", 0), PATH_PIPE), (("Gewerbeanmeldung", 70), PATH_PIPE)]
+
+
+def test_is_complete(parser):
+    assert not parser.is_complete('{"kategorie": "Hundesteuer", "konf')
+    assert parser.is_complete('{"kategorie": "Hundesteuer", "konfidenz": 90}')
+    assert not parser.is_complete("Hundesteuer|9")
+    assert parser.is_complete("Hundesteuer|95\n")
+    assert not parser.is_complete("1|Hundesteuer|90\n2|KFZ-Zulassung|8", count=2)
+    assert parser.is_complete("1|Hundesteuer|90\n2|KFZ-Zulassung|85\n", count=2)
+
+
+def test_schemas_list_categories():
+    schema = classification_schema(CATEGORIES)
+    assert schema["properties"]["kategorie"]["enum"] == CATEGORIES + ["KEINE"]
+    item = batch_schema(CATEGORIES)["properties"]["ergebnisse"]["items"]
+    assert item["required"] == ["nr", "kategorie", "konfidenz"]
+    assert schema["required"] == ["kategorie", "konfidenz"]
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from storage import FSYNC_NEVER, JsonlSegmentStorage, create_storage
+
+
+def _record(record_id, category=None):
+    return {"id": record_id, "vorname": "Erika", "nachname": "Muster", "betreff": "Hund",
+            "nachricht": "Hundesteuer anmelden", "zeitstempel": f"2024-01-01 00:00:{record_id[-1]}0",
+            "kategorie": category, "konfidenz": None}
+
+
+@pytest.fixture(params=["dateien", "jsonl", "sqlite"])
+def storage(request, tmp_path):
+    path = tmp_path / ("anfragen.db" if request.param == "sqlite" else "ablage")
+    backend = create_storage(request.param, str(path), batch_size=1, fsync=FSYNC_NEVER)
+    yield backend
+    backend.close()
+
+
+def test_save_update_and_read_back(storage):
+    storage.save(_record("a1"))
+    storage.save(_record("b2", "KFZ-Zulassung"))
+    storage.update("a1", {"kategorie": "Hundesteuer", "konfidenz": 90})
+
+    records = {record["id"]: record for record in storage.iter_records()}
+    assert records["a1"]["kategorie"] == "Hundesteuer"
+    assert records["a1"]["konfidenz"] == 90
+    assert records["b2"]["kategorie"] == "KFZ-Zulassung"
+    assert storage.get("a1")["kategorie"] == "Hundesteuer"
+    assert storage.get("unbekannt") is None
+
+
+def test_buffered_entries_are_visible_after_flush(tmp_path):
+    storage = create_storage("jsonl", str(tmp_path), batch_size=100, flush_interval=60, fsync=FSYNC_NEVER)
+    try:
+        storage.save(_record("a1"))
+        assert storage.get("a1") is not None
+    finally:
+        storage.close()
+
+
+def test_update_of_unknown_id_is_ignored(storage):
+    storage.update("fehlt", {"kategorie": "Hundesteuer"})
+    assert list(storage.iter_records()) == []
+
+
+def test_jsonl_truncated_line_is_removed_on_reopen(tmp_path):
+    storage = JsonlSegmentStorage(str(tmp_path), fsync=FSYNC_NEVER)
+    storage.save(_record("a1"))
+    storage.close()
+    segment = os.path.join(tmp_path, "anfragen-000001.jsonl")
+    with open(segment, "ab") as f:
+        f.write('{"id": "b2", "daten": {"betreff": "Abgebroch'.encode("utf-8"))
+
+    storage = JsonlSegmentStorage(str(tmp_path), fsync=FSYNC_NEVER)
+    storage.save(_record("c3"))
+    storage.update("a1", {"kategorie": "Hundesteuer"})
+    assert sorted(record["id"] for record in storage.iter_records()) == ["a1", "c3"]
+    assert storage.get("a1")["kategorie"] == "Hundesteuer"
+    storage.close()
+
+    with open(segment, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+
+def test_jsonl_skips_undecodable_lines(tmp_path, capsys):
+    with open(os.path.join(tmp_path, "anfragen-000001.jsonl"), "w", encoding="utf-8") as f:
+        f.write('{"id": "a1", "daten": {"id": "a1"}}\n{kaputt\n{"id": "b2", "daten": {"id": "b2"}}\n')
+
+    storage = JsonlSegmentStorage(str(tmp_path), fsync=FSYNC_NEVER)
+    try:
+        assert sorted(record["id"] for record in storage.iter_records()) == ["a1", "b2"]
+    finally:
+        storage.close()
+    assert "Zeile 2" in capsys.readouterr().out
+
+
+def test_jsonl_get_uses_index_across_segments(tmp_path, monkeypatch):
+    storage = JsonlSegmentStorage(str(tmp_path), max_segment_bytes=200, fsync=FSYNC_NEVER)
+    try:
+        storage.save(_record("a1"))
+        storage.save(_record("b2"))
+        assert storage.get("a1")["kategorie"] is None
+
+        monkeypatch.setattr(storage, "iter_records", None)
+        storage.update("a1", {"kategorie": "Hundesteuer"})
+        storage.save(_record("c3", "KFZ-Zulassung"))
+        assert len(storage._segments()) > 1
+        assert storage.get("a1")["kategorie"] == "Hundesteuer"
+        assert storage.get("c3")["kategorie"] == "KFZ-Zulassung"
+        assert storage.get("fehlt") is None
+    finally:
+        storage.close()
+
+
+def test_jsonl_index_offsets_of_buffered_batch(tmp_path):
+    storage = JsonlSegmentStorage(str(tmp_path), batch_size=100, flush_interval=60, fsync=FSYNC_NEVER)
+    try:
+        storage.save(_record("a1"))
+        storage.get("a1")
+        for record_id in ("b2", "c3", "d4"):
+            record = _record(record_id)
+            record["nachricht"] = f"Größere Hündin für {record_id} anmelden"
+            storage.save(record)
+        storage.update("c3", {"kategorie": "Hundesteuer"})
+        assert storage.get("b2")["nachricht"] == "Größere Hündin für b2 anmelden"
+        assert storage.get("c3")["kategorie"] == "Hundesteuer"
+        assert storage.get("d4")["id"] == "d4"
+    finally:
+        storage.close()
+    with open(os.path.join(tmp_path, "anfragen-000001.jsonl"), "rb") as f:
+        assert b"\r\n" not in f.read()
+
+
+def test_jsonl_get_treats_bad_index_entry_as_miss(tmp_path, capsys):
+    storage = JsonlSegmentStorage(str(tmp_path), fsync=FSYNC_NEVER)
+    try:
+        storage.save(_record("a1"))
+        storage.get("a1")
+        path, offset = storage._index["a1"][0]
+        storage._index["a1"] = [(path, offset + 5)]
+        assert storage.get("a1") is None
+    finally:
+        storage.close()
+    assert "Unlesbare Zeile" in capsys.readouterr().out
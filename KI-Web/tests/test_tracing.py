@@ -0,0 +1,79 @@
+import json
+import random
+import tracemalloc
+
+import pytest
+
+from tracing import Tracer
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "traces.jsonl")
+
+
+def _entries(log_path):
+    with open(log_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    tracer = Tracer(None)
+    assert tracer.start("GET /") is None
+    with tracer.span("klassifikation"):
+        pass
+    tracer.finish(None)
+    tracer.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_line_format(log_path):
+    tracer = Tracer(log_path)
+    trace = tracer.start("POST /upload")
+    with tracer.span("speichern"):
+        pass
+    with tracer.span("klassifikation"):
+        pass
+    tracer.finish(trace, status=200)
+    tracer.close()
+
+    [entry] = _entries(log_path)
+    assert entry["trace_id"] == trace.id
+    assert entry["name"] == "POST /upload"
+    assert entry["status"] == 200
+    assert entry["dauer_ms"] >= 0
+    assert [span["name"] for span in entry["spans"]] == ["speichern", "klassifikation"]
+    assert set(entry["spans"][0]) == {"name", "start_ms", "dauer_ms"}
+    assert entry["spans"][1]["start_ms"] >= entry["spans"][0]["start_ms"]
+    assert "profil" not in entry and "speicher" not in entry
+
+
+def test_profile_rate_samples_requests(log_path, monkeypatch):
+    values = iter([0.1, 0.5, 0.29, 0.9])
+    monkeypatch.setattr(random, "random", lambda: next(values))
+    tracer = Tracer(log_path, profile_rate=0.3)
+    for _ in range(4):
+        tracer.finish(tracer.start("GET /"))
+    tracer.close()
+
+    assert ["profil" in entry for entry in _entries(log_path)] == [True, False, True, False]
+
+
+def test_profiled_request_stops_tracemalloc(log_path):
+    assert not tracemalloc.is_tracing()
+    tracer = Tracer(log_path, profile_rate=1.0, profile_top=5)
+    trace = tracer.start("GET /")
+    assert tracemalloc.is_tracing()
+    data = [bytearray(1000) for _ in range(100)]
+    tracer.finish(trace)
+    assert not tracemalloc.is_tracing()
+
+    tracer.finish(tracer.start("GET /"))
+    tracer.close()
+    entries = _entries(log_path)
+    assert len(entries) == 2
+    memory = entries[0]["speicher"]
+    assert memory["spitze_bytes"] >= memory["differenz_bytes"] >= 100 * 1000
+    assert 0 < len(memory["allokationen"]) <= 5
+    assert "function calls" in entries[0]["profil"]
+    assert len(data) == 100
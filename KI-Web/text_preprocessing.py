@@ -0,0 +1,146 @@
+from functools import lru_cache
+import re
+
+# Vorverarbeitung wie in den KNIME-Workflows:
+# Punctuation Erasure -> Case Converter -> Stop Word Filter -> Snowball Stemmer
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Deutsche Stoppwortliste (entspricht der Snowball-Liste, die der KNIME Stop Word Filter verwendet)
+GERMAN_STOPWORDS = frozenset("""
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes
+anderm andern anderr anders auch auf aus bei bin bis bist da damit dann das dass dasselbe dazu daß
+dein deine deinem deinen deiner deines dem demselben den denn denselben der derer derselbe
+derselben des desselben dessen dich die dies diese dieselbe dieselben diesem diesen dieser dieses
+dir doch dort du durch ein eine einem einen einer eines einig einige einigem einigen einiger
+einiges einmal er es etwas euch euer eure eurem euren eurer eures für gegen gewesen hab habe haben
+hat hatte hatten hier hin hinter ich ihm ihn ihnen ihr ihre ihrem ihren ihrer ihres im in indem
+ins ist jede jedem jeden jeder jedes jene jenem jenen jener jenes jetzt kann kein keine keinem
+keinen keiner keines können könnte machen man manche manchem manchen mancher manches mein meine
+meinem meinen meiner meines mich mir mit muss musste nach nicht nichts noch nun nur ob oder ohne
+sehr sein seine seinem seinen seiner seines selbst sich sie sind so solche solchem solchen
+solcher solches soll sollte sondern sonst über um und uns unsere unserem unseren unser unseres
+unter viel vom von vor während war waren warst was weg weil weiter welche welchem welchen welcher
+welches wenn werde werden wie wieder will wir wird wirst wo wollen wollte würde würden zu zum zur
+zwar zwischen
+""".split())
+
+_VOWELS = frozenset("aeiouyäöü")
+_S_ENDING = frozenset("bdfghklmnrt")
+_ST_ENDING = frozenset("bdfghklmnt")
+_STEP1_SUFFIXES = ("ern", "em", "er", "en", "es", "e", "s")
+_STEP2_SUFFIXES = ("est", "en", "er", "st")
+_STEP3_SUFFIXES = ("heit", "lich", "keit", "isch", "end", "ung", "ig", "ik")
+
+
+def _region_start(word: str, start: int) -> int:
+    # Position nach dem ersten Nicht-Vokal, der auf einen Vokal folgt
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+@lru_cache(maxsize=100000)
+def stem(word: str) -> str:
+    """
+    Deutscher Snowball-Stemmer (wie der Snowball Stemmer-Knoten in KNIME).
+
+    Args:
+        word: Ein kleingeschriebenes Wort
+
+    Returns:
+        Der Wortstamm
+    """
+    word = word.replace("ß", "ss")
+
+    # u und y zwischen Vokalen werden für die Regionsbestimmung als Konsonanten markiert
+    chars = list(word)
+    for i in range(1, len(chars) - 1):
+        if chars[i] in "uy" and chars[i - 1] in _VOWELS and chars[i + 1] in _VOWELS:
+            chars[i] = chars[i].upper()
+    word = "".join(chars)
+
+    r1 = _region_start(word, 0)
+    r2 = _region_start(word, r1)
+    r1 = max(r1, 3)
+
+    # Schritt 1
+    for suffix in _STEP1_SUFFIXES:
+        if word.endswith(suffix):
+            pos = len(word) - len(suffix)
+            if pos >= r1:
+                if suffix in ("ern", "em", "er"):
+                    word = word[:pos]
+                elif suffix == "s":
+                    if pos > 0 and word[pos - 1] in _S_ENDING:
+                        word = word[:pos]
+                else:
+                    word = word[:pos]
+                    if word.endswith("niss"):
+                        word = word[:-1]
+            break
+
+    # Schritt 2
+    for suffix in _STEP2_SUFFIXES:
+        if word.endswith(suffix):
+            pos = len(word) - len(suffix)
+            if pos >= r1:
+                if suffix != "st":
+                    word = word[:pos]
+                elif pos >= 4 and word[pos - 1] in _ST_ENDING:
+                    word = word[:pos]
+            break
+
+    # Schritt 3: Ableitungssuffixe
+    for suffix in _STEP3_SUFFIXES:
+        if word.endswith(suffix):
+            pos = len(word) - len(suffix)
+            if pos >= r2:
+                if suffix in ("end", "ung"):
+                    word = word[:pos]
+                    if word.endswith("ig") and len(word) - 2 >= r2 and not word[:-2].endswith("e"):
+                        word = word[:-2]
+                elif suffix in ("ig", "ik", "isch"):
+                    if not word[:pos].endswith("e"):
+                        word = word[:pos]
+                elif suffix in ("lich", "heit"):
+                    word = word[:pos]
+                    if (word.endswith("er") or word.endswith("en")) and len(word) - 2 >= r1:
+                        word = word[:-2]
+                else:
+                    word = word[:pos]
+                    for inner in ("lich", "ig"):
+                        if word.endswith(inner) and len(word) - len(inner) >= r2:
+                            word = word[:-len(inner)]
+                            break
+            break
+
+    return (word.replace("U", "u").replace("Y", "y")
+                .replace("ä", "a").replace("ö", "o").replace("ü", "u"))
+
+
+def tokenize(text: str) -> list:
+    """
+    Wandelt in Kleinbuchstaben um und entfernt Satzzeichen.
+
+    Args:
+        text: Der Eingabetext
+
+    Returns:
+        Liste der Wörter
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def preprocess(text: str) -> list:
+    """
+    Vollständige Vorverarbeitung eines Textes: Tokenisierung, Stoppwortfilter und Stemming.
+
+    Args:
+        text: Der Eingabetext
+
+    Returns:
+        Liste der Wortstämme
+    """
+    return [stem(token) for token in tokenize(text) if token not in GERMAN_STOPWORDS]
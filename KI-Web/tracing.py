@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+import cProfile
+import io
+import json
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+
+# Allokationen der Profiling-Werkzeuge selbst ausblenden
+_PROFILER_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+]
+
+
+class Trace:
+    """
+    Zeitlich erfasste Schritte (Spans) einer einzelnen Anfrage.
+    """
+
+    def __init__(self, name: str, profile: bool = False):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.start = time.perf_counter()
+        self.timestamp = time.time()
+        self.spans = []
+        self.profiler = cProfile.Profile() if profile else None
+
+    def to_dict(self, **fields) -> dict:
+        entry = {
+            "trace_id": self.id,
+            "name": self.name,
+            "zeitstempel": self.timestamp,
+            "dauer_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "spans": self.spans,
+        }
+        entry.update(fields)
+        return entry
+
+
+class Tracer:
+    """
+    Optionale Instrumentierung: erfasst pro Anfrage die Dauer der einzelnen Schritte und schreibt
+    sie als JSON-Zeile in eine Log-Datei.
+
+    Ein einstellbarer Anteil der Anfragen wird zusätzlich mit cProfile und tracemalloc untersucht.
+    Da beide Werkzeuge prozessweit arbeiten, wird immer nur eine Anfrage gleichzeitig profiliert;
+    Spans aus anderen Threads (z.B. Hintergrund-Klassifikation) werden nicht zugeordnet.
+    tracemalloc läuft nur während einer profilierten Anfrage (mit einem Stack-Frame pro Allokation),
+    alle übrigen Anfragen bleiben ohne Mehraufwand.
+    """
+
+    def __init__(self, log_path: str = None, profile_rate: float = 0.0, profile_top: int = 20):
+        """
+        Initialisiert den Tracer.
+
+        Args:
+            log_path: Ziel der JSON-Zeilen (None = Tracing deaktiviert)
+            profile_rate: Anteil der Anfragen (0.0 bis 1.0), die profiliert werden
+            profile_top: Anzahl der Funktionen bzw. Allokationsstellen im Profil
+        """
+        self.enabled = log_path is not None
+        self.profile_rate = profile_rate
+        self.profile_top = profile_top
+        self._local = threading.local()
+        self._profile_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8") if self.enabled else None
+
+    def start(self, name: str):
+        """
+        Beginnt den Trace einer Anfrage im aktuellen Thread.
+
+        Args:
+            name: Bezeichnung der Anfrage (z.B. der Pfad)
+
+        Returns:
+            Der Trace oder None, wenn das Tracing deaktiviert ist
+        """
+        if not self.enabled:
+            return None
+        profile = (self.profile_rate > 0 and random.random() < self.profile_rate
+                   and self._profile_lock.acquire(blocking=False))
+        trace = Trace(name, profile)
+        self._local.trace = trace
+        if profile:
+            # Läuft tracemalloc bereits (z.B. PYTHONTRACEMALLOC), wird es nicht beendet und die
+            # Allokationen werden gegen einen Ausgangs-Snapshot verglichen
+            trace.own_tracemalloc = not tracemalloc.is_tracing()
+            if trace.own_tracemalloc:
+                tracemalloc.start(1)
+                trace.snapshot = None
+            else:
+                tracemalloc.reset_peak()
+                trace.snapshot = self._snapshot()
+            trace.memory_start = tracemalloc.get_traced_memory()[0]
+            trace.profiler.enable()
+        return trace
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Misst einen Schritt der laufenden Anfrage. Ohne aktiven Trace im Thread ohne Wirkung.
+
+        Args:
+            name: Name des Schritts
+        """
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            trace.spans.append({
+                "name": name,
+                "start_ms": round((start - trace.start) * 1000, 3),
+                "dauer_ms": round((end - start) * 1000, 3),
+            })
+
+    def finish(self, trace, **fields) -> None:
+        """
+        Schließt den Trace ab und schreibt ihn ins Log.
+
+        Args:
+            trace: Der mit start() begonnene Trace (None wird ignoriert)
+            **fields: Zusätzliche Felder (z.B. HTTP-Status)
+        """
+        if trace is None:
+            return
+        self._local.trace = None
+        if trace.profiler is not None:
+            trace.profiler.disable()
+            try:
+                fields["speicher"] = self._memory_summary(trace)
+            finally:
+                if trace.own_tracemalloc:
+                    tracemalloc.stop()
+            fields["profil"] = self._profile_summary(trace.profiler)
+            self._profile_lock.release()
+
+        line = json.dumps(trace.to_dict(**fields), ensure_ascii=False)
+        with self._write_lock:
+            self._log.write(line + "\n")
+            self._log.flush()
+
+    def close(self) -> None:
+        """
+        Schließt die Log-Datei.
+        """
+        if self._log is not None:
+            with self._write_lock:
+                self._log.close()
+
+    def _profile_summary(self, profiler) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats("cumulative").print_stats(self.profile_top)
+        return output.getvalue()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(_PROFILER_FILTERS)
+
+    def _memory_summary(self, trace) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._snapshot()
+        if trace.snapshot is None:
+            # tracemalloc wurde mit der Anfrage gestartet: alle Allokationen gehören zu ihr
+            difference = snapshot.statistics("lineno")
+        else:
+            difference = snapshot.compare_to(trace.snapshot, "lineno")
+        return {
+            "differenz_bytes": current - trace.memory_start,
+            "spitze_bytes": peak,
+            "allokationen": [str(stat) for stat in difference[:self.profile_top]],
+        }